@@ -14,6 +14,10 @@ Key properties:
 - High-confidence gating (configurable)
 - Non-destructive merge: appends blocks that don't already exist
 - Writes a manifest with before/after hashes and decisions
+- Records the canonical keys of appended blocks in `memory/staging/index/canonical.sqlite`
+  (see canonical_index.py), which dedupe_staging uses to filter already-promoted blocks
+- Records stage metrics (wall/CPU time, bytes, blocks/s, parse/score/hash/merge/io
+  timings) in the manifest and in the `complete` telemetry event
 
 Usage:
   python3 memory-architecture/scripts/apply_staging.py --dry-run
@@ -25,14 +29,15 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
-import hashlib
 import json
 import re
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-from telemetry import append_jsonl, env_session_key
+from canonical_index import CanonicalIndex
+from md_blocks import BlockRecord, parse_blocks, sha256_text, split_blocks
+from telemetry import StageMetrics, append_jsonl, env_session_key
 
 WORKSPACE = Path(__file__).resolve().parents[2]
 
@@ -46,76 +51,44 @@ def write_text(p: Path, s: str) -> None:
     p.write_text(s, encoding="utf-8")
 
 
-def sha256_text(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
-
-
 def sha256_file(p: Path) -> str:
     return sha256_text(read_text(p))
 
 
-def now_z() -> str:
-    return dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
-
-
-def split_blocks(md: str) -> List[str]:
-    md = md.strip("\n")
-    if not md.strip():
-        return []
-    m = re.search(r"^##\s+", md, flags=re.M)
-    if not m:
-        return [md.strip() + "\n"]
-
-    prefix = md[: m.start()].strip("\n")
-    rest = md[m.start() :]
+def file_size(p: Path) -> int:
+    return p.stat().st_size if p.exists() else 0
 
-    blocks: List[str] = []
-    if prefix.strip():
-        blocks.append(prefix.strip() + "\n\n")
 
-    parts = re.split(r"(?m)^(?=##\s+)", rest)
-    for p in parts:
-        p = p.strip("\n")
-        if p.strip():
-            blocks.append(p.strip() + "\n\n")
+def read_candidates(p: Path, metrics: StageMetrics) -> List[BlockRecord]:
+    """Read and parse a deduped staging file, charging I/O and parsing to `metrics`."""
+    with metrics.phase("io"):
+        text = p.read_text(encoding="utf-8")
+    with metrics.phase("parse"):
+        blocks = [b for b in parse_blocks(text) if b.is_candidate]
+    metrics.bytes_read += file_size(p)
+    metrics.blocks += len(blocks)
     return blocks
 
 
-def norm_block(s: str) -> str:
-    s = re.sub(r"[ \t]+$", "", s, flags=re.M)
-    s = re.sub(r"\n{3,}", "\n\n", s)
-    return s.strip() + "\n\n"
-
-
-def extract_type(block: str) -> str:
-    for ln in block.splitlines()[:30]:
-        m = re.match(r"-\s*type:\s*(\w+)", ln.strip(), flags=re.I)
-        if m:
-            return m.group(1).lower()
-    return "unknown"
-
-
-def has_field(block: str, field: str) -> bool:
-    pat = re.compile(rf"^\s*-\s*{re.escape(field)}\s*:\s*.+$", flags=re.I | re.M)
-    return bool(pat.search(block))
+def now_z() -> str:
+    return dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
-def has_steps(block: str) -> bool:
-    return bool(re.search(r"(?m)^\s*\d+\)\s+", block)) or ("steps:" in block.lower())
+def has_steps(block: BlockRecord) -> bool:
+    return bool(re.search(r"(?m)^\s*\d+\)\s+", block.text)) or ("steps:" in block.lower)
 
 
-def contains_time_bound(block: str, phrases: List[str]) -> bool:
-    b = block.lower()
-    return any(p in b for p in phrases)
+def contains_time_bound(block: BlockRecord, phrases: List[str]) -> bool:
+    return any(p in block.lower for p in phrases)
 
 
-def blocked_by_safety(block: str, deny_patterns: List[str], deny_if_contains: List[str]) -> Optional[str]:
+def blocked_by_safety(block: BlockRecord, deny_patterns: List[str], deny_if_contains: List[str]) -> Optional[str]:
     for s in deny_if_contains:
-        if s.lower() in block.lower():
+        if s.lower() in block.lower:
             return f"denyIfContains:{s}"
     for pat in deny_patterns:
         try:
-            if re.search(pat, block, flags=re.I):
+            if re.search(pat, block.text, flags=re.I):
                 return f"denyPattern:{pat}"
         except re.error:
             # If a regex is invalid, fail closed by blocking.
@@ -131,42 +104,42 @@ class Decision:
     kind: str
 
 
-def score_block(block: str, cfg: Dict) -> Decision:
+def score_block(block: BlockRecord, cfg: Dict) -> Decision:
     safety = cfg.get("safety", {})
     scoring = cfg.get("scoring", {})
     hi = int(scoring.get("highConfidenceScore", 4))
 
     deny = blocked_by_safety(block, safety.get("denyPatterns", []), safety.get("denyIfContains", []))
     if deny:
-        return Decision(False, f"blocked:{deny}", score=-999, kind=extract_type(block))
+        return Decision(False, f"blocked:{deny}", score=-999, kind=block.type)
 
-    kind = extract_type(block)
+    kind = block.type
 
     if kind == "procedural":
         pcfg = scoring.get("procedural", {})
         points = pcfg.get("points", {})
         score = 0
-        if has_field(block, "source") or has_field(block, "evidence"):
+        if block.has_field("source") or block.has_field("evidence"):
             score += int(points.get("hasEvidence", 0))
-        if has_field(block, "trigger"):
+        if block.has_field("trigger"):
             score += int(points.get("hasTrigger", 0))
-        if "verification:" in block.lower() or has_field(block, "verification"):
+        if "verification:" in block.lower or block.has_field("verification"):
             score += int(points.get("hasVerification", 0))
         if has_steps(block):
             score += int(points.get("hasSteps", 0))
 
         if pcfg.get("requireTrigger", False):
-            if not has_field(block, "trigger"):
+            if not block.has_field("trigger"):
                 return Decision(False, "missing:trigger", score=score, kind=kind)
             if not pcfg.get("allowTriggerPlaceholder", False):
-                if re.search(r"^\s*-\s*trigger:\s*\(.*\)\s*$", block, flags=re.I | re.M):
+                if re.search(r"^\s*-\s*trigger:\s*\(.*\)\s*$", block.text, flags=re.I | re.M):
                     return Decision(False, "placeholder:trigger", score=score, kind=kind)
 
         if pcfg.get("requireVerification", False):
-            if "verification" not in block.lower():
+            if "verification" not in block.lower:
                 return Decision(False, "missing:verification", score=score, kind=kind)
             if not pcfg.get("allowVerificationPlaceholder", False):
-                if re.search(r"^\s*-\s*verification:\s*\(.*\)\s*$", block, flags=re.I | re.M):
+                if re.search(r"^\s*-\s*verification:\s*\(.*\)\s*$", block.text, flags=re.I | re.M):
                     return Decision(False, "placeholder:verification", score=score, kind=kind)
 
         return Decision(score >= hi, "score" if score >= hi else "score-too-low", score=score, kind=kind)
@@ -175,7 +148,7 @@ def score_block(block: str, cfg: Dict) -> Decision:
         scfg = scoring.get("semantic", {})
         points = scfg.get("points", {})
         score = 0
-        has_ev = has_field(block, "evidence") or has_field(block, "source")
+        has_ev = block.has_field("evidence") or block.has_field("source")
         if has_ev:
             score += int(points.get("hasEvidence", 0))
         if scfg.get("denyTimeBoundLanguage", False):
@@ -193,48 +166,36 @@ def score_block(block: str, cfg: Dict) -> Decision:
     return Decision(False, f"kind:{kind}-not-auto", score=0, kind=kind)
 
 
-def canonical_key(block: str) -> str:
-    """Stable dedupe key for a block.
-
-    We intentionally ignore volatile metadata that changes across runs (e.g. generated_at).
-    This makes apply idempotent even if distill is re-run.
-    """
-
-    b = norm_block(block)
-    # Drop volatile lines
-    b = re.sub(r"(?im)^\s*-\s*generated_at\s*:\s*.*$\n?", "", b)
-    # Normalize whitespace again after removals
-    b = norm_block(b)
-    return sha256_text(b.strip())
-
-
-def merge_into_topic(dest_path: Path, new_blocks: List[str]) -> Tuple[int, int, str, str, str, int]:
+def merge_into_topic(
+    dest_path: Path, new_blocks: List[BlockRecord]
+) -> Tuple[int, int, str, str, str, int, List[BlockRecord]]:
+    """Append the blocks not already in `dest_path`; the last item returned is the blocks appended."""
     before = read_text(dest_path)
     before_hash = sha256_text(before)
 
-    existing_blocks = split_blocks(before)
-    existing_keys = {canonical_key(b) for b in existing_blocks if b.lstrip().startswith("##")}
+    existing_blocks = parse_blocks(before)
+    existing_keys = {b.canonical_key for b in existing_blocks if b.is_candidate}
 
     existing = before
-    added = 0
+    added: List[BlockRecord] = []
     skipped_existing = 0
 
     for b in new_blocks:
-        if not b.lstrip().startswith("##"):
+        if not b.is_candidate:
             continue
-        key = canonical_key(b)
+        key = b.canonical_key
         if key in existing_keys:
             skipped_existing += 1
             continue
-        b_norm = norm_block(b)
+        b_norm = b.normalized + "\n\n"
         if existing and not existing.endswith("\n"):
             existing += "\n"
         existing += b_norm
         existing_keys.add(key)
-        added += 1
+        added.append(b)
 
     after_hash = sha256_text(existing)
-    return (len(split_blocks(before)), len(split_blocks(existing)), before_hash, after_hash, existing, skipped_existing)
+    return (len(existing_blocks), len(split_blocks(existing)), before_hash, after_hash, existing, skipped_existing, added)
 
 
 def main() -> None:
@@ -276,6 +237,7 @@ def main() -> None:
         args.write = False
 
     run_ts = now_z()
+    metrics = StageMetrics("apply_staging")
 
     manifest: Dict = {
         "run_ts": run_ts,
@@ -305,17 +267,22 @@ def main() -> None:
         print(json.dumps(manifest, indent=2))
         return
 
+    # Canonical keys dedupe_staging filters already-promoted blocks with; kept current as files are written.
+    canon = CanonicalIndex(WORKSPACE / "memory" / "staging" / "index" / "canonical.sqlite", WORKSPACE) if args.write else None
+
     # Apply topic candidates
     for src in sorted(src_topics.glob("*.md")):
         topic_name = src.stem
         dest = dst_topics / f"{topic_name}.md"
 
-        blocks = split_blocks(read_text(src))
-        candidate_blocks = [b for b in blocks if b.lstrip().startswith("##")]
+        candidate_blocks = read_candidates(src, metrics)
 
-        accepted: List[str] = []
+        accepted: List[BlockRecord] = []
         for b in candidate_blocks:
-            dec = score_block(b, cfg)
+            with metrics.phase("score"):
+                dec = score_block(b, cfg)
+            with metrics.phase("hash"):
+                block_sha256 = b.sha256
             entry = {
                 "source": str(src.relative_to(WORKSPACE)),
                 "topic": topic_name,
@@ -323,7 +290,7 @@ def main() -> None:
                 "score": dec.score,
                 "decision": "accept" if dec.accepted else "skip",
                 "reason": dec.reason,
-                "block_sha256": sha256_text(norm_block(b)),
+                "block_sha256": block_sha256,
             }
             if dec.accepted:
                 accepted.append(b)
@@ -332,7 +299,12 @@ def main() -> None:
                 manifest["skipped"].append(entry)
 
         if accepted:
-            before_blocks, after_blocks, h_before, h_after, merged, skipped_existing = merge_into_topic(dest, accepted)
+            metrics.bytes_read += file_size(dest)
+            if canon is not None:
+                with metrics.phase("index"):
+                    canon.refresh_file(dest)
+            with metrics.phase("merge"):
+                before_blocks, after_blocks, h_before, h_after, merged, skipped_existing, added = merge_into_topic(dest, accepted)
             file_entry = {
                 "dest": str(dest.relative_to(WORKSPACE)),
                 "before_blocks": before_blocks,
@@ -343,16 +315,22 @@ def main() -> None:
             }
             manifest.setdefault("dest_files", []).append(file_entry)
             if args.write:
-                write_text(dest, merged)
+                with metrics.phase("io"):
+                    write_text(dest, merged)
+                metrics.bytes_written += len(merged.encode("utf-8"))
+                with metrics.phase("index"):
+                    canon.record(dest, added)
 
     # Apply MEMORY semantic candidates (stricter gating)
     if src_mem_candidates.exists():
-        mem_blocks = split_blocks(read_text(src_mem_candidates))
-        mem_candidate_blocks = [b for b in mem_blocks if b.lstrip().startswith("##")]
+        mem_candidate_blocks = read_candidates(src_mem_candidates, metrics)
 
-        mem_accepted: List[str] = []
+        mem_accepted: List[BlockRecord] = []
         for b in mem_candidate_blocks:
-            dec = score_block(b, cfg)
+            with metrics.phase("score"):
+                dec = score_block(b, cfg)
+            with metrics.phase("hash"):
+                block_sha256 = b.sha256
             # Only allow semantic blocks into MEMORY.md
             if dec.kind != "semantic":
                 dec = Decision(False, f"memory-only-semantic (was {dec.kind})", dec.score, dec.kind)
@@ -364,7 +342,7 @@ def main() -> None:
                 "score": dec.score,
                 "decision": "accept" if dec.accepted else "skip",
                 "reason": dec.reason,
-                "block_sha256": sha256_text(norm_block(b)),
+                "block_sha256": block_sha256,
             }
             if dec.accepted:
                 mem_accepted.append(b)
@@ -373,7 +351,12 @@ def main() -> None:
                 manifest["skipped"].append(entry)
 
         if mem_accepted:
-            before_blocks, after_blocks, h_before, h_after, merged, skipped_existing = merge_into_topic(dst_memory, mem_accepted)
+            metrics.bytes_read += file_size(dst_memory)
+            if canon is not None:
+                with metrics.phase("index"):
+                    canon.refresh_file(dst_memory)
+            with metrics.phase("merge"):
+                before_blocks, after_blocks, h_before, h_after, merged, skipped_existing, added = merge_into_topic(dst_memory, mem_accepted)
             file_entry = {
                 "dest": str(dst_memory.relative_to(WORKSPACE)),
                 "before_blocks": before_blocks,
@@ -384,10 +367,19 @@ def main() -> None:
             }
             manifest.setdefault("dest_files", []).append(file_entry)
             if args.write:
-                write_text(dst_memory, merged)
+                with metrics.phase("io"):
+                    write_text(dst_memory, merged)
+                metrics.bytes_written += len(merged.encode("utf-8"))
+                with metrics.phase("index"):
+                    canon.record(dst_memory, added)
+
+    if canon is not None:
+        canon.commit()
+        canon.close()
 
     # Ensure dest_files exists even when no writes occurred (rollback tooling expects it)
     manifest.setdefault("dest_files", [])
+    manifest["metrics"] = metrics.summary()
 
     out_manifest = manifests_dir / f"apply-{run_ts}.json"
     write_text(out_manifest, json.dumps(manifest, indent=2) + "\n")
@@ -402,6 +394,7 @@ def main() -> None:
             "write": bool(args.write),
             "applied": len(manifest["applied"]),
             "skipped": len(manifest["skipped"]),
+            "metrics": manifest["metrics"],
         },
     )
 
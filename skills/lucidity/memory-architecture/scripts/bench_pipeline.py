@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""Benchmark: the full Lucidity pipeline on synthetic workspaces.
+
+Generates a deterministic workspace at a given scale and times each stage the
+way cron runs it (one subprocess per script):
+
+  distill_sessions -> distill_daily (+ incremental re-run) -> dedupe_staging
+  (+ --full rebuilds, serial and --jobs N) -> apply_staging (+ idempotent
+  re-run) -> backup_memory -> prune_staging
+
+Every stage is also checked for correctness, so a speed-up that changes output
+shows up as a failure rather than a win:
+- distill_sessions selects exactly the in-window, non-tool-result events
+- distill_daily writes a receipt per log; the re-run stages nothing new
+- dedupe output has no exact or (type, heading) duplicates across files and
+  drops no key; a `--full --jobs N` rebuild is byte-identical to a serial one
+- apply re-run leaves canonical files byte-identical
+- backup tarball holds exactly the files in its manifest
+- prune archives exactly the aged receipts, with matching sha256
+
+Scales (logs / session JSONL / pre-staged blocks):
+  small   30 logs,    10 MB,   10k blocks
+  medium  365 logs,  100 MB,  100k blocks
+  large   3650 logs,   1 GB,    1M blocks
+
+Results are JSON (skill version, platform, scale, per-stage wall/CPU time and
+the stage's own metrics from telemetry); `--compare` diffs against an earlier
+result file so regressions are visible between releases.
+
+`dedupe_staging_jobs` records `speedup` (serial `--full` wall time over the
+`--jobs N` one, N from --dedupe-jobs) next to `max_speedup`, the bound implied
+by the share of the serial run spent in work the pool takes over: the `parse`,
+`keys` and `near` phases, plus the block hashing workers do ahead (the drop in
+the main process's `dedupe` phase between the two runs). The key checks,
+canonical filter and index writes stay serial, so the speedup cannot exceed
+that bound however many workers there are.
+
+Usage:
+  python3 memory-architecture/scripts/bench_pipeline.py --scale small
+  python3 memory-architecture/scripts/bench_pipeline.py --scale medium --out bench-0.5.0.json
+  python3 memory-architecture/scripts/bench_pipeline.py --scale small --compare bench-0.4.0.json --fail-on-regression
+  python3 memory-architecture/scripts/bench_pipeline.py --logs 90 --sessions-mb 5 --staging-blocks 2000
+  python3 memory-architecture/scripts/bench_pipeline.py --scale medium --dedupe-jobs 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from md_blocks import parse_blocks
+
+HERE = Path(__file__).resolve().parent
+SKILL_DIR = HERE.parents[1]
+
+SCALES: Dict[str, Dict[str, float]] = {
+    "small": {"logs": 30, "sessions_mb": 10, "staging_blocks": 10_000},
+    "medium": {"logs": 365, "sessions_mb": 100, "staging_blocks": 100_000},
+    "large": {"logs": 3650, "sessions_mb": 1024, "staging_blocks": 1_000_000},
+}
+
+# dedupe_staging phases that run in its --jobs pool (prepare_file); with --jobs the workers also
+# hash each block ahead, which a serial run does in its "dedupe" phase.
+PARALLEL_DEDUPE_PHASES = ("parse", "keys", "near")
+
+FIRST_DAY = dt.date(2090, 1, 1)
+SESSION_DAYS = 7
+SESSION_FILE_MB = 32
+TOPICS = ["openclaw", "messaging", "memory-architecture", "automation", "security", "lucidity"]
+WORDS = (
+    "gateway telegram discord memory lancedb cron heartbeat security lucidity backup restart config "
+    "index search recall session transcript staging receipt manifest topic policy deploy rollback"
+).split()
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+
+
+def words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def gen_daily_logs(ws: Path, rng: random.Random, n: int) -> Dict[str, int]:
+    sections = 0
+    total = 0
+    for i in range(n):
+        day = FIRST_DAY + dt.timedelta(days=i)
+        parts = [f"# {day.isoformat()}\n"]
+        for j in range(rng.randint(4, 8)):
+            kind = rng.randrange(4)
+            if kind == 0:
+                # Recurring decisions: near-identical semantic candidates across days.
+                parts.append(f"## Decision log\n- Decision: keep {rng.randint(5, 9)} daily backups\n- Policy: {words(rng, 6)}\n")
+            elif kind == 1:
+                parts.append(
+                    f"## How to {words(rng, 2)} {i}-{j}\nSteps:\n1) {words(rng, 5)}\n2) {words(rng, 5)}\n"
+                    f"3) {words(rng, 4)}\nVerify:\n- {words(rng, 4)}\n"
+                )
+            else:
+                parts.append(f"## {words(rng, 3).title()} {i}-{j}\n- {words(rng, 12)}\n- {words(rng, 9)}\n")
+            sections += 1
+        text = "\n".join(parts)
+        (ws / "memory" / f"{day.isoformat()}.md").write_text(text, encoding="utf-8")
+        total += len(text.encode("utf-8"))
+    return {"logs": n, "sections": sections, "bytes": total}
+
+
+def gen_sessions(ws: Path, rng: random.Random, size_mb: float, last_day: dt.date) -> Dict[str, object]:
+    """Write session JSONL spread over the last SESSION_DAYS days; count the target day's events."""
+    sessions = ws / "sessions"
+    sessions.mkdir(parents=True, exist_ok=True)
+    target = last_day
+    start = dt.datetime.combine(last_day - dt.timedelta(days=SESSION_DAYS - 1), dt.time(), tzinfo=dt.UTC)
+    span_s = SESSION_DAYS * 86400
+    pool = [words(rng, rng.randint(8, 60)) for _ in range(512)]
+
+    budget = int(size_mb * 1024 * 1024)
+    file_budget = SESSION_FILE_MB * 1024 * 1024
+    written = 0
+    events = 0
+    expected = 0
+    idx = 0
+    while written < budget:
+        fp = sessions / f"bench-{idx:04d}.jsonl"
+        idx += 1
+        lines: List[str] = []
+        size = 0
+        t = rng.randrange(span_s)
+        with fp.open("w", encoding="utf-8") as f:
+            while size < file_budget and written + size < budget:
+                t = (t + rng.randint(1, 90)) % span_s
+                ts = start + dt.timedelta(seconds=t)
+                role = rng.choice(("user", "assistant", "assistant", "toolResult"))
+                text = rng.choice(pool)
+                if role == "assistant" and rng.random() < 0.3:
+                    content = f'[{{"type":"thinking","thinking":"{rng.choice(pool)}"}},{{"type":"text","text":"{text}"}}]'
+                else:
+                    content = f'[{{"type":"text","text":"{text}"}}]'
+                line = (
+                    f'{{"type":"message","timestamp":"{ts.strftime("%Y-%m-%dT%H:%M:%S")}.000Z",'
+                    f'"message":{{"role":"{role}","content":{content}}}}}\n'
+                )
+                lines.append(line)
+                size += len(line)
+                events += 1
+                if ts.date() == target and role != "toolResult":
+                    expected += 1
+                if len(lines) >= 4096:
+                    f.write("".join(lines))
+                    lines.clear()
+            f.write("".join(lines))
+        written += size
+    return {"dir": str(sessions), "files": idx, "bytes": written, "events": events, "date": target.isoformat(), "expected_selected": expected}
+
+
+def staging_block(rng: random.Random, i: int) -> Tuple[str, str]:
+    """Return (target, block); ~10% exact duplicates and ~10% same-heading variants."""
+    r = rng.random()
+    n = i
+    if r < 0.1 and i:
+        n = rng.randrange(i)  # exact duplicate of an earlier block
+    elif r < 0.2 and i:
+        n = -rng.randrange(i) - 1  # same heading, different body
+    k = abs(n)
+    b = random.Random(n)
+    if k % 10 == 0:
+        block = (
+            f"## Semantic candidate: bench fact {k}\n\n- type: semantic\n- confidence: medium\n- scope: project\n"
+            f"- statement: {words(b, 10)}\n- evidence:\n  - memory/bench.md#fact-{k}\n"
+            f"- generated_at: 2090-01-01T00:00:00Z\n\n"
+        )
+        return "memory", block
+    block = (
+        f"## Procedure (candidate): bench procedure {k}\n\n- type: procedural\n- source: memory/bench.md#proc-{k}\n"
+        f"- trigger: When you need: bench procedure {k}\n- guardrails:\n  - (what not to do)\n"
+        f"- verification: verification steps listed below\n- generated_at: 2090-01-01T00:00:00Z\n\n"
+        f"1) {words(b, 6)}\n2) {words(b, 6)}\n\n"
+    )
+    return TOPICS[k % len(TOPICS)], block
+
+
+def gen_staging(ws: Path, rng: random.Random, n: int) -> Dict[str, int]:
+    staging = ws / "memory" / "staging"
+    (staging / "topics").mkdir(parents=True, exist_ok=True)
+    handles = {}
+    try:
+        for i in range(n):
+            target, block = staging_block(rng, i)
+            if target not in handles:
+                p = staging / ("MEMORY.candidates.md" if target == "memory" else f"topics/{target}.md")
+                handles[target] = p.open("w", encoding="utf-8")
+                handles[target].write(f"# Staged: {target}\n\n")
+            handles[target].write("\n" + block)
+    finally:
+        for f in handles.values():
+            f.close()
+    return {"blocks": n, "bytes": sum(p.stat().st_size for p in staging.rglob("*.md"))}
+
+
+def build_workspace(root: Path, params: Dict[str, float], seed: int) -> Dict[str, object]:
+    ws = root / "workspace"
+    scripts = ws / "skills" / "lucidity" / "memory-architecture"
+    shutil.copytree(HERE, scripts / "scripts", ignore=shutil.ignore_patterns("__pycache__", "test_*", "bench_*"))
+    shutil.copytree(SKILL_DIR / "memory-architecture" / "config", scripts / "config")
+    (ws / "memory").mkdir(parents=True, exist_ok=True)
+    (ws / "state").mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    corpus: Dict[str, object] = {}
+    corpus["staging"] = gen_staging(ws, rng, int(params["staging_blocks"]))
+    corpus["daily"] = gen_daily_logs(ws, rng, int(params["logs"]))
+    last_day = FIRST_DAY + dt.timedelta(days=int(params["logs"]) - 1)
+    corpus["sessions"] = gen_sessions(ws, rng, params["sessions_mb"], last_day)
+    return {"workspace": ws, "corpus": corpus}
+
+
+# ---------------------------------------------------------------------------
+# Stage runner + checks
+
+
+def cpu_children() -> float:
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+def last_metrics(ws: Path, event_type: str) -> Optional[Dict]:
+    p = ws / "state" / "memory-recall-events.jsonl"
+    if not p.exists():
+        return None
+    found = None
+    for line in p.read_text(encoding="utf-8").splitlines():
+        if f'"{event_type}"' in line:
+            found = line
+    return json.loads(found).get("metrics") if found else None
+
+
+def run_stage(ws: Path, name: str, script: str, args: List[str], event: Optional[str] = None) -> Tuple[Dict, str]:
+    cmd = [sys.executable, str(ws / "skills" / "lucidity" / "memory-architecture" / "scripts" / script), *args]
+    c0 = cpu_children()
+    t0 = time.perf_counter()
+    p = subprocess.run(cmd, cwd=str(ws), capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if p.returncode != 0:
+        raise SystemExit(f"FAIL: {name} exited {p.returncode}\n{p.stderr[-2000:]}")
+    result = {"wall_s": round(wall, 4), "cpu_s": round(cpu_children() - c0, 4)}
+    if event:
+        result["metrics"] = last_metrics(ws, event)
+    return result, p.stdout
+
+
+def check(ok: bool, msg: str) -> None:
+    if not ok:
+        raise SystemExit(f"FAIL: {msg}")
+
+
+def sha256_file(p: Path) -> str:
+    h = hashlib.sha256()
+    with p.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def check_dedupe(ws: Path) -> Dict[str, int]:
+    staging = ws / "memory" / "staging"
+    pairs = [(p, staging / "deduped" / "topics" / p.name) for p in sorted((staging / "topics").glob("*.md"))]
+    pairs.append((staging / "MEMORY.candidates.md", staging / "deduped" / "MEMORY.candidates.md"))
+    before: List = []
+    after: List = []
+    blocks_out = 0
+    for src, out in pairs:
+        if not src.exists():
+            continue
+        src_blocks = parse_blocks(src.read_text(encoding="utf-8"))
+        out_blocks = parse_blocks(out.read_text(encoding="utf-8"))
+        check({b.normalized for b in out_blocks} <= {b.normalized for b in src_blocks}, f"dedupe invented blocks in {out.name}")
+        before += [b for b in src_blocks if b.is_candidate]
+        after += [b for b in out_blocks if b.is_candidate]
+        blocks_out += len(out_blocks)
+    # Duplicates are dropped across files too.
+    exact = [b.normalized for b in after]
+    keys = [b.key for b in after if b.key[1]]
+    check(len(exact) == len(set(exact)), "dedupe left exact duplicates")
+    check(len(keys) == len(set(keys)), "dedupe left (type, heading) duplicates")
+    check({b.key for b in before} == {b.key for b in after}, "dedupe dropped every copy of a key")
+    return {"blocks_out": blocks_out}
+
+
+def canonical_hashes(ws: Path) -> Dict[str, str]:
+    files = sorted((ws / "memory" / "topics").glob("*.md")) + [ws / "MEMORY.md"]
+    return {str(p.relative_to(ws)): sha256_file(p) for p in files if p.exists()}
+
+
+def deduped_hashes(ws: Path) -> Dict[str, str]:
+    deduped = ws / "memory" / "staging" / "deduped"
+    return {str(p.relative_to(deduped)): sha256_file(p) for p in sorted(deduped.rglob("*.md"))}
+
+
+def run_pipeline(ws: Path, corpus: Dict[str, object], dedupe_jobs: int = 2) -> Dict[str, Dict]:
+    stages: Dict[str, Dict] = {}
+    sessions = corpus["sessions"]
+    daily = corpus["daily"]
+
+    res, _ = run_stage(
+        ws,
+        "distill_sessions",
+        "distill_sessions.py",
+        ["--sessions-dir", sessions["dir"], "--date", sessions["date"], "--max-events", str(10**9)],
+    )
+    meta = json.loads((ws / "memory" / "staging" / "reports" / f"sessions-{sessions['date']}.meta.json").read_text(encoding="utf-8"))
+    check(meta["selected_events"] == sessions["expected_selected"], f"distill_sessions selected {meta['selected_events']}, expected {sessions['expected_selected']}")
+    check(meta["stats"]["events_seen"] == sessions["events"], "distill_sessions did not see every event")
+    res["checks"] = {"selected_events": meta["selected_events"]}
+    stages["distill_sessions"] = res
+
+    first = FIRST_DAY.isoformat()
+    last = (FIRST_DAY + dt.timedelta(days=daily["logs"] - 1)).isoformat()
+    distill_args = ["--workspace", str(ws), "--since", first, "--until", last]
+    res, _ = run_stage(ws, "distill_daily", "distill_daily.py", distill_args, "maintenance.distill_daily.complete")
+    receipts = ws / "memory" / "staging" / "receipts"
+    check(len(list(receipts.glob("2*.json"))) == daily["logs"], "distill_daily did not write one receipt per log")
+    index = json.loads((ws / "memory" / "staging" / "index" / "sections.json").read_text(encoding="utf-8"))
+    indexed = sum(len(v) for v in index["files"].values())
+    res["checks"] = {"receipts": daily["logs"], "sections_indexed": indexed}
+    stages["distill_daily"] = res
+
+    before = {p.name: p.stat().st_size for p in (ws / "memory" / "staging" / "topics").glob("*.md")}
+    res, _ = run_stage(ws, "distill_daily_rerun", "distill_daily.py", distill_args, "maintenance.distill_daily.complete")
+    after = {p.name: p.stat().st_size for p in (ws / "memory" / "staging" / "topics").glob("*.md")}
+    check(before == after, "distill_daily re-run staged new blocks on unchanged logs")
+    stages["distill_daily_rerun"] = res
+
+    res, _ = run_stage(ws, "dedupe_staging", "dedupe_staging.py", ["--workspace", str(ws), "--write"], "maintenance.dedupe_staging.complete")
+    res["checks"] = check_dedupe(ws)
+    stages["dedupe_staging"] = res
+
+    full_args = ["--workspace", str(ws), "--write", "--full"]
+    res, _ = run_stage(ws, "dedupe_staging_full", "dedupe_staging.py", full_args, "maintenance.dedupe_staging.complete")
+    serial = deduped_hashes(ws)
+    stages["dedupe_staging_full"] = res
+    jobs_args = full_args + ["--jobs", str(dedupe_jobs)]
+    res, _ = run_stage(ws, "dedupe_staging_jobs", "dedupe_staging.py", jobs_args, "maintenance.dedupe_staging.complete")
+    check(deduped_hashes(ws) == serial, f"dedupe_staging --jobs {dedupe_jobs} output differs from a serial run")
+    serial_s = stages["dedupe_staging_full"]["wall_s"]
+    phases = (stages["dedupe_staging_full"].get("metrics") or {}).get("phases_s") or {}
+    pooled = (res.get("metrics") or {}).get("phases_s") or {}
+    moved = max(phases.get("dedupe", 0.0) - pooled.get("dedupe", 0.0), 0.0)
+    parallel_s = min(sum(phases.get(k, 0.0) for k in PARALLEL_DEDUPE_PHASES) + moved, serial_s)
+    res["checks"] = {
+        "jobs": dedupe_jobs,
+        "speedup": round(serial_s / res["wall_s"], 3) if res["wall_s"] else 0.0,
+        "parallel_share": round(parallel_s / serial_s, 3) if serial_s else 0.0,
+        "max_speedup": round(serial_s / (serial_s - parallel_s), 3) if serial_s > parallel_s else None,
+    }
+    stages["dedupe_staging_jobs"] = res
+
+    apply_args = ["--workspace", str(ws), "--write"]
+    res, _ = run_stage(ws, "apply_staging", "apply_staging.py", apply_args, "maintenance.apply_staging.complete")
+    h1 = canonical_hashes(ws)
+    check(bool(h1), "apply_staging wrote no canonical files")
+    res["checks"] = {"canonical_files": len(h1)}
+    stages["apply_staging"] = res
+
+    res, _ = run_stage(ws, "apply_staging_rerun", "apply_staging.py", apply_args, "maintenance.apply_staging.complete")
+    check(canonical_hashes(ws) == h1, "apply_staging re-run changed canonical files")
+    stages["apply_staging_rerun"] = res
+
+    res, out = run_stage(ws, "backup_memory", "backup_memory.py", ["--workspace", str(ws), "--write"])
+    report = json.loads(out)
+    manifest = json.loads((ws / report["manifest"]).read_text(encoding="utf-8"))
+    with tarfile.open(ws / report["backup"], "r:gz") as tf:
+        members = sorted(m.name for m in tf.getmembers() if m.isfile())
+    check(members == sorted(e["path"] for e in manifest["files"]), "backup tarball does not match its manifest")
+    res["checks"] = {"files": len(members)}
+    stages["backup_memory"] = res
+
+    # Age half of the per-day receipts so prune has real work.
+    old = time.time() - 60 * 86400
+    aged = sorted(receipts.glob("2*.json"))[: daily["logs"] // 2]
+    for p in aged:
+        os.utime(p, (old, old))
+    aged_sha = {str(p.relative_to(ws)): sha256_file(p) for p in aged}
+    res, _ = run_stage(ws, "prune_staging", "prune_staging.py", ["--workspace", str(ws), "--days", "14", "--write"])
+    manifests = sorted((ws / "memory" / "archive" / "staging").rglob("prune-*.json"))
+    moved = json.loads(manifests[-1].read_text(encoding="utf-8"))["moved"]
+    check({m["source"]: m["sha256"] for m in moved} == aged_sha, "prune did not archive exactly the aged receipts")
+    check(all(sha256_file(ws / m["dest"]) == m["sha256"] for m in moved), "archived file does not match its sha256")
+    res["checks"] = {"moved": len(moved)}
+    stages["prune_staging"] = res
+    return stages
+
+
+# ---------------------------------------------------------------------------
+# Results
+
+
+def skill_version() -> Optional[str]:
+    m = re.search(r"(?m)^version:\s*(\S+)", (SKILL_DIR / "SKILL.md").read_text(encoding="utf-8"))
+    return m.group(1) if m else None
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float, floor_s: float) -> List[str]:
+    """Print a per-stage comparison; return the stages that regressed."""
+    regressions: List[str] = []
+    if baseline.get("params") != result.get("params"):
+        print(f"warning: baseline params {baseline.get('params')} differ from {result.get('params')}")
+    print(f"{'stage':<22} {'base s':>9} {'now s':>9} {'ratio':>7}")
+    for name, cur in result["stages"].items():
+        base = (baseline.get("stages") or {}).get(name)
+        if not base:
+            print(f"{name:<22} {'-':>9} {cur['wall_s']:>9.3f} {'new':>7}")
+            continue
+        ratio = cur["wall_s"] / base["wall_s"] if base["wall_s"] else float("inf")
+        flag = ""
+        if ratio > tolerance and cur["wall_s"] - base["wall_s"] > floor_s:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<22} {base['wall_s']:>9.3f} {cur['wall_s']:>9.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small")
+    ap.add_argument("--logs", type=int, help="Override the number of daily logs")
+    ap.add_argument("--sessions-mb", type=float, help="Override the session JSONL volume (MB)")
+    ap.add_argument("--staging-blocks", type=int, help="Override the number of pre-staged blocks")
+    ap.add_argument(
+        "--dedupe-jobs",
+        type=int,
+        default=0,
+        help="Workers for the dedupe_staging --jobs stage (default: CPU count, at least 2)",
+    )
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--root", help="Directory for the synthetic workspace (default: a temp dir)")
+    ap.add_argument("--keep", action="store_true", help="Keep the synthetic workspace")
+    ap.add_argument("--out", help="Write the result JSON here")
+    ap.add_argument("--compare", help="Earlier result JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=1.25, help="Wall-time ratio that counts as a regression")
+    ap.add_argument("--noise-floor", type=float, default=0.05, help="Ignore slowdowns smaller than this many seconds")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    args = ap.parse_args()
+
+    params = dict(SCALES[args.scale])
+    for key in ("logs", "sessions_mb", "staging_blocks"):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    root = Path(args.root).expanduser().resolve() if args.root else Path(tempfile.mkdtemp(prefix="lucidity-bench-"))
+    root.mkdir(parents=True, exist_ok=True)
+    try:
+        t0 = time.perf_counter()
+        built = build_workspace(root, params, args.seed)
+        gen_s = time.perf_counter() - t0
+        dedupe_jobs = args.dedupe_jobs if args.dedupe_jobs > 0 else max(2, os.cpu_count() or 1)
+        stages = run_pipeline(built["workspace"], built["corpus"], dedupe_jobs)
+    finally:
+        if not args.keep and not args.root:
+            shutil.rmtree(root, ignore_errors=True)
+
+    corpus = built["corpus"]
+    corpus["sessions"] = {k: v for k, v in corpus["sessions"].items() if k != "dir"}
+    result = {
+        "version": skill_version(),
+        "ts": dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": args.scale,
+        "params": params,
+        "seed": args.seed,
+        "corpus": corpus,
+        "generate_s": round(gen_s, 3),
+        "stages": stages,
+    }
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.tolerance, args.noise_floor)
+        if regressions and args.fail_on_regression:
+            raise SystemExit(f"FAIL: regressions in {', '.join(regressions)}")
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark: per-block staging write cost as staging files grow.
+
+Compares the legacy read-modify-write append (read the whole target, rewrite
+it with one more block) against `StagingWriter` (buffer the run's blocks, one
+append per target) on staging files pre-filled to increasing sizes.
+
+The legacy per-block cost grows with file size; the writer's stays flat.
+
+Usage:
+  python3 memory-architecture/scripts/bench_staging_writer.py
+  python3 memory-architecture/scripts/bench_staging_writer.py --sizes-mb 1 10 40 --blocks 50 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from staging_writer import StagingWriter, topic_header
+
+BLOCK = (
+    "\n## Episodic note (candidate): Benchmark section\n\n"
+    "- type: episodic\n"
+    "- source: memory/2099-01-01.md#Benchmark section\n"
+    "- generated_at: 2099-01-01T00:00:00Z\n\n"
+    "- summary: synthetic block used to measure staging append cost\n\n"
+)
+
+
+def prefill(path: Path, size_bytes: int) -> None:
+    reps = max(1, size_bytes // len(BLOCK.encode("utf-8")))
+    path.write_text(topic_header("bench") + BLOCK * reps, encoding="utf-8")
+
+
+def legacy_append(path: Path, content: str) -> None:
+    prev = path.read_text(encoding="utf-8")
+    path.write_text(prev + content, encoding="utf-8")
+
+
+def bench_size(root: Path, size_mb: float, blocks: int) -> Dict:
+    size_bytes = int(size_mb * 1024 * 1024)
+
+    legacy = root / "legacy" / "topics" / "bench.md"
+    legacy.parent.mkdir(parents=True, exist_ok=True)
+    prefill(legacy, size_bytes)
+    t0 = time.perf_counter()
+    for _ in range(blocks):
+        legacy_append(legacy, BLOCK)
+    legacy_s = time.perf_counter() - t0
+
+    staging = root / "buffered"
+    target = staging / "topics" / "bench.md"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    prefill(target, size_bytes)
+    t0 = time.perf_counter()
+    writer = StagingWriter(staging)
+    for _ in range(blocks):
+        writer.add_topic("bench", BLOCK)
+    writer.flush()
+    buffered_s = time.perf_counter() - t0
+
+    if legacy.read_bytes() != target.read_bytes():
+        raise SystemExit(f"FAIL: legacy and buffered outputs differ at {size_mb} MB")
+
+    return {
+        "size_mb": size_mb,
+        "blocks": blocks,
+        "legacy_us_per_block": round(legacy_s / blocks * 1e6, 1),
+        "buffered_us_per_block": round(buffered_s / blocks * 1e6, 1),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes-mb", type=float, nargs="+", default=[0.1, 1, 10, 40])
+    ap.add_argument("--blocks", type=int, default=50, help="Blocks appended per run")
+    ap.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = ap.parse_args()
+
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory() as td:
+        for size_mb in args.sizes_mb:
+            results.append(bench_size(Path(td) / f"{size_mb}", size_mb, args.blocks))
+
+    if args.json:
+        print(json.dumps({"benchmark": "staging_writer", "results": results}, indent=2))
+        return
+
+    print(f"{'size_mb':>8} {'legacy us/block':>16} {'buffered us/block':>18}")
+    for r in results:
+        print(f"{r['size_mb']:>8} {r['legacy_us_per_block']:>16} {r['buffered_us_per_block']:>18}")
+
+
+if __name__ == "__main__":
+    main()
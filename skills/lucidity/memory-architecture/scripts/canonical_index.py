@@ -0,0 +1,136 @@
+"""Persistent index of the canonical keys of canonical memory.
+
+Stored at `memory/staging/index/canonical.sqlite`:
+- `files`: each canonical file indexed (topic briefs under memory/topics/ and
+  MEMORY.md, or the targets apply_staging is configured with), with the inode,
+  size and mtime it had when its keys were last recorded
+- `keys`: 16-byte digests of the `canonical_key` of every candidate block in
+  those files, each with the sequence number of the change that added it
+- `meta`: the last sequence number, and an epoch that is bumped whenever a key
+  disappears from canonical memory (a file edited by hand, rolled back or
+  deleted)
+
+apply_staging records the blocks it appends as it writes each file, so the
+index follows apply without re-reading canonical memory. `refresh` re-reads
+only the files whose inode, size or mtime no longer match what was recorded,
+i.e. files something other than apply changed (and, on first use, all of them).
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+from md_blocks import BlockRecord, read_blocks
+
+DIGEST_BYTES = 16
+
+
+def key_digest(block: BlockRecord) -> bytes:
+    """Digest of a block's canonical_key, as stored in the index."""
+    return bytes.fromhex(block.canonical_key)[:DIGEST_BYTES]
+
+
+def file_id(p: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class CanonicalIndex:
+    def __init__(self, path: Path, workspace: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.workspace = workspace
+        self.con = sqlite3.connect(str(path))
+        self.con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS keys (
+                path TEXT NOT NULL, hash BLOB NOT NULL, seq INTEGER NOT NULL, PRIMARY KEY (path, hash)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS keys_hash ON keys (hash);
+            CREATE INDEX IF NOT EXISTS keys_seq ON keys (seq);
+            """
+        )
+        meta = dict(self.con.execute("SELECT key, value FROM meta").fetchall())
+        self.seq = int(meta.get("seq", 0))
+        self.epoch = int(meta.get("epoch", 0))
+
+    def _rel(self, p: Path) -> str:
+        return str(p.relative_to(self.workspace))
+
+    def _next_seq(self) -> int:
+        self.seq += 1
+        self.con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seq', ?)", (self.seq,))
+        return self.seq
+
+    def _remove(self, rel: str, keys: Set[bytes]) -> None:
+        if not keys:
+            return
+        self.con.executemany("DELETE FROM keys WHERE path = ? AND hash = ?", ((rel, d) for d in keys))
+        q = "SELECT 1 FROM keys WHERE hash = ? LIMIT 1"
+        if any(self.con.execute(q, (d,)).fetchone() is None for d in keys):
+            self.epoch += 1
+            self.con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('epoch', ?)", (self.epoch,))
+
+    def _add(self, rel: str, keys: Iterable[bytes]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        seq = self._next_seq()
+        self.con.executemany(
+            "INSERT OR IGNORE INTO keys (path, hash, seq) VALUES (?, ?, ?)", ((rel, d, seq) for d in keys)
+        )
+
+    def _save_id(self, rel: str, fid: Tuple[int, int, int]) -> None:
+        self.con.execute("INSERT OR REPLACE INTO files (path, inode, size, mtime_ns) VALUES (?, ?, ?, ?)", (rel, *fid))
+
+    def refresh_file(self, p: Path) -> bool:
+        """Re-read `p` if it changed since its keys were recorded; True if it was re-read."""
+        rel = self._rel(p)
+        fid = file_id(p)
+        row = self.con.execute("SELECT inode, size, mtime_ns FROM files WHERE path = ?", (rel,)).fetchone()
+        if row is not None and tuple(row) == fid:
+            return False
+        old = {d for (d,) in self.con.execute("SELECT hash FROM keys WHERE path = ?", (rel,))}
+        if fid is None:
+            self._remove(rel, old)
+            self.con.execute("DELETE FROM files WHERE path = ?", (rel,))
+            return row is not None
+        new = {key_digest(b) for b in read_blocks(p) if b.is_candidate}
+        self._remove(rel, old - new)
+        self._add(rel, new - old)
+        self._save_id(rel, fid)
+        return True
+
+    def refresh(self, files: Iterable[Path]) -> int:
+        """Bring the index up to date with `files` and every file indexed before; returns the files re-read."""
+        paths = {self._rel(p): p for p in files}
+        for (rel,) in self.con.execute("SELECT path FROM files").fetchall():
+            paths.setdefault(rel, self.workspace / rel)
+        return sum(self.refresh_file(p) for _, p in sorted(paths.items()))
+
+    def record(self, p: Path, added: List[BlockRecord]) -> None:
+        """Record blocks apply just appended to `p` (which was up to date before the write)."""
+        rel = self._rel(p)
+        self._add(rel, (key_digest(b) for b in added))
+        self._save_id(rel, file_id(p))
+
+    def keys(self) -> Set[bytes]:
+        return {d for (d,) in self.con.execute("SELECT DISTINCT hash FROM keys")}
+
+    def keys_since(self, seq: int) -> Set[bytes]:
+        """Keys added by changes after sequence number `seq`."""
+        return {d for (d,) in self.con.execute("SELECT hash FROM keys WHERE seq > ?", (seq,))}
+
+    def commit(self) -> None:
+        self.con.commit()
+
+    def close(self) -> None:
+        self.con.close()
@@ -0,0 +1,282 @@
+"""Persistent block keys and per-file watermarks for incremental dedupe.
+
+Stored at `memory/staging/index/dedupe.sqlite`:
+- `files`: for each staging file, the byte watermark it has been deduped up
+  to, identity checks for that prefix (inode and digests of its first and last
+  bytes), the size of the deduped output written for it, and its running
+  DedupeStats
+- `keys`: 16-byte digests of every candidate block kept so far, each with the
+  one staging file that keeps it: the normalized text of each block (kind
+  "x"), and for blocks with a heading also the (type, heading) key (kind "k").
+  A later block with either key stored is dropped: an "x" match as an exact
+  copy, a "k" match as a heuristic duplicate (or, across files, a cross-file
+  copy)
+- `drops`: the keys whose blocks each file dropped as copies of a block kept
+  in another file
+- `emitted`: canonical-key digests (see canonical_index.py) of the blocks
+  each file's deduped output holds, so blocks promoted to canonical memory
+  after they were deduped can be removed from the output
+- `near` / `near_buckets`: with `--near-dupes`, the MinHash signature and LSH
+  buckets of every block kept so far, across all staging files (see
+  near_dupes.py)
+- `near_links`: the pairs of blocks found similar so far (an earlier kept
+  block and the block compared with it, whether that one was dropped, and
+  their similarity), so the report lists every cluster, not only those found
+  by the comparisons of the current run
+
+Staging files only grow by appending whole blocks, so a run dedupes just the
+bytes past the watermark against the stored keys and appends the survivors to
+the deduped output, producing the same file a from-scratch run would. A file
+whose prefix changed (rewritten, truncated or replaced), whose deduped output
+is missing or has another size, or whose new bytes do not start a new H2
+block is deduped from scratch instead.
+
+Keys are shared by all staging files: a block is kept in the first file (in
+dedupe order) that has it. A new block whose key is kept by a later file is
+kept where it is and the later file is deduped from scratch; a file that is
+deduped from scratch or removed also rebuilds the files that dropped copies
+of keys it no longer keeps.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+SCHEMA_VERSION = 4
+DIGEST_BYTES = 16
+EDGE_BYTES = 4096
+
+
+def digest(item: Union[str, Tuple[str, ...]]) -> bytes:
+    """Digest of a normalized block text or a (type, heading) key."""
+    text = item if isinstance(item, str) else "\0".join(item)
+    return hashlib.sha256(text.encode("utf-8")).digest()[:DIGEST_BYTES]
+
+
+def edge_digests(f, offset: int) -> Tuple[str, str]:
+    """Digests of the first and last EDGE_BYTES of `f[:offset]`."""
+    f.seek(0)
+    head = hashlib.sha256(f.read(min(offset, EDGE_BYTES))).hexdigest()
+    tail_start = max(0, offset - EDGE_BYTES)
+    f.seek(tail_start)
+    tail = hashlib.sha256(f.read(offset - tail_start)).hexdigest()
+    return head, tail
+
+
+@dataclass
+class FileState:
+    inode: int
+    offset: int
+    head: str
+    tail: str
+    out_size: int
+    stats: Dict[str, int] = field(default_factory=dict)
+    near: str = ""  # near-duplicate setting the file was deduped with ("" when off)
+    canonical_epoch: int = -1  # canonical index epoch and sequence number the output was filtered with
+    canonical_seq: int = 0
+
+
+class BlockKeys:
+    """Keys of the blocks kept across all staging files, as seen while deduping file `rel`.
+
+    Keys kept or dropped in `rel` during the run are buffered until `flush`, so the stored
+    owners of a file's keys can be looked up in one query first (`prefetch`).
+    """
+
+    def __init__(self, index: "DedupeIndex", rel: str) -> None:
+        self.index = index
+        self.rel = rel
+        self.known: Optional[Dict[Tuple[str, bytes], str]] = None
+        self.added: Set[Tuple[str, bytes]] = set()
+        self.dropped: Set[Tuple[str, bytes]] = set()
+        self.emitted: Set[bytes] = set()
+
+    def owner(self, kind: str, d: bytes) -> Optional[str]:
+        """The staging file that keeps a block with this key, if any."""
+        if (kind, d) in self.added:
+            return self.rel
+        if self.known is not None:
+            return self.known.get((kind, d))
+        return self.index.owner(kind, d)
+
+    def prefetch(self, keys: Iterable[Tuple[str, bytes]]) -> None:
+        """Look up the stored owners of the keys the file's blocks will ask about."""
+        self.known = self.index.owners(keys)
+
+    def add(self, kind: str, d: bytes) -> None:
+        self.added.add((kind, d))
+
+    def drop(self, kind: str, d: bytes) -> None:
+        """Record that `rel` dropped a copy of a block another file keeps."""
+        self.dropped.add((kind, d))
+
+    def emit(self, canonical: bytes) -> None:
+        """Record the canonical-key digest of a block written to `rel`'s deduped output."""
+        self.emitted.add(canonical)
+
+    def flush(self) -> None:
+        self.index.add_keys(self.rel, self.added)
+        self.index.add_drops(self.rel, self.dropped)
+        self.index.add_emitted(self.rel, self.emitted)
+        self.added = set()
+        self.dropped = set()
+        self.emitted = set()
+
+
+class DedupeIndex:
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.con = sqlite3.connect(str(path))
+        if self.con.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Older layout (per-file keys): start over, every file is deduped from scratch.
+            for table in ("files", "keys", "drops", "emitted", "near", "near_buckets", "near_links"):
+                self.con.execute(f"DROP TABLE IF EXISTS {table}")
+            self.con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, state TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS keys (
+                kind TEXT NOT NULL, hash BLOB NOT NULL, path TEXT NOT NULL,
+                PRIMARY KEY (kind, hash)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS keys_path ON keys (path);
+            CREATE TABLE IF NOT EXISTS drops (
+                path TEXT NOT NULL, kind TEXT NOT NULL, hash BLOB NOT NULL,
+                PRIMARY KEY (path, kind, hash)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS drops_key ON drops (kind, hash);
+            CREATE TABLE IF NOT EXISTS emitted (
+                path TEXT NOT NULL, hash BLOB NOT NULL, PRIMARY KEY (path, hash)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS near (
+                id INTEGER PRIMARY KEY, path TEXT NOT NULL, sha256 TEXT NOT NULL, heading TEXT NOT NULL, sig BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS near_path ON near (path);
+            CREATE TABLE IF NOT EXISTS near_buckets (
+                bucket INTEGER NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (bucket, id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS near_links (
+                id INTEGER PRIMARY KEY, a_path TEXT NOT NULL, a_sha256 TEXT NOT NULL, a_heading TEXT NOT NULL,
+                b_path TEXT NOT NULL, b_sha256 TEXT NOT NULL, b_heading TEXT NOT NULL,
+                similarity REAL NOT NULL, dropped INTEGER NOT NULL,
+                UNIQUE (a_path, a_sha256, b_path, b_sha256)
+            );
+            CREATE INDEX IF NOT EXISTS near_links_a ON near_links (a_path);
+            CREATE INDEX IF NOT EXISTS near_links_b ON near_links (b_path);
+            CREATE TEMP TABLE lookup (kind TEXT NOT NULL, hash BLOB NOT NULL, PRIMARY KEY (kind, hash)) WITHOUT ROWID;
+            """
+        )
+
+    def state(self, rel: str) -> Optional[FileState]:
+        row = self.con.execute("SELECT state FROM files WHERE path = ?", (rel,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return FileState(**json.loads(row[0]))
+        except (TypeError, ValueError):
+            return None
+
+    def owner(self, kind: str, d: bytes) -> Optional[str]:
+        row = self.con.execute("SELECT path FROM keys WHERE kind = ? AND hash = ?", (kind, d)).fetchone()
+        return row[0] if row else None
+
+    def owners(self, keys: Iterable[Tuple[str, bytes]]) -> Dict[Tuple[str, bytes], str]:
+        """Stored owners of those of `keys` that have one."""
+        self.con.execute("DELETE FROM lookup")
+        self.con.executemany("INSERT OR IGNORE INTO lookup (kind, hash) VALUES (?, ?)", keys)
+        q = "SELECT keys.kind, keys.hash, keys.path FROM lookup JOIN keys USING (kind, hash)"
+        return {(kind, d): rel for kind, d, rel in self.con.execute(q)}
+
+    def keys_of(self, rel: str) -> Set[Tuple[str, bytes]]:
+        return set(self.con.execute("SELECT kind, hash FROM keys WHERE path = ?", (rel,)))
+
+    def droppers(self, keys: Iterable[Tuple[str, bytes]]) -> Set[str]:
+        """Files that dropped a copy of a block with one of these keys."""
+        q = "SELECT path FROM drops WHERE kind = ? AND hash = ?"
+        return {rel for key in keys for (rel,) in self.con.execute(q, key)}
+
+    def reset(self, rel: str) -> None:
+        self.con.execute("DELETE FROM keys WHERE path = ?", (rel,))
+        self.con.execute("DELETE FROM drops WHERE path = ?", (rel,))
+        self.con.execute("DELETE FROM emitted WHERE path = ?", (rel,))
+        self.con.execute("DELETE FROM near_buckets WHERE id IN (SELECT id FROM near WHERE path = ?)", (rel,))
+        self.con.execute("DELETE FROM near WHERE path = ?", (rel,))
+        self.con.execute("DELETE FROM near_links WHERE a_path = ? OR b_path = ?", (rel, rel))
+        self.con.execute("DELETE FROM files WHERE path = ?", (rel,))
+
+    def forget(self, rel: str) -> Set[str]:
+        """Remove a file that is no longer staged; returns the files that dropped copies of its blocks."""
+        droppers = self.droppers(self.keys_of(rel))
+        self.reset(rel)
+        return droppers - {rel}
+
+    def add_keys(self, rel: str, keys: Iterable[Tuple[str, bytes]]) -> None:
+        # A key kept by a later file moves here; that file is rebuilt in the same run.
+        self.con.executemany(
+            "INSERT OR REPLACE INTO keys (kind, hash, path) VALUES (?, ?, ?)", ((kind, d, rel) for kind, d in keys)
+        )
+
+    def add_drops(self, rel: str, keys: Iterable[Tuple[str, bytes]]) -> None:
+        self.con.executemany(
+            "INSERT OR IGNORE INTO drops (path, kind, hash) VALUES (?, ?, ?)", ((rel, kind, d) for kind, d in keys)
+        )
+
+    def add_emitted(self, rel: str, canonical: Iterable[bytes]) -> None:
+        self.con.executemany("INSERT OR IGNORE INTO emitted (path, hash) VALUES (?, ?)", ((rel, d) for d in canonical))
+
+    def emitted_of(self, rel: str, canonical: Iterable[bytes]) -> Set[bytes]:
+        """The given canonical-key digests that `rel`'s deduped output holds."""
+        q = "SELECT 1 FROM emitted WHERE path = ? AND hash = ?"
+        return {d for d in canonical if self.con.execute(q, (rel, d)).fetchone() is not None}
+
+    def remove_emitted(self, rel: str, canonical: Iterable[bytes]) -> None:
+        self.con.executemany("DELETE FROM emitted WHERE path = ? AND hash = ?", ((rel, d) for d in canonical))
+
+    def near_candidates(self, buckets: List[int]) -> List[Tuple[str, str, str, bytes]]:
+        """(path, sha256, heading, signature) of the stored blocks sharing a bucket, oldest first."""
+        q = (
+            "SELECT path, sha256, heading, sig FROM near WHERE id IN "
+            f"(SELECT id FROM near_buckets WHERE bucket IN ({','.join('?' * len(buckets))})) ORDER BY id"
+        )
+        return self.con.execute(q, buckets).fetchall()
+
+    def add_near(self, entries: Iterable[Tuple[str, str, str, bytes, List[int]]]) -> None:
+        """Store (path, sha256, heading, signature, buckets) of kept blocks."""
+        rows = []
+        for rel, sha256, heading, sig, buckets in entries:
+            q = "INSERT INTO near (path, sha256, heading, sig) VALUES (?, ?, ?, ?)"
+            rowid = self.con.execute(q, (rel, sha256, heading, sig)).lastrowid
+            rows.extend((b, rowid) for b in buckets)
+        self.con.executemany("INSERT OR IGNORE INTO near_buckets (bucket, id) VALUES (?, ?)", rows)
+
+    def add_near_links(self, links: Iterable[Tuple[str, str, str, str, str, str, float, bool]]) -> None:
+        """Store (a_path, a_sha256, a_heading, b_path, b_sha256, b_heading, similarity, b dropped) pairs."""
+        self.con.executemany(
+            "INSERT OR REPLACE INTO near_links (a_path, a_sha256, a_heading, b_path, b_sha256, b_heading, similarity, dropped) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((*link[:7], int(link[7])) for link in links),
+        )
+
+    def near_links(self) -> List[Tuple[str, str, str, str, str, str, float, int]]:
+        """Every stored pair of similar blocks, oldest first."""
+        q = "SELECT a_path, a_sha256, a_heading, b_path, b_sha256, b_heading, similarity, dropped FROM near_links ORDER BY id"
+        return self.con.execute(q).fetchall()
+
+    def paths(self) -> Set[str]:
+        """Staging files with a saved state."""
+        return {rel for (rel,) in self.con.execute("SELECT path FROM files")}
+
+    def save_state(self, rel: str, state: FileState) -> None:
+        self.con.execute("INSERT OR REPLACE INTO files (path, state) VALUES (?, ?)", (rel, json.dumps(asdict(state))))
+
+    def commit(self) -> None:
+        self.con.commit()
+
+    def close(self) -> None:
+        # Uncommitted changes (dry runs) are discarded.
+        self.con.close()
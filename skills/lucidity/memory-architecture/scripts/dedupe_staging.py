@@ -2,14 +2,54 @@
 """Deduplicate and canonicalize staged memory outputs.
 
 Reads:
-- memory/staging/receipts/*.json
+- memory/staging/receipts/ledger.jsonl (new entries only; see receipt_ledger.py)
 - memory/staging/topics/*.md
 - memory/staging/MEMORY.candidates.md
 
 Writes:
 - memory/staging/deduped/topics/*.md
 - memory/staging/deduped/MEMORY.candidates.md
-- memory/staging/reports/dedupe-report.json
+- memory/staging/reports/dedupe-report.json (including stage metrics)
+- memory/staging/index/dedupe.sqlite (block keys and per-file watermarks)
+- memory/staging/index/canonical.sqlite (canonical keys of memory/topics/*.md and
+  MEMORY.md; refreshed for files changed since apply_staging recorded them)
+- state/memory-recall-events.jsonl (maintenance.dedupe_staging.complete)
+
+One workspace-wide index: exact and (type, heading) duplicates are dropped
+across all staging files, not just within one. Files are deduped in a fixed
+order (topics by name, then MEMORY.candidates) and each block is kept in the
+first file that has it; copies in later files are reported as cross-file
+drops.
+
+Incremental: staging files grow by appended blocks, so each run only reads
+and dedupes the bytes past a file's watermark against the stored keys of the
+blocks kept so far, and appends the survivors to the deduped output (see
+dedupe_index.py). Files that were rewritten are deduped from scratch; --full
+rebuilds every output.
+
+With `--jobs N`, worker processes read, parse and key the staging files (and
+sign them for --near-dupes) ahead of the main process, which still checks and
+records keys one file after another in dedupe order, so outputs and stats are
+the same as a serial run. Only that preparation runs in parallel; the key
+checks, canonical filter and index writes stay serial and bound the speedup
+(bench_pipeline.py measures it in its `dedupe_staging_jobs` stage). Because an
+incremental run prepares only appended blocks, --jobs defaults to 1 here,
+unlike distill's CPU-count default.
+
+Near-duplicates: with `--near-dupes report`, blocks that survive exact and
+(type, heading) dedupe are compared (MinHash over word shingles, LSH buckets)
+with the blocks kept in every staging file, and groups of blocks whose
+estimated similarity reaches --near-threshold are reported as clusters;
+`--near-dupes drop` also drops each block similar to one kept before it (see
+near_dupes.py). Similar pairs are stored in the index, so a cluster stays in
+the report on later runs until one of its files is rebuilt without it.
+
+Already promoted: a block whose canonical_key is already in canonical memory
+(as recorded by apply_staging in the canonical index; see canonical_index.py)
+is left out of the deduped output, after it has taken part in the checks
+above, so apply only sees genuinely new candidates. Blocks promoted after
+they were deduped are removed from the outputs on the next run; when a key
+disappears from canonical memory, every output is rebuilt.
 
 This is conservative: it never edits canonical memory files.
 """
@@ -17,112 +57,347 @@ This is conservative: it never edits canonical memory files.
 from __future__ import annotations
 
 import argparse
+import datetime as dt
 import json
+import os
 import re
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+import near_dupes
+from canonical_index import CanonicalIndex, key_digest
+from dedupe_index import BlockKeys, DedupeIndex, FileState, digest, edge_digests
+from md_blocks import BlockRecord, parse_blocks
+from near_dupes import NearDupes
+from receipt_ledger import ReceiptLedger
+from telemetry import StageMetrics, append_jsonl, env_session_key
 
 WORKSPACE = Path(__file__).resolve().parents[2]
 MEMORY_DIR = WORKSPACE / "memory"
 STAGING = MEMORY_DIR / "staging"
 
 
-def norm_ws(s: str) -> str:
-    s = re.sub(r"[ \t]+$", "", s, flags=re.M)
-    s = re.sub(r"\n{3,}", "\n\n", s)
-    return s.strip() + "\n"
+@dataclass
+class DedupeStats:
+    blocks_in: int = 0
+    blocks_out: int = 0
+    dropped_hard: int = 0
+    dropped_soft: int = 0
+    dropped_heur: int = 0
+    dropped_cross: int = 0
+    dropped_near: int = 0
+    dropped_promoted: int = 0
 
 
-def split_blocks(md: str) -> List[str]:
-    """Split by H2 headings into blocks including heading line."""
-    md = md.strip()
-    if not md:
-        return []
+@dataclass
+class DedupeRun:
+    """Cross-file state of one run."""
 
-    # Keep the file header (H1 etc.) as a prefix block.
-    m = re.search(r"^##\s+", md, flags=re.M)
-    if not m:
-        return [md + "\n"]
+    order: Dict[str, int]  # staging file -> position in dedupe order
+    canonical: CanonicalIndex
+    promoted: Set[bytes]  # canonical-key digests of the blocks in canonical memory
+    rebuild: Set[str] = field(default_factory=set)  # files to dedupe from scratch when reached
+    cross_file: List[Dict] = field(default_factory=list)  # blocks dropped as copies of another file's
 
-    prefix = md[: m.start()].strip()
-    rest = md[m.start() :]
 
-    blocks: List[str] = []
-    if prefix:
-        blocks.append(prefix + "\n\n")
+# Appended text that starts a new H2 block: blank lines, then "##" at the start of a line.
+NEW_BLOCK_RE = re.compile(r"(?:[^\S\n]*\n)*##\s")
 
-    parts = re.split(r"(?m)^(?=##\s+)", rest)
-    for p in parts:
-        p = p.strip()
-        if p:
-            blocks.append(p + "\n\n")
-    return blocks
 
+def decode_text(data: bytes) -> str:
+    """Decode like `Path.read_text(encoding="utf-8")` (universal newlines)."""
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
 
-def block_key(block: str) -> Tuple[str, str]:
-    """Return (type, normalized heading)"""
-    heading = ""
-    typ = ""
-    lines = [ln.rstrip() for ln in block.splitlines() if ln.strip()]
-    if lines and lines[0].startswith("##"):
-        heading = re.sub(r"\s+", " ", lines[0][2:].strip()).lower()
-    for ln in lines[:20]:
-        m = re.match(r"-\s*type:\s*(\w+)", ln, flags=re.I)
-        if m:
-            typ = m.group(1).lower()
-            break
-    return (typ or "unknown", heading)
-
-
-def load_receipts() -> List[Dict]:
-    receipts: List[Dict] = []
-    for p in sorted((STAGING / "receipts").glob("*.json")):
-        try:
-            receipts.extend(json.loads(p.read_text(encoding="utf-8")))
-        except Exception:
-            continue
-    return receipts
 
+def read_staged(p: Path, metrics: StageMetrics, start: int = 0) -> Tuple[str, int]:
+    """Text of `p` from byte offset `start`, and the end offset."""
+    with metrics.phase("io"):
+        with p.open("rb") as f:
+            f.seek(start)
+            data = f.read()
+    metrics.bytes_read += len(data)
+    return decode_text(data), start + len(data)
 
-@dataclass
-class DedupeStats:
-    blocks_in: int = 0
-    blocks_out: int = 0
-    dropped_hard: int = 0
-    dropped_soft: int = 0
-    dropped_heur: int = 0
+
+def parse_staged(text: str, metrics: StageMetrics) -> List[BlockRecord]:
+    with metrics.phase("parse"):
+        blocks = parse_blocks(text)
+    metrics.blocks += len(blocks)
+    return blocks
 
 
-def dedupe_blocks(blocks: List[str]) -> Tuple[List[str], DedupeStats]:
-    stats = DedupeStats(blocks_in=len(blocks))
+def write_deduped(p: Path, blocks: List[str], metrics: StageMetrics, append: bool = False) -> None:
+    data = "".join(blocks).encode("utf-8")
+    with metrics.phase("io"):
+        with p.open("ab" if append else "wb") as f:
+            f.write(data)
+    metrics.bytes_written += len(data)
+
 
+def block_keys(b: BlockRecord) -> List[Tuple[str, bytes]]:
+    """Index keys of a block: its normalized text ("x") and, if it has a heading, its (type, heading) key ("k")."""
+    if not b.is_candidate:
+        return []
+    if not b.key[1]:
+        return [("x", digest(b.normalized))]
+    return [("x", digest(b.normalized)), ("k", digest(b.key))]
+
+
+def dedupe_blocks(
+    blocks: List[BlockRecord],
+    keyed: List[List[Tuple[str, bytes]]],
+    keys: BlockKeys,
+    run: DedupeRun,
+    near: Optional[Callable[[BlockRecord], bool]] = None,
+) -> Tuple[List[str], DedupeStats]:
+    """Drop exact and (type, heading) duplicates of blocks kept in this file or an earlier one.
+
+    `keyed` holds the keys of each block (see block_keys). `near`, if given, is asked about
+    every remaining block and returns True for near-duplicates to drop. Blocks already in
+    canonical memory keep their keys but are left out of the output.
+    """
+    stats = DedupeStats(blocks_in=len(blocks))
     out: List[str] = []
-    seen_exact = set()
-    seen_key = set()
+    pos = run.order[keys.rel]
 
-    for b in blocks:
-        b2 = norm_ws(b)
-        if b2 in seen_exact:
-            stats.dropped_soft += 1
+    for b, candidates in zip(blocks, keyed):
+        b2 = b.normalized
+        if not b.is_candidate:
+            out.append(b2 + "\n")  # the file header
             continue
-        k = block_key(b2)
-        if k in seen_key and k[1]:
-            # heuristic duplicate inside a topic file
-            stats.dropped_heur += 1
+        dup = None
+        later = []
+        for kind, d in candidates:
+            owner = keys.owner(kind, d)
+            if owner is None:
+                continue
+            if owner == keys.rel or run.order[owner] < pos:
+                dup = (kind, d, owner)
+                break
+            later.append(owner)
+        if dup is not None:
+            kind, d, owner = dup
+            if owner != keys.rel:
+                stats.dropped_cross += 1
+                keys.drop(kind, d)
+                run.cross_file.append(
+                    {"path": keys.rel, "heading": b.heading, "sha256": b.sha256, "kept_in": owner, "key": kind}
+                )
+            elif kind == "x":
+                stats.dropped_soft += 1
+            else:
+                # heuristic duplicate inside a topic file
+                stats.dropped_heur += 1
             continue
-        out.append(b2)
-        seen_exact.add(b2)
-        seen_key.add(k)
+        if near is not None and near(b):
+            stats.dropped_near += 1
+            continue
+        for kind, d in candidates:
+            keys.add(kind, d)
+        run.rebuild.update(later)  # a later file keeps a copy of this block: it loses it
+        c = key_digest(b)
+        if c in run.promoted:
+            stats.dropped_promoted += 1
+            continue
+        keys.emit(c)
+        out.append(b2 + "\n")
 
     stats.blocks_out = len(out)
     return out, stats
 
 
+def filter_promoted(out: Path, stale: Set[bytes], metrics: StageMetrics, write: bool) -> int:
+    """Remove the blocks with these canonical-key digests from a deduped output; returns how many."""
+    with metrics.phase("io"):
+        data = out.read_bytes()
+    metrics.bytes_read += len(data)
+    with metrics.phase("parse"):
+        blocks = parse_blocks(decode_text(data))
+    kept = [b.normalized + "\n" for b in blocks if not (b.is_candidate and key_digest(b) in stale)]
+    if write and len(kept) < len(blocks):
+        write_deduped(out, kept, metrics)
+    return len(blocks) - len(kept)
+
+
+def resume_offset(src: Path, out: Path, prev: Optional[FileState]) -> Optional[int]:
+    """Watermark to continue deduping `src` from, or None if it must be deduped from scratch."""
+    if prev is None or not out.exists() or out.stat().st_size != prev.out_size:
+        return None
+    st = src.stat()
+    if st.st_ino != prev.inode or st.st_size < prev.offset:
+        return None  # replaced or truncated
+    with src.open("rb") as f:
+        if edge_digests(f, prev.offset) != (prev.head, prev.tail):
+            return None  # rewritten in place
+        if prev.offset:
+            f.seek(prev.offset - 1)
+            if f.read(1) != b"\n":
+                return None
+    return prev.offset
+
+
+@dataclass
+class PreparedFile:
+    """The part of a staging file to dedupe, read and parsed (see prepare_file)."""
+
+    start: Optional[int]  # byte offset the blocks start at (None: the whole file)
+    end: int
+    blocks: List[BlockRecord]
+    keys: List[List[Tuple[str, bytes]]]  # block_keys of each block
+    signatures: Dict[str, Optional[bytes]]  # near-duplicate signatures by block sha256, if signed ahead
+    bytes_read: int
+    phases: Dict[str, float]
+
+
+def prepare_file(src: Path, out: Path, prev: Optional[FileState], warm: bool = False, sign: bool = False) -> PreparedFile:
+    """Read and parse the bytes of `src` past its watermark, or all of it if the watermark is invalid.
+
+    This depends on nothing but the file, so with --jobs it runs in a worker process ahead of
+    the serial key checks; `warm` then also computes the block fields those checks use, and
+    `sign` the near-duplicate signatures.
+    """
+    metrics = StageMetrics("dedupe_staging")
+    start = resume_offset(src, out, prev)
+    if start is not None:
+        text, end = read_staged(src, metrics, start)
+        if text.strip() and not NEW_BLOCK_RE.match(text):
+            start = None  # the new bytes extend the last deduped block
+    if start is None:
+        text, end = read_staged(src, metrics)
+    blocks = parse_staged(text, metrics)
+    with metrics.phase("keys"):
+        keys = [block_keys(b) for b in blocks]
+        if warm:
+            for b in blocks:
+                if b.is_candidate:
+                    b.sha256, b.canonical_key
+    signatures: Dict[str, Optional[bytes]] = {}
+    if warm and sign:
+        with metrics.phase("near"):
+            signatures = {b.sha256: near_dupes.signature(b) for b in blocks if b.is_candidate}
+    return PreparedFile(start, end, blocks, keys, signatures, metrics.bytes_read, metrics.phases)
+
+
+def saved_state(index: DedupeIndex, rel: str, run: DedupeRun, setting: str) -> Optional[FileState]:
+    """The file's watermark state, if its output was deduped with the current settings."""
+    prev = index.state(rel)
+    if prev is not None and (prev.near != setting or prev.canonical_epoch != run.canonical.epoch):
+        return None
+    return prev
+
+
+def dedupe_file(
+    src: Path,
+    out: Path,
+    index: DedupeIndex,
+    run: DedupeRun,
+    metrics: StageMetrics,
+    write: bool,
+    full: bool,
+    near: Optional[NearDupes] = None,
+    prepared: Optional[PreparedFile] = None,
+) -> Tuple[DedupeStats, str]:
+    """Dedupe one staging file into `out`, incrementally when its watermark is still valid.
+
+    `prepared` is the file as a worker read it before the run reached it; it is read again
+    if the file has to be rebuilt since. Returns the file's cumulative stats and how it was
+    handled ("appended" or "rebuilt").
+    """
+    rel = str(src.relative_to(WORKSPACE))
+    setting = near.setting if near is not None else ""
+    check = (lambda b: near.check(rel, b)) if near is not None else None
+    canon = run.canonical
+    prev = None if full else saved_state(index, rel, run, setting)
+    pre = prepared
+    if pre is None or (prev is None and pre.start is not None):
+        # Serial run, or a file read from its watermark that an earlier file's blocks now rebuild.
+        if pre is not None:
+            metrics.merge(pre.phases)
+            metrics.bytes_read += pre.bytes_read
+        pre = prepare_file(src, out, prev)
+    metrics.merge(pre.phases)
+    metrics.bytes_read += pre.bytes_read
+    metrics.blocks += len(pre.blocks)
+    start, end = pre.start, pre.end
+    filtered = 0
+    if start is not None and prev.canonical_seq < canon.seq:
+        # Blocks promoted since this output was written leave it.
+        stale = index.emitted_of(rel, canon.keys_since(prev.canonical_seq))
+        if stale:
+            filtered = filter_promoted(out, stale, metrics, write)
+            index.remove_emitted(rel, stale)
+    keys = BlockKeys(index, rel)
+    if start is None:
+        kept_before = index.keys_of(rel)
+        index.reset(rel)
+    with metrics.phase("dedupe"):
+        if near is not None:
+            near.signed = pre.signatures
+        keys.prefetch(k for ks in pre.keys for k in ks)
+        deduped, stats = dedupe_blocks(pre.blocks, pre.keys, keys, run, check)
+        if near is not None:
+            near.flush()
+    if start is None:
+        # Files that dropped copies of blocks this file no longer keeps must keep them now.
+        run.rebuild |= index.droppers(kept_before - keys.added) - {rel}
+        mode = "rebuilt"
+    else:
+        stats = DedupeStats(**{k: prev.stats.get(k, 0) + v for k, v in stats.__dict__.items()})
+        stats.blocks_out -= filtered
+        stats.dropped_promoted += filtered
+        mode = "appended"
+    keys.flush()
+    if write:
+        write_deduped(out, deduped, metrics, append=start is not None)
+        with src.open("rb") as f:
+            head, tail = edge_digests(f, end)
+        state = FileState(src.stat().st_ino, end, head, tail, out.stat().st_size, stats.__dict__, setting, canon.epoch, canon.seq)
+        index.save_state(rel, state)
+    return stats, mode
+
+
+def prepare_ahead(work: List[Tuple[Path, Path, Optional[FileState]]], jobs: int, sign: bool) -> Iterator[PreparedFile]:
+    """prepare_file for each file in a process pool, yielded in order, at most 2 * jobs files ahead."""
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: Deque[Future] = deque()
+        for src, out, prev in work:
+            pending.append(pool.submit(prepare_file, src, out, prev, True, sign))
+            if len(pending) > 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--workspace", help="Workspace root (default: auto-detected)")
     ap.add_argument("--write", action="store_true", help="Write deduped outputs")
+    ap.add_argument("--full", action="store_true", help="Ignore watermarks and rebuild every deduped output")
+    ap.add_argument(
+        "--near-dupes",
+        choices=["off", "report", "drop"],
+        default="off",
+        help="Find near-duplicate blocks across staging files and report them, or also drop them (default: off)",
+    )
+    ap.add_argument(
+        "--near-threshold",
+        type=float,
+        default=near_dupes.DEFAULT_THRESHOLD,
+        help=f"Similarity (0-1) at which blocks count as near-duplicates (default: {near_dupes.DEFAULT_THRESHOLD})",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Worker processes that read and parse staging files ahead of the key checks (default: 1 = serial; "
+            "0 = CPU count). Unlike distill's --jobs this defaults to serial: an incremental run only prepares "
+            "the appended blocks, so a pool adds startup cost; use it for --full rebuilds"
+        ),
+    )
     args = ap.parse_args()
 
     global WORKSPACE, MEMORY_DIR, STAGING
@@ -134,52 +409,91 @@ def main() -> None:
     (STAGING / "deduped" / "topics").mkdir(parents=True, exist_ok=True)
     (STAGING / "reports").mkdir(parents=True, exist_ok=True)
 
-    receipts = load_receipts()
-    hard_seen_sources = set()
-    hard_seen_outputs = set()
-
-    hard_dupes = 0
-    for r in receipts:
-        sh = (r.get("source") or {}).get("sha256")
-        oh = (r.get("output") or {}).get("sha256")
-        if sh:
-            if sh in hard_seen_sources:
-                hard_dupes += 1
-            hard_seen_sources.add(sh)
-        if oh:
-            hard_seen_outputs.add(oh)
+    metrics = StageMetrics("dedupe_staging")
+
+    # Only receipts appended since the previous run are read.
+    with metrics.phase("receipts"):
+        ledger = ReceiptLedger(STAGING).sync()
 
     report: Dict = {
         "workspace": str(WORKSPACE),
         "receipts": {
-            "count": len(receipts),
-            "duplicate_sources": hard_dupes,
+            "count": ledger["count"],
+            "duplicate_sources": ledger["duplicate_sources"],
         },
         "files": {},
     }
 
-    # Dedup topics
-    for tp in sorted((STAGING / "topics").glob("*.md")):
-        blocks = split_blocks(tp.read_text(encoding="utf-8"))
-        deduped, stats = dedupe_blocks(blocks)
-        report["files"][str(tp.relative_to(WORKSPACE))] = stats.__dict__
-        if args.write:
-            outp = STAGING / "deduped" / "topics" / tp.name
-            outp.write_text("".join(deduped), encoding="utf-8")
-
-    # Dedup MEMORY candidates
+    pairs = [(tp, STAGING / "deduped" / "topics" / tp.name) for tp in sorted((STAGING / "topics").glob("*.md"))]
     memc = STAGING / "MEMORY.candidates.md"
     if memc.exists():
-        blocks = split_blocks(memc.read_text(encoding="utf-8"))
-        deduped, stats = dedupe_blocks(blocks)
-        report["files"][str(memc.relative_to(WORKSPACE))] = stats.__dict__
-        if args.write:
-            outp = STAGING / "deduped" / "MEMORY.candidates.md"
-            outp.write_text("".join(deduped), encoding="utf-8")
+        pairs.append((memc, STAGING / "deduped" / "MEMORY.candidates.md"))
+
+    # Canonical keys, re-read only for canonical files changed since apply_staging recorded them.
+    canon = CanonicalIndex(STAGING / "index" / "canonical.sqlite", WORKSPACE)
+    with metrics.phase("canonical"):
+        reindexed = canon.refresh(sorted((MEMORY_DIR / "topics").glob("*.md")) + [WORKSPACE / "MEMORY.md"])
+        promoted = canon.keys()
+
+    rels = [str(src.relative_to(WORKSPACE)) for src, _ in pairs]
+    index = DedupeIndex(STAGING / "index" / "dedupe.sqlite")
+    run = DedupeRun({rel: i for i, rel in enumerate(rels)}, canon, promoted)
+    near = None
+    if args.near_dupes != "off":
+        near = NearDupes(args.near_dupes, args.near_threshold, index, run.order, run.rebuild)
+    removed = sorted(index.paths() - set(rels))
+    for rel in removed:
+        run.rebuild |= index.forget(rel)
+    # Dropping near-duplicates makes a file's output depend on the files before it:
+    # once one of those is rebuilt or removed, every later file is rebuilt too.
+    rebuild_rest = near is not None and near.mode == "drop" and bool(removed)
+    modes = {"appended": 0, "rebuilt": 0}
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    prepared: Optional[Iterator[PreparedFile]] = None
+    if jobs > 1 and len(pairs) > 1:
+        # Workers read and parse every file from the watermark it has now; key checks stay serial.
+        setting = near.setting if near is not None else ""
+        work = [
+            (src, out, None if args.full or rebuild_rest or rel in run.rebuild else saved_state(index, rel, run, setting))
+            for (src, out), rel in zip(pairs, rels)
+        ]
+        prepared = prepare_ahead(work, min(jobs, len(work)), near is not None)
+    for (src, out), rel in zip(pairs, rels):
+        full = args.full or rebuild_rest or rel in run.rebuild
+        pre = next(prepared) if prepared is not None else None
+        stats, mode = dedupe_file(src, out, index, run, metrics, args.write, full, near, pre)
+        report["files"][rel] = stats.__dict__
+        modes[mode] += 1
+        rebuild_rest = rebuild_rest or (mode == "rebuilt" and near is not None and near.mode == "drop")
+    if near is not None:
+        report["near_duplicates"] = near.report()
+    if args.write:
+        index.commit()
+        canon.commit()
+    index.close()
+    canon.close()
+    report["incremental"] = {"files_appended": modes["appended"], "files_rebuilt": modes["rebuilt"]}
+    report["cross_file"] = {"dropped": len(run.cross_file), "blocks": run.cross_file}
+    report["canonical"] = {
+        "keys": len(promoted),
+        "files_reindexed": reindexed,
+        "blocks_dropped": sum(stats["dropped_promoted"] for stats in report["files"].values()),
+    }
 
+    report["metrics"] = metrics.summary()
     (STAGING / "reports" / "dedupe-report.json").write_text(
         json.dumps(report, indent=2) + "\n", encoding="utf-8"
     )
+    append_jsonl(
+        WORKSPACE / "state" / "memory-recall-events.jsonl",
+        {
+            "type": "maintenance.dedupe_staging.complete",
+            "ts": dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+            "session": env_session_key(),
+            "write": bool(args.write),
+            "metrics": report["metrics"],
+        },
+    )
 
     print(json.dumps(report, indent=2))
 
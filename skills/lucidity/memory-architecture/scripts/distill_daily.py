@@ -4,7 +4,11 @@
 Reads a T2 daily log (memory/YYYY-MM-DD.md) and writes staged candidates into:
 - memory/staging/topics/<topic>.md
 - memory/staging/MEMORY.candidates.md
-- memory/staging/receipts/<date>.json
+- memory/staging/receipts/<date>.json (each run's entries appended in place)
+- memory/staging/receipts/ledger.jsonl (append-only; new output receipts only)
+- memory/staging/index/sections.json (section-hash index and per-file watermarks for incremental runs)
+- memory/staging/index/distill.lock (held for a whole run, so concurrent runs queue)
+- state/memory-recall-events.jsonl (run timings/throughput; receipts keep a "run" entry per run over the source)
 
 Design goals:
 - Conservative, local-first (no LLM calls)
@@ -13,42 +17,63 @@ Design goals:
   - procedural candidates from Steps/How-to sections
   - semantic candidates from Decision/Policy/Preference/Fact statements
   - episodic notes remain retrievable but are not auto-promoted by default
+- Incremental: sections whose (path, heading, sha256) is already in the section
+  index are skipped, so re-running on a log that grows all day only distills
+  new or changed sections (use --full to re-distill everything); a re-run
+  resumes at the start of the last section it saw when the file only grew
+  since, so it reads and hashes just that section and what follows it
+
+- Batch: several days (--date D1 D2 ... or --since/--until) are distilled in one
+  process; parsing/extraction runs in a worker pool while staging writes stay
+  serialized, so output matches running the days one by one
+- Watch: --watch polls memory/YYYY-MM-DD.md with stat() and distills sections as
+  soon as the next H2 closes them, spreading work across the day; the nightly
+  run then only finalizes the last section of the day
+- Runs (watch cycles, nightly/batch runs, distill_sessions --distill) hold an
+  exclusive flock on memory/staging/index/distill.lock from loading the section
+  index to saving it, so overlapping runs take turns instead of racing
 
 Usage:
   python3 memory-architecture/scripts/distill_daily.py --workspace ~/.openclaw/workspace --date 2026-02-16
   python3 memory-architecture/scripts/distill_daily.py --workspace ~/.openclaw/workspace --path memory/2026-02-16.md
+  python3 memory-architecture/scripts/distill_daily.py --workspace ~/.openclaw/workspace --path memory/staging/sessions/2026-02-16.sessions.0*.md
+  python3 memory-architecture/scripts/distill_daily.py --workspace ~/.openclaw/workspace --since 2026-02-01 --until 2026-02-16 --jobs 4
+  python3 memory-architecture/scripts/distill_daily.py --workspace ~/.openclaw/workspace --watch --interval 60
 """
 
 from __future__ import annotations
 
 import argparse
+import contextlib
 import datetime as dt
 import hashlib
 import json
+import os
 import re
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Collection, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from dedupe_index import edge_digests
+from md_blocks import Section, is_h2_line, iter_sections
+from receipt_ledger import ReceiptLedger
+from staging_writer import StagingWriter
+from telemetry import StageMetrics, append_jsonl, env_session_key
+from topic_classifier import load_classifier
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not on POSIX
+    fcntl = None  # type: ignore
 
 WORKSPACE = Path(__file__).resolve().parents[2]
 MEMORY_DIR = WORKSPACE / "memory"
 STAGING_DIR = MEMORY_DIR / "staging"
 
-TOPIC_KEYWORDS = {
-    "openclaw": "openclaw",
-    "gateway": "openclaw",
-    "telegram": "messaging",
-    "whatsapp": "messaging",
-    "discord": "messaging",
-    "memory": "memory-architecture",
-    "lancedb": "memory-architecture",
-    "fts": "memory-architecture",
-    "bm25": "memory-architecture",
-    "cron": "automation",
-    "heartbeat": "automation",
-    "security": "security",
-    "gpl": "lucidity",
-    "lucidity": "lucidity",
-}
+DAILY_LOG_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.md$")
 
 SEMANTIC_PREFIXES = (
     "decision:",
@@ -72,58 +97,156 @@ def sha256_text(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
-def load_daily(path: Path) -> str:
-    return path.read_text(encoding="utf-8")
-
-
-def split_sections(md: str) -> List[Tuple[str, str]]:
-    """Return list of (heading, body) for H2 sections."""
-    parts = re.split(r"^##\s+", md, flags=re.M)
-    if len(parts) <= 1:
-        return [("(no heading)", md.strip())]
-    out: List[Tuple[str, str]] = []
-    pre = parts[0].strip()
-    if pre:
-        out.append(("(preamble)", pre))
-    for p in parts[1:]:
-        lines = p.splitlines()
-        heading = lines[0].strip() if lines else "(empty)"
-        body = "\n".join(lines[1:]).strip()
-        out.append((heading, body))
-    return out
-
-
-def infer_topic(text: str) -> str:
-    t = text.lower()
-    for k, topic in TOPIC_KEYWORDS.items():
-        if k in t:
-            return topic
-    return "general"
+def infer_topic(text: str, topics_config: Optional[str] = None) -> str:
+    return load_classifier(topics_config).classify(text)
 
 
 def ensure_dirs() -> None:
     (STAGING_DIR / "topics").mkdir(parents=True, exist_ok=True)
     (STAGING_DIR / "receipts").mkdir(parents=True, exist_ok=True)
-
-
-def append_topic_candidate(topic: str, content: str) -> Path:
-    out = STAGING_DIR / "topics" / f"{topic}.md"
-    if out.exists():
-        prev = out.read_text(encoding="utf-8")
-    else:
-        prev = f"# Topic Candidate: {topic}\n\n(Generated; review before promoting to memory/topics/)\n\n"
-    out.write_text(prev + content, encoding="utf-8")
+    (STAGING_DIR / "index").mkdir(parents=True, exist_ok=True)
+
+
+def section_index_path() -> Path:
+    return STAGING_DIR / "index" / "sections.json"
+
+
+def lock_path() -> Path:
+    return STAGING_DIR / "index" / "distill.lock"
+
+
+@contextlib.contextmanager
+def run_lock() -> Iterator[None]:
+    """Hold the exclusive distill lock; blocks while another run holds it."""
+    path = lock_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def load_section_index() -> Tuple[Dict[str, List[List[str]]], Dict[str, Dict]]:
+    """Return {source path: [[heading, sha256], ...]} for already-distilled sections, and the watermarks.
+
+    A watermark ({"offset", "inode", "head", "tail", "last"}) is the byte offset of the
+    last section the previous run saw, with identity checks for the bytes before it
+    (see dedupe_index.edge_digests) and the [heading, sha256] of that section.
+    """
+    p = section_index_path()
+    if not p.exists():
+        return {}, {}
+    try:
+        data = json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}, {}
+    if not isinstance(data, dict):
+        return {}, {}
+    files = data.get("files")
+    marks = data.get("marks")
+    return (files if isinstance(files, dict) else {}), (marks if isinstance(marks, dict) else {})
+
+
+def save_section_index(files: Dict[str, List[List[str]]], marks: Dict[str, Dict]) -> None:
+    p = section_index_path()
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps({"version": 1, "files": files, "marks": marks}, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(p)
+
+
+def source_mark(in_path: Path, offset: int, last: Optional[List[str]]) -> Optional[Dict]:
+    """Watermark for resuming `in_path` at `offset` on the next run, or None if it cannot be read."""
+    try:
+        with in_path.open("rb") as f:
+            head, tail = edge_digests(f, offset)
+            inode = os.fstat(f.fileno()).st_ino
+    except OSError:
+        return None
+    return {"offset": offset, "inode": inode, "head": head, "tail": tail, "last": last}
+
+
+def mark_start(in_path: Path, mark: Optional[Dict]) -> int:
+    """Offset to resume `in_path` at: the stored watermark if the file only grew since, else 0.
+
+    Like dedupe's watermarks this checks the inode and the first and last 4 KB
+    before the offset; an edit that keeps those bytes is only seen by --full.
+    """
+    if not isinstance(mark, dict) or not mark.get("offset"):
+        return 0
+    offset = mark["offset"]
+    try:
+        with in_path.open("rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != mark.get("inode") or st.st_size < offset:
+                return 0
+            if list(edge_digests(f, offset)) != [mark.get("head"), mark.get("tail")]:
+                return 0
+    except OSError:
+        return 0
+    return offset if resumable(in_path, offset) else 0
+
+
+def seed_from_receipts(receipts_path: Path) -> List[List[str]]:
+    """Recover known sections from an existing receipt (pre-index workspaces)."""
+    if not receipts_path.exists():
+        return []
+    try:
+        prev = json.loads(receipts_path.read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    out: List[List[str]] = []
+    for r in prev if isinstance(prev, list) else []:
+        src = r.get("source") or {}
+        if src.get("heading") is not None and src.get("sha256"):
+            out.append([src["heading"], src["sha256"]])
     return out
 
 
-def append_memory_candidates(content: str) -> Path:
-    out = STAGING_DIR / "MEMORY.candidates.md"
-    if out.exists():
-        prev = out.read_text(encoding="utf-8")
-    else:
-        prev = "# MEMORY.md Candidates\n\n(Generated; review before promoting to MEMORY.md)\n\n"
-    out.write_text(prev + content, encoding="utf-8")
-    return out
+def load_prior_receipts(receipts_path: Path, outputs: bool = True) -> List[Dict]:
+    """Output receipts (unless not `outputs`) and "run" entries from earlier runs over the same source.
+
+    Skip markers are dropped; the new run re-records the sections it skips.
+    Only used when the receipt is rewritten (--full, or a file append_receipts cannot extend).
+    """
+    if not receipts_path.exists():
+        return []
+    try:
+        prev = json.loads(receipts_path.read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    if not isinstance(prev, list):
+        return []
+    return [r for r in prev if isinstance(r, dict) and ((outputs and r.get("output")) or "run" in r)]
+
+
+def append_receipts(receipts_path: Path, entries: List[Dict]) -> Optional[int]:
+    """Append `entries` to a receipt list written with `json.dumps(..., indent=2)`; returns bytes written.
+
+    Only the closing bracket is rewritten, so the file is byte-identical to dumping the
+    whole list again. Returns None (nothing written) if the file is missing or not in
+    that layout.
+    """
+    items = ",\n".join(textwrap.indent(json.dumps(r, indent=2), "  ") for r in entries)
+    try:
+        with receipts_path.open("r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < 5:
+                return None
+            f.seek(0)
+            first = f.read(2)
+            f.seek(size - 3)
+            if first != b"[\n" or f.read(3) != b"\n]\n":
+                return None
+            data = (",\n" + items + "\n]\n").encode("utf-8")
+            f.seek(size - 3)
+            f.write(data)
+    except FileNotFoundError:
+        return None
+    return len(data)
 
 
 def summarize_episodic(body: str) -> str:
@@ -199,147 +322,530 @@ def now_ts() -> str:
     return dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
-def main() -> None:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--workspace", help="Workspace root (default: auto-detected)")
-    ap.add_argument(
-        "--staging-only",
-        action="store_true",
-        help="Accepted for compatibility; distill is always staging-first",
-    )
-    ap.add_argument("--date", help="YYYY-MM-DD")
-    ap.add_argument("--path", help="Path to daily md, relative to workspace")
-    args = ap.parse_args()
-
-    global WORKSPACE, MEMORY_DIR, STAGING_DIR
-    if args.workspace:
-        WORKSPACE = Path(args.workspace).expanduser().resolve()
-        MEMORY_DIR = WORKSPACE / "memory"
-        STAGING_DIR = MEMORY_DIR / "staging"
-
-    if args.path:
-        in_path = (WORKSPACE / args.path).resolve()
-    elif args.date:
-        in_path = MEMORY_DIR / f"{args.date}.md"
-    else:
-        ap.error("Provide --date or --path")
-
-    if not in_path.exists():
-        raise SystemExit(f"Input not found: {in_path}")
+@dataclass
+class Candidate:
+    """One staged block produced from a source section."""
+
+    target: str  # "memory" for MEMORY.candidates.md, else the topic name
+    block: str
+    kind: str
+    topic: str
+    source: Dict[str, str]
+
+
+@dataclass
+class SourceResult:
+    rel: str
+    candidates: List[Candidate] = field(default_factory=list)
+    skipped: List[Dict] = field(default_factory=list)
+    indexed: List[List[str]] = field(default_factory=list)
+    present: Set[Tuple[str, str]] = field(default_factory=set)  # every section scanned
+    distilled: int = 0
+    resume_at: int = 0  # byte offset a later scan can resume from
+    last_start: int = 0  # byte offset of the last section, where the next run resumes
+    last: Optional[List[str]] = None  # [heading, sha256] of the last section, if not empty
+    sections: int = 0
+    bytes_read: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)  # seconds per phase
+
+
+def distill_section(
+    rel: str, heading: str, body: str, source_hash: str, topics_config: Optional[str] = None
+) -> List[Candidate]:
+    """Run the semantic/procedural/episodic extractors over one H2 section."""
+    out: List[Candidate] = []
+    ts = now_ts()
+    topic = infer_topic(heading + "\n" + body, topics_config)
+    source = {"path": rel, "heading": heading, "sha256": source_hash}
+
+    # 1) Semantic candidates extracted from explicit lines (Decision/Policy/Preference/etc.)
+    semantic_lines = extract_semantic_lines(body)
+    for i, stmt in enumerate(semantic_lines):
+        title = heading if len(semantic_lines) == 1 else f"{heading} ({i+1})"
+        block = (
+            f"\n## Semantic candidate: {title}\n\n"
+            f"- type: semantic\n"
+            f"- confidence: medium\n"
+            f"- scope: project\n"
+            f"- statement: {stmt}\n"
+            f"- evidence:\n"
+            f"  - {rel}#{heading}\n"
+            f"- generated_at: {ts}\n\n"
+        )
+        out.append(Candidate("memory", block, "semantic", topic, source))
+
+    # 2) Procedural candidate from a steps block / numbered list
+    proc = extract_procedural_block(body)
+    if proc:
+        verify_txt = extract_verify_text(body)
+        trigger_txt = f"When you need: {heading}" if heading and heading != "(no heading)" else "When this procedure is needed"
+        if verify_txt:
+            # Keep the required field as a single non-placeholder line for apply scoring.
+            verification_line = "- verification: verification steps listed below\n"
+        else:
+            verification_line = "- verification: (how do we confirm it worked?)\n"
+
+        block = (
+            f"\n## Procedure (candidate): {heading}\n\n"
+            f"- type: procedural\n"
+            f"- source: {rel}#{heading}\n"
+            f"- trigger: {trigger_txt}\n"
+            f"- guardrails:\n  - (what not to do)\n"
+            f"{verification_line}"
+            f"- generated_at: {ts}\n\n"
+            f"{proc}\n\n"
+        )
+
+        # If we extracted Verify text, append it as a separate section (does not affect scoring).
+        if verify_txt:
+            block += f"\nVerification details (from daily log):\n{verify_txt}\n\n"
+        out.append(Candidate(topic, block, "procedural", topic, source))
+
+    # 3) Stage a minimal episodic note as retrievable context (not auto-promoted)
+    #
+    # IMPORTANT: we suppress low-signal placeholders to keep staging noise low.
+    # The full raw context remains in the source daily log / session snapshot.
+    summary = summarize_episodic(body)
+    if summary != "(fill in)":
+        ep_block = (
+            f"\n## Episodic note (candidate): {heading}\n\n"
+            f"- type: episodic\n"
+            f"- source: {rel}#{heading}\n"
+            f"- generated_at: {ts}\n\n"
+            f"- summary: {summary}\n\n"
+        )
+        out.append(Candidate(topic, ep_block, "episodic", topic, source))
 
-    ensure_dirs()
+    return out
 
-    md = load_daily(in_path)
-    sections = split_sections(md)
 
-    receipts: List[Dict] = []
-    for heading, body in sections:
+def extract_source(
+    in_path: Path,
+    rel: str,
+    known: Set[Tuple[str, str]],
+    topics_config: Optional[str] = None,
+    start: int = 0,
+    hold_last: bool = False,
+    sections: Optional[Iterable[Section]] = None,
+) -> SourceResult:
+    """Parse one source file and extract candidates for sections not in `known`.
+
+    Scanning begins at byte offset `start`, which must be 0 or the start of an
+    H2 line. With `hold_last`, the final section is left alone because the log
+    may still be growing; `resume_at` then points at it. `sections`, if given,
+    are the file's H2 sections (from offset 0) built in-process, e.g. by the
+    sessions extract writer, and are used instead of reading `in_path`.
+
+    `present` holds the (heading, sha256) of every non-empty section scanned
+    (the held-back one included), so index entries for sections that were
+    edited or removed can be dropped; `last_start` and `last` locate the final
+    section for the watermark the next run resumes at.
+
+    Pure with respect to the workspace (no writes), so it can run in a worker process.
+    """
+    res = SourceResult(rel=rel, resume_at=start, last_start=start)
+    known = set(known)
+    metrics = StageMetrics("distill.source")
+
+    def section_hash(heading: str, body: str) -> str:
+        with metrics.phase("hash"):
+            return sha256_text(("## " + heading + "\n" + body).strip())
+
+    def process(heading: str, body: str) -> Optional[str]:
+        res.sections += 1
         if not body.strip():
-            continue
-
-        ts = now_ts()
-        rel = in_path.relative_to(WORKSPACE)
-        topic = infer_topic(heading + "\n" + body)
-
-        source_excerpt = ("## " + heading + "\n" + body).strip()
-        source_hash = sha256_text(source_excerpt)
-
-        # 1) Semantic candidates extracted from explicit lines (Decision/Policy/Preference/etc.)
-        semantic_lines = extract_semantic_lines(body)
-        for i, stmt in enumerate(semantic_lines):
-            title = heading if len(semantic_lines) == 1 else f"{heading} ({i+1})"
-            block = (
-                f"\n## Semantic candidate: {title}\n\n"
-                f"- type: semantic\n"
-                f"- confidence: medium\n"
-                f"- scope: project\n"
-                f"- statement: {stmt}\n"
-                f"- evidence:\n"
-                f"  - {rel}#{heading}\n"
-                f"- generated_at: {ts}\n\n"
-            )
-            out_path = append_memory_candidates(block)
-            receipts.append(
+            return None
+        source_hash = section_hash(heading, body)
+        res.present.add((heading, source_hash))
+        if (heading, source_hash) in known:
+            res.skipped.append(
                 {
-                    "source": {"path": str(rel), "heading": heading, "sha256": source_hash},
-                    "output": {
-                        "path": str(out_path.relative_to(WORKSPACE)),
-                        "sha256": sha256_text(block),
-                        "kind": "semantic",
-                        "topic": topic,
-                    },
+                    "source": {"path": rel, "heading": heading, "sha256": source_hash},
+                    "skipped": "unchanged",
                 }
             )
-
-        # 2) Procedural candidate from a steps block / numbered list
-        proc = extract_procedural_block(body)
-        if proc:
-            verify_txt = extract_verify_text(body)
-            trigger_txt = f"When you need: {heading}" if heading and heading != "(no heading)" else "When this procedure is needed"
-            if verify_txt:
-                # Keep the required field as a single non-placeholder line for apply scoring.
-                verification_line = "- verification: verification steps listed below\n"
+            return source_hash
+        known.add((heading, source_hash))
+        res.indexed.append([heading, source_hash])
+        res.distilled += 1
+        with metrics.phase("extract"):
+            res.candidates.extend(distill_section(rel, heading, body, source_hash, topics_config))
+        return source_hash
+
+    # Sections are streamed one at a time so large session extracts never sit in memory whole.
+    last = None
+    if sections is None:
+        sections = iter_sections(in_path, start)
+    for sec in metrics.timed("parse", sections):
+        if last is not None:
+            process(last.heading, last.body)
+            res.resume_at = sec.start
+        last = sec
+    last_hash = None
+    if last is not None and not hold_last:
+        last_hash = process(last.heading, last.body)
+        res.resume_at = max(last.end, start)
+    elif last is not None and last.body.strip():
+        last_hash = section_hash(last.heading, last.body)
+        res.present.add((last.heading, last_hash))
+    if last is not None:
+        res.last_start = max(last.start, start)
+        res.last = [last.heading, last_hash] if last_hash else None
+    res.bytes_read = max(last.end - start, 0) if last is not None else 0
+    res.phases = metrics.phases
+    return res
+
+
+def topics_config_path() -> Optional[str]:
+    """Workspace topic config if present; otherwise the classifier uses the shipped one."""
+    p = WORKSPACE / "memory-architecture" / "config" / "topics.json"
+    return str(p) if p.exists() else None
+
+
+def distill_paths(
+    in_paths: List[Path],
+    full: bool = False,
+    jobs: int = 1,
+    topics_config: Optional[str] = None,
+    starts: Optional[Dict[Path, int]] = None,
+    hold_last: Collection[Path] = (),
+    documents: Optional[Dict[Path, Iterable[Section]]] = None,
+) -> List[Dict]:
+    """Distill one or more sources in-process.
+
+    Parsing and extraction run in a process pool when `jobs > 1`; staging writes,
+    receipts and the section index are applied serially in input order, so the
+    result matches distilling each source one after another.
+
+    Sources not in `starts` resume at their stored watermark (see mark_start);
+    `starts` and `hold_last` are used by watch mode to resume scanning at its
+    own byte watermark and to leave a still-growing final section for later.
+    Each run's receipts are appended to the source's receipt file.
+
+    `documents` maps sources that another stage just wrote (distill_sessions
+    --distill) to their H2 sections, built while writing, so they are distilled
+    without being read back; results, receipts and the section index are the
+    same as for the file.
+
+    The whole run, from loading the section index to saving it with the
+    receipts, holds `run_lock()`, so concurrent runs are serialized.
+    """
+    with run_lock():
+        starts = starts or {}
+        documents = documents or {}
+        metrics = StageMetrics("distill_daily")
+        ensure_dirs()
+        with metrics.phase("index"):
+            section_index, marks = load_section_index()
+
+        plans = []
+        for in_path in in_paths:
+            rel = str(in_path.relative_to(WORKSPACE))
+            out_receipts = STAGING_DIR / "receipts" / (in_path.stem + ".json")
+            indexed: List[List[str]] = [] if full else (section_index.get(rel) or seed_from_receipts(out_receipts))
+            if in_path in starts:
+                start = starts[in_path]
+            elif full or in_path in documents:
+                start = 0
             else:
-                verification_line = "- verification: (how do we confirm it worked?)\n"
-
-            block = (
-                f"\n## Procedure (candidate): {heading}\n\n"
-                f"- type: procedural\n"
-                f"- source: {rel}#{heading}\n"
-                f"- trigger: {trigger_txt}\n"
-                f"- guardrails:\n  - (what not to do)\n"
-                f"{verification_line}"
-                f"- generated_at: {ts}\n\n"
-                f"{proc}\n\n"
-            )
-
-            # If we extracted Verify text, append it as a separate section (does not affect scoring).
-            if verify_txt:
-                block += f"\nVerification details (from daily log):\n{verify_txt}\n\n"
-            out_path = append_topic_candidate(topic, block)
+                with metrics.phase("index"):
+                    start = mark_start(in_path, marks.get(rel))
+            plans.append((in_path, rel, out_receipts, indexed, start))
+
+        topics_config = topics_config or topics_config_path()
+        work = [
+            (in_path, rel, {(h, sh) for h, sh in indexed}, topics_config, start, in_path in hold_last)
+            for in_path, rel, _, indexed, start in plans
+        ]
+        if documents:
+            # In-process sections stay in this process.
+            results = [extract_source(*w, sections=documents.get(w[0])) for w in work]
+        elif jobs > 1 and len(work) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+                results = list(pool.map(extract_source, *zip(*work)))
+        else:
+            results = [extract_source(*w) for w in work]
+
+        writer = StagingWriter(STAGING_DIR)
+        summaries: List[Dict] = []
+        pending_receipts = []
+        new_receipts: List[Dict] = []
+        for (in_path, rel, out_receipts, indexed, start), res in zip(plans, results):
+            receipts: List[Dict] = []
+            for c in res.candidates:
+                out_path = writer.add_memory(c.block) if c.target == "memory" else writer.add_topic(c.target, c.block)
+                with metrics.phase("hash"):
+                    out_hash = sha256_text(c.block)
+                new_receipts.append(
+                    {
+                        "source": c.source,
+                        "output": {
+                            "path": str(out_path.relative_to(WORKSPACE)),
+                            "sha256": out_hash,
+                            "kind": c.kind,
+                            "topic": c.topic,
+                        },
+                    }
+                )
+            receipts.extend(new_receipts[len(new_receipts) - len(res.candidates) :])
+            receipts.extend(res.skipped)
             receipts.append(
                 {
-                    "source": {"path": str(rel), "heading": heading, "sha256": source_hash},
-                    "output": {
-                        "path": str(out_path.relative_to(WORKSPACE)),
-                        "sha256": sha256_text(block),
-                        "kind": "procedural",
-                        "topic": topic,
-                    },
+                    "run": {
+                        "ts": now_ts(),
+                        "bytes_read": res.bytes_read,
+                        "sections": res.sections,
+                        "distilled": res.distilled,
+                        "candidates": len(res.candidates),
+                        "phases_s": {k: round(v, 6) for k, v in sorted(res.phases.items())},
+                    }
                 }
             )
-
-        # 3) Stage a minimal episodic note as retrievable context (not auto-promoted)
-        #
-        # IMPORTANT: we suppress low-signal placeholders to keep staging noise low.
-        # The full raw context remains in the source daily log / session snapshot.
-        summary = summarize_episodic(body)
-        if summary != "(fill in)":
-            ep_block = (
-                f"\n## Episodic note (candidate): {heading}\n\n"
-                f"- type: episodic\n"
-                f"- source: {rel}#{heading}\n"
-                f"- generated_at: {ts}\n\n"
-                f"- summary: {summary}\n\n"
-            )
-            out_path = append_topic_candidate(topic, ep_block)
-            receipts.append(
+            pending_receipts.append((out_receipts, receipts))
+            metrics.merge(res.phases)
+            metrics.bytes_read += res.bytes_read
+            metrics.blocks += res.sections
+            mark = marks.get(rel) or {}
+            if start == 0:
+                # Scanned in full: forget hashes of sections no longer in the file.
+                indexed = [e for e in indexed if tuple(e) in res.present]
+            elif start == mark.get("offset") and mark.get("last") and tuple(mark["last"]) not in res.present:
+                # Resumed at the last section seen before: forget its old hash if it changed.
+                indexed = [e for e in indexed if e != mark["last"]]
+            section_index[rel] = indexed + res.indexed
+            with metrics.phase("index"):
+                marks[rel] = source_mark(in_path, res.last_start, res.last)
+            if marks[rel] is None:
+                del marks[rel]
+            summaries.append(
                 {
-                    "source": {"path": str(rel), "heading": heading, "sha256": source_hash},
-                    "output": {
-                        "path": str(out_path.relative_to(WORKSPACE)),
-                        "sha256": sha256_text(ep_block),
-                        "kind": "episodic",
-                        "topic": topic,
-                    },
+                    "path": rel,
+                    "receipts": str(out_receipts.relative_to(WORKSPACE)),
+                    "staged": len(res.candidates),
+                    "distilled": res.distilled,
+                    "skipped": len(res.skipped),
+                    "resume_at": res.resume_at,
                 }
             )
 
-    out_receipts = STAGING_DIR / "receipts" / (in_path.stem + ".json")
-    out_receipts.write_text(json.dumps(receipts, indent=2) + "\n", encoding="utf-8")
+        with metrics.phase("io"):
+            # Staging blocks land before the receipts/index that reference them.
+            metrics.bytes_written += sum(writer.flush().values())
+            # Ledger first: on first use it imports the per-day files as they were before this run.
+            ReceiptLedger(STAGING_DIR).append(new_receipts)
+            for out_receipts, receipts in pending_receipts:
+                written = None if full else append_receipts(out_receipts, receipts)
+                if written is None:
+                    receipts = load_prior_receipts(out_receipts, outputs=not full) + receipts
+                    data = (json.dumps(receipts, indent=2) + "\n").encode("utf-8")
+                    out_receipts.write_bytes(data)
+                    written = len(data)
+                metrics.bytes_written += written
+        with metrics.phase("index"):
+            save_section_index(section_index, marks)
+
+        append_jsonl(
+            WORKSPACE / "state" / "memory-recall-events.jsonl",
+            {
+                "type": "maintenance.distill_daily.complete",
+                "ts": now_ts(),
+                "session": env_session_key(),
+                "sources": len(in_paths),
+                "staged": sum(s["staged"] for s in summaries),
+                "metrics": metrics.summary(),
+            },
+        )
+        return summaries
+
+
+def resumable(path: Path, offset: int) -> bool:
+    """True if `offset` is still a safe place to resume scanning `path` (an H2 line start)."""
+    if offset == 0:
+        return True
+    try:
+        with path.open("rb") as f:
+            if offset > os.fstat(f.fileno()).st_size:
+                return False
+            f.seek(offset - 1)
+            prev = f.read(1)
+            line = f.readline()
+    except OSError:
+        return False
+    if prev not in (b"\n", b"\r"):
+        return False
+    text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+    return is_h2_line(text, line.endswith((b"\n", b"\r")))
+
+
+@dataclass
+class WatchState:
+    seen: Dict[Path, Tuple[int, int]] = field(default_factory=dict)  # (mtime_ns, size)
+    marks: Dict[Path, int] = field(default_factory=dict)  # byte watermark per log
+    held: Set[Path] = field(default_factory=set)  # logs with a held-back final section
+    primed: bool = False
+
+
+def watch_poll(state: WatchState, today: str, topics_config: Optional[str] = None) -> List[Dict]:
+    """One watch cycle: distill completed sections of daily logs that changed.
+
+    Change detection is a stat() per log. Today's (and future) logs keep their
+    last section back until another H2 follows it; once the day has passed the
+    log is finalized in full. Scans resume at the previous watermark when it
+    still lands on an H2 line, otherwise at the stored one (see mark_start) or
+    from the start (the section index keeps that idempotent). The first cycle
+    only looks at today's log.
+    """
+    changed: List[Path] = []
+    for p in sorted(MEMORY_DIR.glob("*.md")):
+        if not DAILY_LOG_RE.match(p.name):
+            continue
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        sig = (st.st_mtime_ns, st.st_size)
+        prev = state.seen.get(p)
+        state.seen[p] = sig
+        if prev == sig:
+            if p in state.held and p.stem < today:
+                changed.append(p)
+            continue
+        if prev is None and not state.primed and p.stem < today:
+            continue
+        changed.append(p)
+    state.primed = True
+    if not changed:
+        return []
+
+    starts: Dict[Path, int] = {}
+    for p in changed:
+        mark = state.marks.get(p, 0)
+        if mark and resumable(p, mark):
+            starts[p] = mark
+    hold = {p for p in changed if p.stem >= today}
+    try:
+        summaries = distill_paths(changed, topics_config=topics_config, starts=starts, hold_last=hold)
+    except UnicodeDecodeError:
+        # A writer is mid-way through a multi-byte character; retry next cycle.
+        for p in changed:
+            state.seen.pop(p, None)
+        return []
+
+    for p, s in zip(changed, summaries):
+        state.marks[p] = s["resume_at"]
+        if p in hold:
+            state.held.add(p)
+        else:
+            state.held.discard(p)
+    return summaries
+
+
+def watch(interval: float, topics_config: Optional[str] = None) -> None:
+    print(f"Watching {MEMORY_DIR.relative_to(WORKSPACE)}/*.md every {interval:g}s (Ctrl-C to stop)")
+    state = WatchState()
+    try:
+        while True:
+            for s in watch_poll(state, dt.date.today().isoformat(), topics_config):
+                if s["distilled"]:
+                    print(f"{now_ts()} {s['path']}: staged {s['staged']} candidates ({s['distilled']} sections)", flush=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def configure(workspace: Path) -> None:
+    global WORKSPACE, MEMORY_DIR, STAGING_DIR
+    WORKSPACE = workspace
+    MEMORY_DIR = WORKSPACE / "memory"
+    STAGING_DIR = MEMORY_DIR / "staging"
+
+
+def day_range(since: str, until: str) -> List[str]:
+    start = dt.date.fromisoformat(since)
+    end = dt.date.fromisoformat(until)
+    out: List[str] = []
+    while start <= end:
+        out.append(start.isoformat())
+        start += dt.timedelta(days=1)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workspace", help="Workspace root (default: auto-detected)")
+    ap.add_argument(
+        "--staging-only",
+        action="store_true",
+        help="Accepted for compatibility; distill is always staging-first",
+    )
+    ap.add_argument("--date", nargs="+", help="One or more days (YYYY-MM-DD)")
+    ap.add_argument("--since", help="First day of a range (YYYY-MM-DD, inclusive)")
+    ap.add_argument("--until", help="Last day of a range (YYYY-MM-DD, inclusive; default: --since)")
+    ap.add_argument(
+        "--path",
+        nargs="+",
+        help="One or more markdown sources relative to the workspace (e.g. session extract shards)",
+    )
+    ap.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the section index and re-distill every section",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Worker processes for multi-file runs (default: CPU count; 1 = serial)",
+    )
+    ap.add_argument(
+        "--topics-config",
+        help="Topic keyword config (default: memory-architecture/config/topics.json)",
+    )
+    ap.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and distill completed sections of daily logs as they are appended",
+    )
+    ap.add_argument("--interval", type=float, default=30.0, help="Watch poll interval in seconds (default: 30)")
+    args = ap.parse_args()
+
+    if args.workspace:
+        configure(Path(args.workspace).expanduser().resolve())
+
+    topics_config = str((WORKSPACE / args.topics_config).resolve()) if args.topics_config else None
+    if args.watch:
+        ensure_dirs()
+        watch(args.interval, topics_config)
+        return
+
+    missing: List[str] = []
+    if args.path:
+        in_paths = list(dict.fromkeys((WORKSPACE / p).resolve() for p in args.path))
+    elif args.date or args.since:
+        days = list(args.date or [])
+        if args.since:
+            days += day_range(args.since, args.until or args.since)
+        days = list(dict.fromkeys(days))
+        in_paths = [MEMORY_DIR / f"{d}.md" for d in days]
+        if args.since:
+            # Ranges may span days without a log; explicit --date values may not.
+            missing = [p.stem for p in in_paths if not p.exists()]
+            in_paths = [p for p in in_paths if p.exists()]
+    else:
+        ap.error("Provide --date, --since, --path or --watch")
+
+    for in_path in in_paths:
+        if not in_path.exists():
+            raise SystemExit(f"Input not found: {in_path}")
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    summaries = distill_paths(in_paths, full=args.full, jobs=jobs, topics_config=topics_config)
 
-    print(f"Staged {len(receipts)} candidates")
-    print(f"- receipts: {out_receipts.relative_to(WORKSPACE)}")
+    for s in summaries:
+        print(f"Staged {s['staged']} candidates ({s['distilled']} sections distilled, {s['skipped']} unchanged skipped)")
+        print(f"- receipts: {s['receipts']}")
+    if missing:
+        print(f"- no daily log: {', '.join(missing)}")
     print(f"- topics:   {(STAGING_DIR/'topics').relative_to(WORKSPACE)}/")
     print(f"- memory:   {(STAGING_DIR/'MEMORY.candidates.md').relative_to(WORKSPACE)}")
 
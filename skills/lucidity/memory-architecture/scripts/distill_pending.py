@@ -8,7 +8,8 @@ Problem this solves:
 This script:
 - Scans `memory/YYYY-MM-DD.md` files under a workspace root
 - Checks for corresponding receipts under `memory/staging/receipts/YYYY-MM-DD.json`
-- Runs distill for any missing receipts (oldest-first by default)
+- Runs distill for any missing receipts (oldest-first by default), in-process as
+  one batch rather than one interpreter per day
 
 It is local-first and idempotent at the day level (a day with receipts is
 considered processed).
@@ -26,12 +27,13 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
-import subprocess
-import sys
 from pathlib import Path
 from typing import List
 
+import distill_daily
+
 DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 
@@ -48,19 +50,11 @@ def has_receipt(staging_receipts: Path, day: str) -> bool:
     return (staging_receipts / f"{day}.json").exists()
 
 
-def run_distill(skill_dir: Path, workspace: Path, day: str) -> None:
-    cmd = [
-        sys.executable,
-        str(skill_dir / "memory-architecture" / "scripts" / "distill_daily.py"),
-        "--workspace",
-        str(workspace),
-        "--date",
-        day,
-    ]
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if p.returncode != 0:
-        sys.stderr.write(p.stderr)
-        raise SystemExit(p.returncode)
+def run_distill(workspace: Path, days: List[str], jobs: int) -> None:
+    """Distill all pending days in one process (extraction runs in a worker pool)."""
+    distill_daily.configure(workspace)
+    paths = [workspace / "memory" / f"{d}.md" for d in days]
+    distill_daily.distill_paths(paths, jobs=jobs)
 
 
 def main() -> None:
@@ -73,6 +67,12 @@ def main() -> None:
         default="oldest",
         help="Process order for pending days",
     )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Worker processes for parsing/extraction (default: CPU count; 1 = serial)",
+    )
     args = ap.parse_args()
 
     workspace = Path(args.workspace).expanduser().resolve()
@@ -82,9 +82,6 @@ def main() -> None:
     if not memory_dir.exists():
         raise SystemExit(f"memory dir not found: {memory_dir}")
 
-    # skill_dir is the directory that contains memory-architecture/
-    skill_dir = Path(__file__).resolve().parents[2]
-
     days = list_daily_logs(memory_dir)
     pending = [d for d in days if not has_receipt(staging_receipts, d)]
     if args.order == "newest":
@@ -104,9 +101,8 @@ def main() -> None:
         print(json.dumps({**report, "status": "no-pending"}, indent=2))
         raise SystemExit(2)
 
-    for d in pending:
-        run_distill(skill_dir, workspace, d)
-        report["processed"].append(d)
+    run_distill(workspace, pending, jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1))
+    report["processed"].extend(pending)
 
     report["status"] = "ok"
     print(json.dumps(report, indent=2))
@@ -2,6 +2,47 @@
 """Session transcript distiller (staging-first).
 
 This is the canonical Lucidity copy shipped with the skill bundle.
+
+Incremental: a per-file checkpoint (inode, size, byte offset, timestamp range;
+see session_index.py) lets a run skip the part of each transcript whose events
+all fall outside the window, so nightly runs read new data instead of the whole
+history, and unchanged files outside the window are skipped without being
+opened. Rotated, truncated or rewritten files are rescanned from the start;
+--full ignores the checkpoints.
+
+Compressed archives (`*.jsonl.gz`, and `*.jsonl.zst` when a zstd module is
+installed) are read as streams under the name of the transcript they replace;
+their checkpoints keep only the timestamp range, so an archive outside the
+window is never decompressed and any other run reads it whole.
+
+Each transcript is scanned independently (in a process pool with --jobs) and
+the per-file, timestamp-sorted events are merged, so output order and the
+--max-events cutoff (--keep earliest|latest) follow event time, not file order.
+
+Transcripts are streamed one line at a time (jsonl_reader.py, optionally over
+mmap with --mmap), so memory stays at one record regardless of file size. A
+raw-line prefilter skips JSON decoding for lines whose leading timestamp is
+outside the window or, with a plain --keyword-regex such as `deploy|rollback`,
+whose bytes lack every keyword; it never changes the selection.
+
+The merged, selected events stream straight into the extract writer
+(SessionsWriter), one local day after another with --bucket-by-day, so memory
+holds each transcript's capped matches and never the whole selection.
+--shard-bytes splits the extract into `<day>.sessions.NNN.md` parts listed in
+`<day>.sessions.index.json`, which distill_daily can take together via `--path`
+and distill in parallel.
+
+Events already written to another day's extract (overlapping --since-days
+windows) are suppressed via a persistent seen-event set (seen_events.py) and
+counted as `events_suppressed`; --include-seen bypasses it. Suppression happens
+while each file is scanned, before its --max-events cap, so the cap holds on
+every run.
+
+--distill stages candidates from the extract in-process: the writer also
+groups each event it renders into the extract's H2 sections in memory, and
+distill_daily's extractors run on those sections, without a second process or
+reading the extract back; receipts and the section index are the same as
+`distill_daily.py --path` on it.
 """
 
 from __future__ import annotations
@@ -9,12 +50,27 @@ from __future__ import annotations
 # Keep this file intentionally in sync with the canonical script.
 
 import argparse
+import collections
 import datetime as dt
+import glob
+import heapq
+import io
+import itertools
 import json
 import os
 import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import distill_daily
+import jsonl_reader
+from md_blocks import Section, SectionBuilder, split_lines
+from seen_events import SeenEvents, SeenView, event_key
+from session_index import ScanProgress, SessionIndex
 
 try:
     from zoneinfo import ZoneInfo  # py3.9+
@@ -45,6 +101,15 @@ def default_sessions_dir(agent_id: Optional[str] = None) -> Path:
 def ensure_dirs() -> None:
     (STAGING_DIR / "sessions").mkdir(parents=True, exist_ok=True)
     (STAGING_DIR / "receipts").mkdir(parents=True, exist_ok=True)
+    (STAGING_DIR / "index").mkdir(parents=True, exist_ok=True)
+
+
+def session_index_path() -> Path:
+    return STAGING_DIR / "index" / "sessions.json"
+
+
+def seen_events_path() -> Path:
+    return STAGING_DIR / "index" / "seen_events.sqlite"
 
 
 def parse_ts(s: str) -> Optional[dt.datetime]:
@@ -79,16 +144,261 @@ def flatten_message_text(msg: Any, include_thinking: bool) -> str:
     return ""
 
 
-def iter_jsonl(fp: Path) -> Iterable[Dict[str, Any]]:
-    for line in fp.read_text(encoding="utf-8", errors="replace").splitlines():
-        if not line.strip():
+def event_ts(obj: Dict[str, Any]) -> Optional[dt.datetime]:
+    ts_raw = obj.get("timestamp") or obj.get("ts") or obj.get("time") or obj.get("createdAt")
+    return parse_ts(ts_raw) if isinstance(ts_raw, str) else None
+
+
+# Raw-line prefilter. A line may skip JSON decoding only when its raw bytes
+# prove it cannot be selected, so results are identical with or without it.
+# The top-level "timestamp" of a line, when it comes within the first LEAD_BYTES
+# and only flat members (no nested objects/arrays, no escapes) precede it, as
+# transcript writers emit it. Serializers never repeat a key, so this is the
+# value event_ts() would read.
+LEAD_BYTES = 1024
+LEAD_TS_RE = re.compile(rb'"timestamp"\s*:\s*"([^"\\]+)"')
+SAFE_KEYWORD_RE = re.compile(r"[A-Za-z]+(?:[ _-][A-Za-z]+)*")
+# Non-ASCII characters that case-insensitively match ASCII letters (İ ı ſ K).
+FOLD_CHARS = tuple(c.encode("utf-8") for c in "\u0130\u0131\u017f\u212a")
+# Float overflow (1e999) re-serializes as "Infinity".
+OVERFLOW_RE = re.compile(rb"[0-9][eE][+-]?[0-9]{3}")
+
+
+class RawPrefilter:
+    """Decides from raw bytes that a transcript line cannot be selected.
+
+    The keyword check only applies to plain alternations (`deploy|rollback`,
+    `cron job`): words of two or more ASCII letters appear byte-for-byte in the
+    raw JSON whenever they appear in the decoded text. Other patterns only get
+    the timestamp-window check.
+    """
+
+    def __init__(self, since: Optional[dt.datetime], until: Optional[dt.datetime], keyword: Optional[str]) -> None:
+        self.since_ts = since.timestamp() if since else None
+        self.until_ts = until.timestamp() if until else None
+        self.keywords: Optional[Tuple[bytes, ...]] = None
+        alts = keyword.split("|") if keyword else []
+        if alts and all(len(a) >= 2 and SAFE_KEYWORD_RE.fullmatch(a) for a in alts):
+            self.keywords = tuple(a.lower().encode("ascii") for a in alts)
+        self.check_overflow = any(k in b"infinity" for k in self.keywords or ())
+
+    @property
+    def active(self) -> bool:
+        return self.since_ts is not None or self.until_ts is not None or self.keywords is not None
+
+    def skip(self, raw: bytes) -> Optional[float]:
+        """The line's timestamp if it can be skipped without decoding, else None."""
+        pos = raw.find(b'"timestamp"', 0, LEAD_BYTES)
+        if pos < 0:
+            return None
+        head = raw[:pos]
+        if head.count(b"{") != 1 or not head.lstrip().startswith(b"{") or b"[" in head or b"\\" in head:
+            return None
+        m = LEAD_TS_RE.match(raw, pos)
+        if not m:
+            return None
+        ts = parse_ts(m.group(1).decode("utf-8", errors="replace"))
+        if ts is None or ts.tzinfo is None:
+            return None
+        t = ts.timestamp()
+        if (self.since_ts is not None and t < self.since_ts) or (self.until_ts is not None and t >= self.until_ts):
+            return t
+        if self.keywords is None:
+            return None
+        low = raw.lower()
+        if any(k in low for k in self.keywords):
+            return None
+        if b"\\u" in raw or (not raw.isascii() and any(c in raw for c in FOLD_CHARS)):
+            return None
+        if self.check_overflow and OVERFLOW_RE.search(raw):
+            return None
+        return t
+
+
+SCAN_STATS = (
+    "lines_prefiltered",
+    "events_seen",
+    "events_in_window",
+    "events_matched",
+    "events_suppressed",
+    "tool_results_skipped",
+    "thinking_stripped",
+    "bytes_scanned",
+)
+
+
+@dataclass
+class EventTags:
+    """The extract (tag) an event goes to: `tag` for a single extract, else its local day in `tz`."""
+
+    tag: str = ""
+    tz: Optional[dt.tzinfo] = None
+
+    def __call__(self, ts: dt.datetime) -> str:
+        return self.tag if self.tz is None else ts.astimezone(self.tz).date().isoformat()
+
+
+@dataclass
+class FileScan:
+    """One transcript's selected events, in (timestamp, file, offset) order, plus its counters.
+
+    `tag_stats` holds `events_matched` and `events_suppressed` per tag.
+    """
+
+    events: List[Tuple[Tuple[float, str, int], str, Dict[str, Any]]]
+    stats: Dict[str, int]
+    progress: ScanProgress
+    tag_stats: Dict[str, Dict[str, int]]
+
+
+def select_events(events: List, max_events: int, keep: str) -> List:
+    """The `max_events` earliest or latest of already-ordered events."""
+    return events[:max_events] if keep == "earliest" else events[len(events) - max_events :]
+
+
+def cap_events(events: List, max_events: int, keep: str) -> List:
+    events.sort(key=lambda e: e[0])
+    return select_events(events, max_events, keep)
+
+
+def new_tag_stats() -> Dict[str, int]:
+    return {"events_matched": 0, "events_suppressed": 0, "events_selected": 0, "events_over_limit": 0}
+
+
+def scan_file(
+    fp: Path,
+    progress: ScanProgress,
+    since: Optional[dt.datetime],
+    until: Optional[dt.datetime],
+    keyword_re: Optional[re.Pattern[str]],
+    include_tool_results: bool,
+    include_thinking: bool,
+    max_events: int,
+    keep: str = "earliest",
+    use_mmap: bool = False,
+    prefilter: bool = True,
+    tags: Optional[EventTags] = None,
+    seen: Optional[SeenView] = None,
+) -> FileScan:
+    """Scan one transcript from `progress.offset` (runs in a worker process when --jobs > 1).
+
+    Matches already staged under another tag (`seen`) are dropped first; then
+    only the `max_events` earliest/latest matches of each tag are kept, since no
+    others can survive the global cutoff. With `prefilter`, complete lines whose
+    raw timestamps fall outside the window, or whose raw bytes lack a plain
+    keyword, are skipped without JSON decoding.
+    """
+    tags = tags or EventTags()
+    stats = dict.fromkeys(SCAN_STATS, 0)
+    tag_stats: Dict[str, Dict[str, int]] = {}
+    by_tag: Dict[str, List[Tuple[Tuple[float, str, int], str, Dict[str, Any]]]] = {}
+    start = progress.offset
+    source = jsonl_reader.source_name(fp)
+    raw_filter = RawPrefilter(since, until, keyword_re.pattern if keyword_re is not None else None)
+    prefilter = prefilter and raw_filter.active
+    for line_start, line_end, raw in jsonl_reader.iter_lines(fp, start, use_mmap):
+        complete = raw.endswith(b"\n")
+        if prefilter and complete:
+            skipped_ts = raw_filter.skip(raw)
+            if skipped_ts is not None:
+                progress.advance(line_start, line_end, skipped_ts)
+                stats["lines_prefiltered"] += 1
+                stats["events_seen"] += 1
+                continue
+        obj = jsonl_reader.decode_line(raw)
+        if not complete and obj is None:
+            break  # still being written; picked up by the next run
+        if not isinstance(obj, dict):
+            obj = None
+        ts = event_ts(obj) if obj is not None else None
+        progress.advance(line_start, line_end, ts.timestamp() if ts is not None else None)
+        if obj is None:
             continue
-        try:
-            obj = json.loads(line)
-        except Exception:
+        stats["events_seen"] += 1
+        if ts is None:
+            continue
+        if since and ts < since:
+            continue
+        if until and ts >= until:
+            continue
+        stats["events_in_window"] += 1
+
+        msg = obj.get("message")
+        role = msg.get("role") if isinstance(msg, dict) else None
+        if role == "toolResult" and not include_tool_results:
+            stats["tool_results_skipped"] += 1
+            continue
+
+        text = flatten_message_text(msg, include_thinking=include_thinking)
+        if not include_thinking and isinstance(msg, dict):
+            content = msg.get("content")
+            if isinstance(content, list) and any(isinstance(c, dict) and c.get("type") == "thinking" for c in content):
+                stats["thinking_stripped"] += 1
+
+        if keyword_re and not keyword_re.search(text if text else json.dumps(obj, ensure_ascii=False)[:2000]):
             continue
-        if isinstance(obj, dict):
-            yield obj
+
+        event = {
+            "timestamp": ts.isoformat(),
+            "role": role or obj.get("type") or "event",
+            "text": text.strip(),
+            "sourceFile": source,
+        }
+        tag = tags(ts)
+        counts = tag_stats.setdefault(tag, new_tag_stats())
+        stats["events_matched"] += 1
+        counts["events_matched"] += 1
+        if seen is not None and seen.suppressed(event, tag):
+            stats["events_suppressed"] += 1
+            counts["events_suppressed"] += 1
+            continue
+        events = by_tag.setdefault(tag, [])
+        events.append(((ts.timestamp(), source, line_start), tag, event))
+        if len(events) >= 2 * max_events:
+            by_tag[tag] = cap_events(events, max_events, keep)
+    stats["bytes_scanned"] = progress.offset - start
+    events = sorted((e for t in by_tag for e in cap_events(by_tag[t], max_events, keep)), key=lambda e: e[0])
+    return FileScan(events, stats, progress, tag_stats)
+
+
+def transcript_files(sessions_dir: Path) -> List[Path]:
+    """Transcripts to scan: `*.jsonl` plus compressed `*.jsonl.gz` / `*.jsonl.zst` archives.
+
+    An archive whose uncompressed transcript is still present (compression in
+    progress), or that duplicates another archive, is left out so its events
+    are not read twice.
+    """
+    files = list(sessions_dir.glob("*.jsonl"))
+    names = {fp.name for fp in files}
+    for suffix in jsonl_reader.COMPRESSED_SUFFIXES:
+        for fp in sorted(sessions_dir.glob(f"*.jsonl{suffix}")):
+            if fp.stem not in names:
+                names.add(fp.stem)
+                files.append(fp)
+    return sorted(files)
+
+
+def select_per_tag(
+    merged: Iterable[Tuple[Tuple[float, str, int], str, Dict[str, Any]]],
+    max_events: int,
+    keep: str,
+    stats: Dict[str, Any],
+    tag_stats: Dict[str, Dict[str, int]],
+) -> Iterator[Dict[str, Any]]:
+    """Yield the `max_events` earliest or latest events of each tag, counting them into the stats.
+
+    `merged` is in timestamp order, so each tag's (day's) events are contiguous
+    and a tag's counters are final once the next tag's first event is yielded.
+    """
+    for tag, run in itertools.groupby(merged, key=lambda e: e[1]):
+        selected = itertools.islice(run, max_events) if keep == "earliest" else collections.deque(run, maxlen=max_events)
+        counts = tag_stats[tag]
+        for _, _, event in selected:
+            counts["events_selected"] += 1
+            stats["events_selected"] += 1
+            yield event
+        counts["events_over_limit"] = counts["events_matched"] - counts["events_suppressed"] - counts["events_selected"]
+    stats["events_over_limit"] = stats["events_matched"] - stats["events_suppressed"] - stats["events_selected"]
 
 
 def extract_events(
@@ -100,63 +410,126 @@ def extract_events(
     include_thinking: bool,
     tz_offset_minutes: int,
     max_events: int,
-) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
-    events: List[Dict[str, Any]] = []
+    index: Optional[SessionIndex] = None,
+    use_mmap: bool = False,
+    jobs: int = 1,
+    keep: str = "earliest",
+    prefilter: bool = True,
+    tags: Optional[EventTags] = None,
+    seen: Optional[SeenView] = None,
+) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+    """Select in-window events from every transcript, in timestamp order.
+
+    Files are scanned independently (in a process pool when `jobs > 1`) and
+    their sorted events merged, so the output and the `max_events` cutoff
+    (keeping the `keep` = "earliest" or "latest" events) do not depend on file
+    order or scheduling. Ties are broken by file name and byte offset.
+
+    The cutoff applies per tag (`tags`; one local day each with
+    --bucket-by-day), after dropping events `seen` was staged under another
+    tag. `stats["tags"]` holds each tag's counters.
+
+    The scans run (and checkpoints are recorded) before this returns; the
+    events are a generator over the merge, and the selection counters in
+    `stats` are final once it is exhausted.
+    """
     stats = {
         "files_scanned": 0,
+        "files_skipped": 0,
+        "files_unsupported": 0,
+        "lines_prefiltered": 0,
         "events_seen": 0,
         "events_in_window": 0,
+        "events_matched": 0,
+        "events_suppressed": 0,
         "events_selected": 0,
+        "events_over_limit": 0,
         "tool_results_skipped": 0,
         "thinking_stripped": 0,
+        "files_resumed": 0,
+        "bytes_skipped": 0,
+        "bytes_scanned": 0,
     }
 
-    for fp in sorted(sessions_dir.glob("*.jsonl")):
+    work = []
+    for fp in transcript_files(sessions_dir):
+        if not jsonl_reader.can_read(fp):
+            stats["files_unsupported"] += 1
+            continue
+        st = fp.stat()
+        cp = index.checkpoint(fp, st) if index is not None else None
+        if cp is not None and cp.complete(st) and cp.outside(since, until):
+            # Fully indexed, unchanged, and its timestamp range misses the window.
+            stats["files_skipped"] += 1
+            stats["bytes_skipped"] += st.st_size
+            continue
         stats["files_scanned"] += 1
-        for obj in iter_jsonl(fp):
-            stats["events_seen"] += 1
-            ts_raw = obj.get("timestamp") or obj.get("ts") or obj.get("time") or obj.get("createdAt")
-            ts = parse_ts(ts_raw) if isinstance(ts_raw, str) else None
-            if ts is None:
-                continue
-            if since and ts < since:
-                continue
-            if until and ts >= until:
-                continue
-            stats["events_in_window"] += 1
+        progress = cp.resume(since, until) if cp is not None else ScanProgress()
+        if progress.offset:
+            stats["files_resumed"] += 1
+            stats["bytes_skipped"] += progress.offset
+        work.append(
+            (
+                fp,
+                progress,
+                since,
+                until,
+                keyword_re,
+                include_tool_results,
+                include_thinking,
+                max_events,
+                keep,
+                use_mmap,
+                prefilter,
+                tags,
+                seen,
+            )
+        )
 
-            msg = obj.get("message")
-            role = msg.get("role") if isinstance(msg, dict) else None
-            if role == "toolResult" and not include_tool_results:
-                stats["tool_results_skipped"] += 1
-                continue
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            scans = list(pool.map(scan_file, *zip(*work)))
+    else:
+        scans = [scan_file(*w) for w in work]
 
-            text = flatten_message_text(msg, include_thinking=include_thinking)
-            if not include_thinking and isinstance(msg, dict):
-                content = msg.get("content")
-                if isinstance(content, list) and any(isinstance(c, dict) and c.get("type") == "thinking" for c in content):
-                    stats["thinking_stripped"] += 1
+    tag_stats: Dict[str, Dict[str, int]] = {}
+    for w, scan in zip(work, scans):
+        for k in SCAN_STATS:
+            stats[k] += scan.stats[k]
+        for tag, counts in scan.tag_stats.items():
+            total = tag_stats.setdefault(tag, new_tag_stats())
+            for k, v in counts.items():
+                total[k] += v
+        if index is not None:
+            index.record(w[0], scan.progress, compressed=jsonl_reader.is_compressed(w[0]))
 
-            blob = text if text else json.dumps(obj, ensure_ascii=False)[:2000]
-            if keyword_re and not keyword_re.search(blob):
-                continue
+    stats["tags"] = tag_stats
+    stats["events_over_limit"] = stats["events_matched"] - stats["events_suppressed"]
+    merged = heapq.merge(*(scan.events for scan in scans))
+    return select_per_tag(merged, max_events, keep, stats, tag_stats), stats
 
-            events.append(
-                {
-                    "timestamp": ts.isoformat(),
-                    "role": role or obj.get("type") or "event",
-                    "text": text.strip(),
-                    "sourceFile": fp.name,
-                }
-            )
-            stats["events_selected"] += 1
-            if len(events) >= max_events:
-                return events, stats
 
-    return events, stats
+def local_tz(tz_name: Optional[str]) -> dt.tzinfo:
+    """Timezone for day bucketing: the --tz zone if given, else UTC."""
+    if not tz_name:
+        return dt.UTC
+    if ZoneInfo is None:
+        raise SystemExit("zoneinfo unavailable; use --tz-offset-minutes instead")
+    return ZoneInfo(tz_name)
+
+
+def day_window(d: dt.date, tz: dt.tzinfo) -> Tuple[dt.datetime, dt.datetime]:
+    """UTC [start, end) of local day `d`."""
+    local_start = dt.datetime(d.year, d.month, d.day, tzinfo=tz)
+    next_day = d + dt.timedelta(days=1)
+    local_end = dt.datetime(next_day.year, next_day.month, next_day.day, tzinfo=tz)
+    return local_start.astimezone(dt.UTC), local_end.astimezone(dt.UTC)
+
 
+EVENTS_HEADING = "## Extracted events\n"  # last line of every header; the events continue its section
 
-def write_sessions_md(out_path: Path, title: str, events: List[Dict[str, Any]], meta: Dict[str, Any]) -> None:
+
+def render_header(title: str, meta: Dict[str, Any]) -> str:
     lines: List[str] = []
     lines.append(f"# {title}\n")
     lines.append("(Generated from OpenClaw session transcripts; review before promoting. Tool results may be omitted.)\n")
@@ -164,39 +537,282 @@ def write_sessions_md(out_path: Path, title: str, events: List[Dict[str, Any]],
     lines.append("```json")
     lines.append(json.dumps(meta, indent=2))
     lines.append("```\n")
-    lines.append("## Extracted events\n")
+    lines.append(EVENTS_HEADING)
+    return "\n".join(lines)
+
+
+def feed_sections(builder: SectionBuilder, data: bytes, start: int) -> List[Section]:
+    """Feed whole lines rendered at byte offset `start` to `builder`; returns the sections they complete."""
+    done = []
+    for rec in split_lines(io.BytesIO(data), start):
+        sec = builder.feed(*rec)
+        if sec is not None:
+            done.append(sec)
+    return done
+
+
+def render_event(ev: Dict[str, Any]) -> str:
+    ts = ev.get("timestamp", "")
+    role = ev.get("role", "")
+    src = ev.get("sourceFile", "")
+    t = ev.get("text") or "[no extracted text]"
+    if len(t) > 4000:
+        t = t[:4000] + "…"
+    return "\n" + "\n".join([f"### {ts} | {role} | {src}\n", "```", t, "```\n"])
+
+
+class SessionsWriter:
+    """Streams a sessions extract to disk, optionally split into size-capped shards.
+
+    Event blocks are appended to temporary body files as they arrive, so memory
+    holds one event at a time. `close()` writes each shard's title and metadata
+    followed by its body and renames it into place; readers never see a partial
+    file. With `shard_bytes`, a new shard starts once the current body would
+    exceed it: `<tag>.sessions.001.md`, `.002.md`, ... plus
+    `<tag>.sessions.index.json` listing them. Otherwise the output is the single
+    `out_path`. Outputs of the other mode left by earlier runs are removed.
+
+    With `sections`, each rendered event is also grouped into the file's H2
+    sections as it is written (offsets as in the final file), for distilling
+    without reading the file back (`documents()`); those sections are kept in
+    memory until then.
+    """
+
+    def __init__(self, out_path: Path, shard_bytes: int = 0, sections: bool = False) -> None:
+        self.out_path = out_path
+        self.shard_bytes = shard_bytes
+        self.sections = sections
+        self.stem = out_path.name[: -len(".md")]
+        self.index_path = out_path.with_name(f"{self.stem}.index.json")
+        self.parts: List[Dict[str, Any]] = []
+        self._f: Optional[Any] = None
+
+    def shard_path(self, n: int) -> Path:
+        return self.out_path.with_name(f"{self.stem}.{n:03d}.md")
+
+    def _start_part(self) -> None:
+        if self._f is not None:
+            self._f.close()
+        fd, tmp = tempfile.mkstemp(prefix=f".{self.stem}.", suffix=".body.tmp", dir=self.out_path.parent)
+        self._f = os.fdopen(fd, "wb")
+        part = {"tmp": Path(tmp), "events": 0, "bytes": 0, "first": None, "last": None}
+        if self.sections:
+            # Body offsets are relative to the end of the header, which is rendered at close();
+            # the header's last line opens the section the events continue.
+            part["builder"] = SectionBuilder()
+            part["sections"] = feed_sections(part["builder"], EVENTS_HEADING.encode("utf-8"), -len(EVENTS_HEADING))
+        self.parts.append(part)
+
+    def add(self, ev: Dict[str, Any]) -> None:
+        chunk = render_event(ev).encode("utf-8")
+        part = self.parts[-1] if self.parts else None
+        if part is None or (self.shard_bytes and part["events"] and part["bytes"] + len(chunk) > self.shard_bytes):
+            self._start_part()
+            part = self.parts[-1]
+        self._f.write(chunk)
+        if self.sections:
+            part["sections"].extend(feed_sections(part["builder"], chunk, part["bytes"]))
+        part["events"] += 1
+        part["bytes"] += len(chunk)
+        part["first"] = part["first"] or ev.get("timestamp")
+        part["last"] = ev.get("timestamp")
+
+    def close(self, title: str, meta: Dict[str, Any]) -> List[Path]:
+        """Write the final file(s); returns their paths."""
+        if not self.parts:
+            self._start_part()
+        self._f.close()
+        sharded = bool(self.shard_bytes)
+        total = len(self.parts)
+        paths: List[Path] = []
+        for n, part in enumerate(self.parts, start=1):
+            path = self.shard_path(n) if sharded else self.out_path
+            part_title, part_meta = title, meta
+            if sharded:
+                part_title = f"{title} (part {n}/{total})"
+                part_meta = dict(meta, shard={"part": n, "parts": total})
+            part["path"] = path
+            header = render_header(part_title, part_meta).encode("utf-8")
+            if self.sections:
+                # Sections that end inside the header, then the body's, moved past the header.
+                body = part["sections"] + [part.pop("builder").close()]
+                head = SectionBuilder()
+                part["sections"] = feed_sections(head, header[: -len(EVENTS_HEADING)], 0) + [head.close()]
+                part["sections"] += [Section(sec.heading, sec.body, sec.start + len(header), sec.end + len(header)) for sec in body]
+            tmp = path.with_name(f".{path.name}.tmp")
+            with tmp.open("wb") as out, part["tmp"].open("rb") as body:
+                out.write(header)
+                shutil.copyfileobj(body, out)
+            tmp.replace(path)
+            part["tmp"].unlink()
+            paths.append(path)
+
+        # Drop outputs of a previous run that no longer belong to this one.
+        stale = sorted(self.out_path.parent.glob(f"{glob.escape(self.stem)}.[0-9][0-9][0-9].md"))
+        if sharded:
+            stale = [p for p in stale if p not in paths] + [self.out_path]
+            index = {
+                "shard_bytes": self.shard_bytes,
+                "shards": [
+                    {"path": p.name, "events": part["events"], "first": part["first"], "last": part["last"]}
+                    for p, part in zip(paths, self.parts)
+                ],
+            }
+            self.index_path.write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+        else:
+            stale.append(self.index_path)
+        for p in stale:
+            p.unlink(missing_ok=True)
+        return paths
+
+    def abort(self) -> None:
+        if self._f is not None:
+            self._f.close()
+        for part in self.parts:
+            part["tmp"].unlink(missing_ok=True)
+
+    def write(self, title: str, events: Iterable[Dict[str, Any]], meta: Dict[str, Any]) -> List[Path]:
+        try:
+            for ev in events:
+                self.add(ev)
+            return self.close(title, meta)
+        except BaseException:
+            self.abort()
+            raise
+
+    @property
+    def events(self) -> int:
+        return sum(part["events"] for part in self.parts)
+
+    def documents(self) -> Dict[Path, List[Section]]:
+        """H2 sections of each written file, as grouped while writing (empty unless `sections`)."""
+        return {part["path"]: part["sections"] for part in self.parts if self.sections}
 
+
+def write_sessions_md(
+    out_path: Path, title: str, events: Iterable[Dict[str, Any]], meta: Dict[str, Any], shard_bytes: int = 0
+) -> List[Path]:
+    return SessionsWriter(out_path, shard_bytes).write(title, events, meta)
+
+
+def write_outputs(
+    tag: str, events: Iterable[Dict[str, Any]], meta: Dict[str, Any], shard_bytes: int = 0, sections: bool = False
+) -> Dict[Path, List[Section]]:
+    """Write the extract and its meta report; with `sections`, returns each file's H2 sections for --distill.
+
+    `events` are written as they arrive. `meta` (with `selected_events` set) is
+    rendered after the last one, so counters the stream fills in are final.
+    """
+    out_md = STAGING_DIR / "sessions" / f"{tag}.sessions.md"
+    out_json = STAGING_DIR / "reports" / f"sessions-{tag}.meta.json"
+    writer = SessionsWriter(out_md, shard_bytes, sections)
+    try:
+        for ev in events:
+            writer.add(ev)
+        meta = dict(meta, selected_events=writer.events)
+        paths = writer.close(f"Session Extract: {tag}", meta)
+    except BaseException:
+        writer.abort()
+        raise
+    if shard_bytes:
+        meta = dict(meta, shards=[p.name for p in paths])
+    out_json.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+
+    for p in paths:
+        print(f"Wrote: {p.relative_to(WORKSPACE)}")
+    if shard_bytes:
+        print(f"Index: {out_md.with_name(f'{tag}.sessions.index.json').relative_to(WORKSPACE)}")
+    print(f"Meta:  {out_json.relative_to(WORKSPACE)}")
+    print(f"Selected events: {writer.events}")
+    return writer.documents()
+
+
+def staged_keys(events: Iterable[Dict[str, Any]], keys: List[bytes]) -> Iterator[Dict[str, Any]]:
+    """Pass `events` through, appending each one's seen-event key to `keys`."""
     for ev in events:
-        ts = ev.get("timestamp", "")
-        role = ev.get("role", "")
-        src = ev.get("sourceFile", "")
-        lines.append(f"### {ts} | {role} | {src}\n")
-        lines.append("```")
-        t = ev.get("text") or "[no extracted text]"
-        if len(t) > 4000:
-            t = t[:4000] + "…"
-        lines.append(t)
-        lines.append("```\n")
+        keys.append(event_key(ev))
+        yield ev
+
+
+def distill_extracts(documents: Dict[Path, List[Section]]) -> None:
+    """Stage candidates from the extracts just written, as `distill_daily.py --path` would.
 
-    out_path.write_text("\n".join(lines), encoding="utf-8")
+    distill_daily's extractors run in this process on the sections the writer
+    grouped while writing; receipts and the section index match a separate
+    distill_daily run, which would then skip every section.
+    """
+    distill_daily.configure(WORKSPACE)
+    for s in distill_daily.distill_paths(list(documents), documents=documents):
+        print(f"Staged {s['staged']} candidates from {s['path']} ({s['distilled']} sections distilled, {s['skipped']} unchanged skipped)")
+
+
+def configure(workspace: Path) -> None:
+    global WORKSPACE, MEMORY_DIR, STAGING_DIR
+    WORKSPACE = workspace
+    MEMORY_DIR = WORKSPACE / "memory"
+    STAGING_DIR = MEMORY_DIR / "staging"
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
+    ap.add_argument("--workspace", help="Workspace root (default: auto-detected)")
     ap.add_argument("--agent-id", help="OpenClaw agent id to derive the default sessions path from")
     ap.add_argument("--sessions-dir", help="Explicit sessions directory override (defaults to detected agent sessions path)")
     ap.add_argument("--date", help="YYYY-MM-DD (local day if tz offset set)")
     ap.add_argument("--since", help="ISO timestamp (inclusive)")
     ap.add_argument("--until", help="ISO timestamp (exclusive)")
     ap.add_argument("--since-days", type=int, help="Look back N days from now")
+    ap.add_argument(
+        "--bucket-by-day",
+        action="store_true",
+        help="With --since-days N: scan once and write one extract per local day (--tz) for the N days before today",
+    )
     ap.add_argument("--keyword-regex", help="Only include events whose extracted text matches regex")
     ap.add_argument("--include-tool-results", action="store_true")
     ap.add_argument("--include-thinking", action="store_true")
     ap.add_argument("--tz", help="IANA timezone name for day bucketing (e.g. America/New_York)")
     ap.add_argument("--tz-offset-minutes", type=int, default=0, help="Legacy; prefer --tz")
     ap.add_argument("--max-events", type=int, default=4000)
+    ap.add_argument(
+        "--shard-bytes",
+        type=int,
+        default=0,
+        help="Split the extract into <day>.sessions.NNN.md files of about this many bytes, plus an index (default: one file)",
+    )
+    ap.add_argument(
+        "--keep",
+        choices=["earliest", "latest"],
+        default="earliest",
+        help="Which events --max-events keeps when more match (output is always in timestamp order)",
+    )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Worker processes for scanning transcripts (default: CPU count; 1 = serial)",
+    )
+    ap.add_argument("--full", action="store_true", help="Ignore scan checkpoints and read every transcript from the start")
+    ap.add_argument(
+        "--distill",
+        action="store_true",
+        help="Also stage candidates from the extract in-process (same result as distill_daily.py --path on it)",
+    )
+    ap.add_argument(
+        "--include-seen",
+        action="store_true",
+        help="Also emit events already staged under another day's extract (bypasses the seen-event set)",
+    )
+    ap.add_argument("--mmap", action="store_true", help="Read transcripts through mmap instead of buffered reads")
+    ap.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        help="Decode every line instead of skipping lines whose raw timestamp/keyword rules them out",
+    )
     args = ap.parse_args()
 
+    if args.workspace:
+        configure(Path(args.workspace).expanduser().resolve())
+
     sessions_dir = Path(args.sessions_dir or default_sessions_dir(args.agent_id)).expanduser().resolve()
     if not sessions_dir.exists():
         raise SystemExit(f"sessions dir not found: {sessions_dir}")
@@ -215,21 +831,28 @@ def main() -> None:
     if args.until:
         until = parse_ts(args.until)
 
+    days: List[dt.date] = []
+    if args.bucket_by_day:
+        if not args.since_days or args.since_days < 1 or args.date or args.since or args.until:
+            raise SystemExit("--bucket-by-day takes --since-days N >= 1 (and no --date/--since/--until)")
+        # The N complete local days before today, one output per day.
+        today = now.astimezone(local_tz(args.tz)).date()
+        days = [today - dt.timedelta(days=n) for n in range(args.since_days, 0, -1)]
+        since = day_window(days[0], local_tz(args.tz))[0] if days else now
+        until = day_window(today, local_tz(args.tz))[0]
+
     if args.date:
-        d = dt.date.fromisoformat(args.date)
-        if args.tz:
-            if ZoneInfo is None:
-                raise SystemExit("zoneinfo unavailable; use --tz-offset-minutes instead")
-            tz = ZoneInfo(args.tz)
-            local_start = dt.datetime(d.year, d.month, d.day, 0, 0, 0, tzinfo=tz)
-            local_end = local_start + dt.timedelta(days=1)
-            since = local_start.astimezone(dt.UTC)
-            until = local_end.astimezone(dt.UTC)
-        else:
-            since = dt.datetime(d.year, d.month, d.day, tzinfo=dt.UTC)
-            until = since + dt.timedelta(days=1)
+        since, until = day_window(dt.date.fromisoformat(args.date), local_tz(args.tz))
 
     keyword_re = re.compile(args.keyword_regex, flags=re.I) if args.keyword_regex else None
+    index = SessionIndex(session_index_path())
+    if args.full:
+        index.files = {}
+    seen = None if args.include_seen else SeenEvents(seen_events_path())
+    if args.bucket_by_day:
+        tags = EventTags(tz=local_tz(args.tz))
+    else:
+        tags = EventTags(args.date or (since.date().isoformat() if since else now.date().isoformat()))
 
     events, stats = extract_events(
         sessions_dir=sessions_dir,
@@ -240,11 +863,16 @@ def main() -> None:
         include_thinking=args.include_thinking,
         tz_offset_minutes=args.tz_offset_minutes,
         max_events=args.max_events,
+        index=index,
+        use_mmap=args.mmap,
+        jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+        keep=args.keep,
+        prefilter=not args.no_prefilter,
+        tags=tags,
+        seen=seen.view() if seen is not None else None,
     )
-
-    tag = args.date or (since.date().isoformat() if since else now.date().isoformat())
-    out_md = STAGING_DIR / "sessions" / f"{tag}.sessions.md"
-    out_json = STAGING_DIR / "reports" / f"sessions-{tag}.meta.json"
+    index.save()
+    tag_stats = stats.pop("tags")
 
     meta = {
         "generated_at": now.replace(microsecond=0).isoformat().replace("+00:00", "Z"),
@@ -257,16 +885,47 @@ def main() -> None:
         "include_thinking": args.include_thinking,
         "tz": args.tz,
         "tz_offset_minutes": args.tz_offset_minutes,
+        "keep": args.keep,
         "stats": stats,
-        "selected_events": len(events),
+        "json_decoder": jsonl_reader.DECODER,
     }
 
-    write_sessions_md(out_md, title=f"Session Extract: {tag}", events=events, meta=meta)
-    out_json.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
-
-    print(f"Wrote: {out_md.relative_to(WORKSPACE)}")
-    print(f"Meta:  {out_json.relative_to(WORKSPACE)}")
-    print(f"Selected events: {len(events)}")
+    documents: Dict[Path, List[Section]] = {}
+    if not args.bucket_by_day:
+        keys: List[bytes] = []
+        documents.update(write_outputs(tags.tag, staged_keys(events, keys), meta, args.shard_bytes, args.distill))
+        if seen is not None:
+            seen.add_keys(keys, tags.tag)
+    else:
+        # One scan, one output per local day, written as the merged events reach
+        # it; the shared scan counters go under "scan_stats".
+        scan_stats = {k: v for k, v in stats.items() if k not in ("events_selected", "events_over_limit")}
+        runs = itertools.groupby(events, key=lambda ev: tags(dt.datetime.fromisoformat(ev["timestamp"])))
+        run_tag, run = next(runs, (None, iter(())))
+        for d in days:
+            tag = d.isoformat()
+            day_events = run if run_tag == tag else iter(())
+            day_since, day_until = day_window(d, local_tz(args.tz))
+            day_meta = dict(
+                meta,
+                date=tag,
+                since=day_since.isoformat(),
+                until=day_until.isoformat(),
+                bucket_by_day=True,
+                stats=tag_stats.setdefault(tag, new_tag_stats()),
+                scan_stats=scan_stats,
+            )
+            keys = []
+            documents.update(write_outputs(tag, staged_keys(day_events, keys), day_meta, args.shard_bytes, args.distill))
+            if seen is not None:
+                seen.add_keys(keys, tag)
+            if run_tag == tag:
+                run_tag, run = next(runs, (None, iter(())))
+
+    if seen is not None:
+        seen.close()
+    if args.distill:
+        distill_extracts(documents)
 
 
 if __name__ == "__main__":
@@ -28,15 +28,22 @@ def main() -> None:
     ap.add_argument("--tz", help="IANA timezone name for day bucketing (preferred)")
     ap.add_argument("--tz-offset-minutes", type=int, default=0, help="Legacy; prefer --tz")
     ap.add_argument("--keyword-regex", help="Optional filter for transcript extraction")
+    ap.add_argument("--shard-bytes", type=int, default=0, help="Split the transcript extract into shards of about this size")
     args = ap.parse_args()
 
     day = args.date
 
+    daily = MEMORY_DIR / f"{day}.md"
+    if daily.exists():
+        run(["python3", str(SCRIPTS_DIR / "distill_daily.py"), "--path", f"memory/{day}.md"])
+
+    # The transcript extract (every shard) is distilled in the same process that writes it.
     cmd = [
         "python3",
         str(SCRIPTS_DIR / "distill_sessions.py"),
         "--date",
         day,
+        "--distill",
     ]
     if args.tz:
         cmd += ["--tz", args.tz]
@@ -44,17 +51,10 @@ def main() -> None:
         cmd += ["--tz-offset-minutes", str(args.tz_offset_minutes)]
     if args.keyword_regex:
         cmd += ["--keyword-regex", args.keyword_regex]
+    if args.shard_bytes:
+        cmd += ["--shard-bytes", str(args.shard_bytes)]
     run(cmd)
 
-    daily = MEMORY_DIR / f"{day}.md"
-    if daily.exists():
-        run(["python3", str(SCRIPTS_DIR / "distill_daily.py"), "--path", f"memory/{day}.md"])
-
-    transcript_md = MEMORY_DIR / "staging" / "sessions" / f"{day}.sessions.md"
-    if transcript_md.exists():
-        rel = transcript_md.relative_to(WORKSPACE)
-        run(["python3", str(SCRIPTS_DIR / "distill_daily.py"), "--path", str(rel)])
-
     run(["python3", str(SCRIPTS_DIR / "dedupe_staging.py"), "--write"])
 
     ts = dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
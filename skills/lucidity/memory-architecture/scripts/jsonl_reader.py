@@ -0,0 +1,160 @@
+"""Streaming JSONL reader for transcripts, the receipt ledger and telemetry.
+
+Reads one line at a time through a buffered file (or an mmap of it), so memory
+stays at one record plus the read buffer however large the file is. Lines are
+split on `\\n` only and carry their byte offsets, so callers can checkpoint and
+resume mid-file.
+
+Decoding uses `orjson` when it is installed and falls back to the stdlib `json`
+module otherwise (and for the few inputs orjson rejects, such as invalid UTF-8
+or NaN), so results do not depend on which decoder is available. The one
+difference: integers beyond 64 bits come back as floats from orjson, which
+does not matter for the fields Lucidity reads.
+
+Compressed transcripts (`.jsonl.gz`, and `.jsonl.zst` when the `zstandard`
+package or Python 3.14's `compression.zstd` is available) are decompressed as
+a stream; their offsets count decompressed bytes and they cannot be mmapped.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import mmap
+import os
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore
+
+try:
+    from compression import zstd  # type: ignore  # Python 3.14+
+except Exception:  # pragma: no cover - depends on the interpreter
+    zstd = None  # type: ignore
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore
+
+DECODER = "orjson" if orjson is not None else "json"
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+DECOMPRESS_ERRORS: Tuple[type, ...] = (OSError, EOFError, zlib.error) + tuple(
+    m.ZstdError for m in (zstd, zstandard) if m is not None
+)
+
+
+def is_compressed(fp: Path) -> bool:
+    return fp.suffix in COMPRESSED_SUFFIXES
+
+
+def can_read(fp: Path) -> bool:
+    """False for `.zst` files when no zstd module is installed."""
+    return fp.suffix != ".zst" or zstd is not None or zstandard is not None
+
+
+def source_name(fp: Path) -> str:
+    """File name without a compression suffix, so an archived transcript keeps its name."""
+    return fp.stem if is_compressed(fp) else fp.name
+
+
+def open_decompressed(fp: Path) -> BinaryIO:
+    """Binary stream of a compressed file's decompressed contents."""
+    if fp.suffix == ".gz":
+        return gzip.open(fp, "rb")  # type: ignore[return-value]
+    if zstd is not None:
+        return zstd.open(fp, "rb")
+    if zstandard is not None:
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(fp.open("rb"), read_across_frames=True, closefd=True))
+    raise OSError(f"zstd support not installed: {fp}")
+
+
+def iter_decompressed_lines(fp: Path, start: int = 0) -> Iterator[Tuple[int, int, bytes]]:
+    """`iter_lines` for a compressed file; a corrupt or truncated stream ends iteration."""
+    with open_decompressed(fp) as f:
+        pos = 0
+        try:
+            while pos < start:
+                # No random access into a compressed stream: read up to `start`.
+                chunk = f.read(min(start - pos, 1 << 20))
+                if not chunk:
+                    return
+                pos += len(chunk)
+            for raw in f:
+                end = pos + len(raw)
+                yield pos, end, raw
+                pos = end
+        except DECOMPRESS_ERRORS as e:
+            print(f"warning: stopped reading {fp} at byte {pos}: {e}", file=sys.stderr)
+
+
+def loads(raw: bytes) -> Any:
+    """Decode one JSON document from bytes; raises ValueError if it does not parse."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw.decode("utf-8", errors="replace"))
+
+
+def iter_lines(fp: Path, start: int = 0, use_mmap: bool = False) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield (line start, line end, raw bytes) for each line from byte offset `start`.
+
+    The last line is yielded even without a trailing newline; callers decide
+    whether such a partial line counts. Compressed files are decompressed as a
+    stream (`use_mmap` is ignored for them).
+    """
+    if is_compressed(fp):
+        yield from iter_decompressed_lines(fp, start)
+        return
+    with fp.open("rb") as f:
+        if use_mmap:
+            if os.fstat(f.fileno()).st_size <= start:
+                return  # also avoids mapping an empty file, which mmap rejects
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                pos = start
+                while pos < size:
+                    nl = mm.find(b"\n", pos)
+                    end = size if nl < 0 else nl + 1
+                    yield pos, end, mm[pos:end]
+                    pos = end
+            return
+        f.seek(start)
+        pos = start
+        for raw in f:
+            end = pos + len(raw)
+            yield pos, end, raw
+            pos = end
+
+
+def iter_records(
+    fp: Path, start: int = 0, use_mmap: bool = False
+) -> Iterator[Tuple[int, int, Optional[Any]]]:
+    """Yield (line start, line end, decoded object or None) for each complete line.
+
+    Blank and unparseable lines yield None. A trailing line without a newline
+    counts only if it parses; otherwise it is still being written and iteration
+    stops before it, so it is picked up by the next read.
+    """
+    for pos, end, raw in iter_lines(fp, start, use_mmap):
+        obj = decode_line(raw)
+        if not raw.endswith(b"\n") and obj is None:
+            return
+        yield pos, end, obj
+
+
+def decode_line(raw: bytes) -> Optional[Any]:
+    """Decoded object for one raw line, or None if it is blank or does not parse."""
+    if not raw.strip():
+        return None
+    try:
+        return loads(raw)
+    except Exception:
+        return None
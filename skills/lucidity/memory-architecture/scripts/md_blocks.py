@@ -0,0 +1,280 @@
+"""Markdown section/block parsing shared by the Lucidity pipeline scripts.
+
+Two views of the same H2 structure:
+- `iter_sections` (distill inputs): heading/body pairs streamed from disk
+- `parse_blocks` (staging files): `BlockRecord`s for dedupe and apply
+
+`iter_sections` scans a file line by line and yields one H2 section at a time
+with its byte offsets, so callers can process and release a section before the
+next one is read. Peak memory is bounded by the largest single section rather
+than the whole document. `SectionBuilder` is the same grouping driven by the
+caller, for documents whose lines are produced in-process rather than read.
+
+Section semantics match the original regex splitter
+(`re.split(r"^##\\s+", md, flags=re.M)` + `splitlines()`):
+- text before the first H2 is yielded as "(preamble)" (when non-empty)
+- a document without any H2 is yielded once as "(no heading)"
+- newlines are read with universal-newline semantics, like `Path.read_text`
+
+`BlockRecord` wraps one staging block (H2 heading line through the next H2) and
+computes its normalized text, type, dedupe key, field set and hashes at most
+once, so dedupe and apply never re-scan or re-hash the same bytes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Section:
+    heading: str
+    body: str
+    start: int  # byte offset of the section's first line
+    end: int  # byte offset just past the section's last line
+
+
+def is_h2_line(line: str, has_newline: bool) -> bool:
+    """True if `line` starts an H2 section (`^##\\s+`)."""
+    if not line.startswith("##"):
+        return False
+    if len(line) > 2:
+        return line[2].isspace()
+    # A bare "##" only qualifies when a newline follows it.
+    return has_newline
+
+
+def iter_file_lines(path: Path, start: int = 0) -> Iterator[Tuple[str, int, int, bool]]:
+    """Yield (line, start offset, end offset, has_newline) with universal newlines."""
+    with path.open("rb") as f:
+        f.seek(start)
+        yield from split_lines(f, start)
+
+
+def split_lines(raw_lines: Iterable[bytes], start: int = 0) -> Iterator[Tuple[str, int, int, bool]]:
+    """Decode raw lines as `iter_file_lines` does, for lines already in memory.
+
+    `raw_lines` must be split on `\\n` only, as iterating a binary file does.
+    """
+    pos = start
+    for raw in raw_lines:
+        end = pos + len(raw)
+        has_nl = raw.endswith(b"\n")
+        text = raw.decode("utf-8")
+        if has_nl:
+            text = text[:-1]
+        if text.endswith("\r"):
+            text = text[:-1]
+            has_nl = True
+        if "\r" in text:
+            # Lone CRs are line breaks under universal newlines.
+            parts = text.split("\r")
+            for i, part in enumerate(parts):
+                yield part, pos, end, has_nl or i < len(parts) - 1
+        else:
+            yield text, pos, end, has_nl
+        pos = end
+
+
+class SectionBuilder:
+    """Groups (line, start, end, has_newline) records into H2 sections as they are fed."""
+
+    def __init__(self) -> None:
+        self.buf: List[str] = []
+        self.heading_seen = False
+        self.sec_start = 0
+        self.sec_end = 0
+        self.first = True
+
+    def _finish(self) -> Section:
+        if not self.heading_seen:
+            return Section("(preamble)", "\n".join(self.buf).strip(), self.sec_start, self.sec_end)
+        # The `\s+` after "##" swallows all leading whitespace, including newlines.
+        part = "\n".join(self.buf).lstrip()
+        plines = part.splitlines()
+        heading = plines[0].strip() if plines else "(empty)"
+        return Section(heading, "\n".join(plines[1:]).strip(), self.sec_start, self.sec_end)
+
+    def feed(self, line: str, start: int, end: int, has_nl: bool) -> Optional[Section]:
+        """Add one line; returns the section it completes, if any."""
+        done = None
+        if self.first:
+            self.sec_start = start
+            self.first = False
+        if is_h2_line(line, has_nl):
+            if self.heading_seen or (self.buf and "\n".join(self.buf).strip()):
+                done = self._finish()
+            self.heading_seen = True
+            self.buf = [line[2:]]
+            self.sec_start = start
+        else:
+            self.buf.append(line)
+        self.sec_end = end
+        return done
+
+    def close(self) -> Section:
+        """The final section (a document without lines yields an empty "(no heading)")."""
+        if self.first:
+            return Section("(no heading)", "", 0, 0)
+        if self.heading_seen:
+            return self._finish()
+        return Section("(no heading)", "\n".join(self.buf).strip(), self.sec_start, self.sec_end)
+
+
+def scan_sections(lines: Iterable[Tuple[str, int, int, bool]]) -> Iterator[Section]:
+    """Group (line, start, end, has_newline) records into H2 sections."""
+    builder = SectionBuilder()
+    for rec in lines:
+        sec = builder.feed(*rec)
+        if sec is not None:
+            yield sec
+    yield builder.close()
+
+
+def iter_sections(path: Path, start: int = 0) -> Iterator[Section]:
+    """Stream the H2 sections of a Markdown file, starting at byte offset `start`."""
+    return scan_sections(iter_file_lines(path, start))
+
+
+def sha256_text(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def norm_text(s: str) -> str:
+    """Trim trailing spaces, collapse 3+ newlines into 2, strip the ends."""
+    s = re.sub(r"[ \t]+$", "", s, flags=re.M)
+    s = re.sub(r"\n{3,}", "\n\n", s)
+    return s.strip()
+
+
+def norm_ws(s: str) -> str:
+    return norm_text(s) + "\n"
+
+
+def norm_block(s: str) -> str:
+    return norm_text(s) + "\n\n"
+
+
+def split_blocks(md: str) -> List[str]:
+    """Split by H2 headings into blocks including heading line.
+
+    The file header (H1 etc.) before the first H2 is kept as a prefix block.
+    Every block is stripped and terminated with a blank line.
+    """
+    md = md.strip()
+    if not md:
+        return []
+
+    m = re.search(r"^##\s+", md, flags=re.M)
+    if not m:
+        return [md + "\n"]
+
+    prefix = md[: m.start()].strip()
+    rest = md[m.start() :]
+
+    blocks: List[str] = []
+    if prefix:
+        blocks.append(prefix + "\n\n")
+
+    parts = re.split(r"(?m)^(?=##\s+)", rest)
+    for p in parts:
+        p = p.strip()
+        if p:
+            blocks.append(p + "\n\n")
+    return blocks
+
+
+TYPE_RE = re.compile(r"-\s*type:\s*(\w+)", flags=re.I)
+FIELD_RE = re.compile(r"(?m)^[ \t]*-[ \t]*(\w+)[ \t]*:")
+NOT_NEWLINE_RE = re.compile(r"[^\n]")
+GENERATED_AT_RE = re.compile(r"(?im)^\s*-\s*generated_at\s*:\s*.*$\n?")
+
+
+class BlockRecord:
+    """One staging block with lazily computed, cached derived fields."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    @cached_property
+    def is_candidate(self) -> bool:
+        """False for the file header block before the first H2."""
+        return self.text.lstrip().startswith("##")
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def normalized(self) -> str:
+        return norm_text(self.text)
+
+    @cached_property
+    def sha256(self) -> str:
+        """Hash of the normalized block (as recorded in apply manifests)."""
+        return sha256_text(self.normalized + "\n\n")
+
+    @cached_property
+    def type(self) -> str:
+        for ln in self.normalized.splitlines()[:30]:
+            m = TYPE_RE.match(ln.strip())
+            if m:
+                return m.group(1).lower()
+        return "unknown"
+
+    @cached_property
+    def heading(self) -> str:
+        """Normalized H2 heading text ("" for the header block)."""
+        first = self.normalized.split("\n", 1)[0]
+        if not first.startswith("##"):
+            return ""
+        return re.sub(r"\s+", " ", first[2:].strip()).lower()
+
+    @cached_property
+    def key(self) -> Tuple[str, str]:
+        """(type, normalized heading) for heuristic duplicate detection."""
+        return (self.type, self.heading)
+
+    @cached_property
+    def fields(self) -> FrozenSet[str]:
+        """Lower-cased `- name:` fields that carry a value.
+
+        Mirrors the historical `^\\s*-\\s*name\\s*:\\s*.+$` check: a field counts
+        when anything other than newlines follows its colon in the block.
+        """
+        out = set()
+        t = self.text
+        for m in FIELD_RE.finditer(t):
+            name = m.group(1).lower()
+            if name not in out and NOT_NEWLINE_RE.search(t, m.end()):
+                out.add(name)
+        return frozenset(out)
+
+    def has_field(self, name: str) -> bool:
+        return name.lower() in self.fields
+
+    @cached_property
+    def canonical_key(self) -> str:
+        """Stable dedupe key that ignores volatile metadata (e.g. generated_at)."""
+        b = GENERATED_AT_RE.sub("", self.normalized + "\n\n")
+        return sha256_text(norm_text(b))
+
+
+def canonical_key(block: str) -> str:
+    return BlockRecord(block).canonical_key
+
+
+def parse_blocks(md: str) -> List[BlockRecord]:
+    return [BlockRecord(b) for b in split_blocks(md)]
+
+
+def read_blocks(path: Path) -> List[BlockRecord]:
+    """Parse a staging file once into block records ([] if it does not exist)."""
+    if not path.exists():
+        return []
+    return parse_blocks(path.read_text(encoding="utf-8"))
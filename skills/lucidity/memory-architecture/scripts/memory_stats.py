@@ -10,7 +10,8 @@ What it reports (workspace-relative):
 - last backup archive + timestamp
 - last apply manifest + timestamp + applied/skipped
 - staging sizes (topics/receipts/reports/manifests)
-- telemetry tail counts (maintenance.apply_staging.*)
+- telemetry tail counts (maintenance.apply_staging.*, distill/dedupe completions)
+- latest per-stage metrics (wall/CPU time, bytes, blocks/s, phase timings)
 
 Usage:
   python3 memory-architecture/scripts/memory_stats.py
@@ -26,6 +27,8 @@ import json
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import jsonl_reader
+
 WORKSPACE = Path.cwd()
 
 
@@ -54,19 +57,22 @@ def dir_size(p: Path) -> int:
     return total
 
 
-def count_events(jsonl: Path, types: List[str]) -> Dict[str, int]:
+def count_events(jsonl: Path, types: List[str]) -> Tuple[Dict[str, int], Dict[str, Dict]]:
+    """Return (event counts, latest `metrics` payload per stage) for the given types."""
     out = {t: 0 for t in types}
+    metrics: Dict[str, Dict] = {}
     if not jsonl.exists():
-        return out
-    for line in jsonl.read_text(encoding="utf-8").splitlines():
-        try:
-            obj = json.loads(line)
-        except Exception:
+        return out, metrics
+    for _, _, obj in jsonl_reader.iter_records(jsonl):
+        if not isinstance(obj, dict):
             continue
         t = obj.get("type")
         if t in out:
             out[t] += 1
-    return out
+            m = obj.get("metrics")
+            if isinstance(m, dict) and m.get("stage"):
+                metrics[m["stage"]] = m
+    return out, metrics
 
 
 def main() -> None:
@@ -96,11 +102,13 @@ def main() -> None:
             apply_summary = {"error": "failed-to-parse"}
 
     telemetry = WORKSPACE / "state" / "memory-recall-events.jsonl"
-    event_counts = count_events(
+    event_counts, stage_metrics = count_events(
         telemetry,
         [
             "maintenance.apply_staging.start",
             "maintenance.apply_staging.complete",
+            "maintenance.distill_daily.complete",
+            "maintenance.dedupe_staging.complete",
         ],
     )
 
@@ -123,6 +131,7 @@ def main() -> None:
         "telemetry": {
             "path": str(telemetry.relative_to(WORKSPACE)),
             "counts": event_counts,
+            "lastStageMetrics": stage_metrics,
         },
     }
 
@@ -134,6 +143,8 @@ def main() -> None:
             print(f"- last apply: applied={apply_summary.get('applied')} skipped={apply_summary.get('skipped')} write={apply_summary.get('write')}")
         print(f"- staging bytes: {stats['staging']['bytes']}")
         print(f"- telemetry: {stats['telemetry']['counts']}")
+        for stage, m in sorted(stage_metrics.items()):
+            print(f"- {stage}: wall={m.get('wall_s')}s cpu={m.get('cpu_s')}s blocks/s={m.get('blocks_per_s')} phases={m.get('phases_s')}")
     else:
         print(json.dumps(stats, indent=2))
 
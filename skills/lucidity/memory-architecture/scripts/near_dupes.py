@@ -0,0 +1,222 @@
+"""MinHash signatures and LSH banding for near-duplicate staged blocks.
+
+A block's content is its heading (without the "Procedure (candidate):" style
+prefix) and every line except the metadata fields distill writes for every
+block (type, source, evidence, generated_at, ...), so two blocks are compared
+on what they say rather than on the shared template. The content is shingled
+into overlapping word pairs and summarised by a one-permutation MinHash
+signature of NUM_HASHES bins: each shingle is hashed COPIES times, the low
+bits of a hash pick a bin and each bin keeps its smallest hash; an empty bin
+copies a non-empty one, probing bins in a fixed pseudo-random order. The
+fraction of equal bins estimates the Jaccard similarity of two shingle sets.
+
+Signatures are split into BANDS bands of ROWS bins and each band is hashed to
+a bucket; only blocks sharing a bucket are compared, which keeps the search
+sub-quadratic. With 16 bands of 4 rows, a pair at similarity 0.7 shares a
+bucket with probability ~0.98 (0.5: ~0.64, 0.3: ~0.12).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from dedupe_index import DedupeIndex
+from md_blocks import BlockRecord
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+SHINGLE_WORDS = 2
+COPIES = 4  # hashes per shingle, so short blocks leave few bins empty
+DEFAULT_THRESHOLD = 0.7
+
+# Fields every distilled block carries; their values say nothing about the content.
+METADATA_FIELDS = frozenset(
+    {"type", "source", "evidence", "generated_at", "confidence", "scope", "trigger", "guardrails", "verification"}
+)
+
+WORD_RE = re.compile(r"\w+")
+FIELD_LINE_RE = re.compile(r"-[ \t]*(\w+)[ \t]*:(.*)")
+EMPTY = 1 << 32
+BUCKET_MASK = (1 << 59) - 1  # buckets fit a signed 64-bit SQLite integer
+# Per bin, the other bins in a fixed pseudo-random order (the same for every block).
+PROBES = [
+    sorted((j for j in range(NUM_HASHES) if j != i), key=lambda j, i=i: hashlib.blake2b(bytes((i, j))).digest())
+    for i in range(NUM_HASHES)
+]
+
+
+def content(block: BlockRecord) -> str:
+    """Heading and body text of a block without its template metadata."""
+    lines = block.normalized.split("\n")
+    out = [block.heading.split(":", 1)[-1]] if block.heading else []
+    skipping = False
+    for ln in lines[1:] if block.heading else lines:
+        if ln[:1] in (" ", "\t") and skipping:
+            continue  # nested item of a metadata field (e.g. evidence paths)
+        m = FIELD_LINE_RE.match(ln)
+        skipping = bool(m) and m.group(1).lower() in METADATA_FIELDS
+        if not skipping:
+            out.append(m.group(2) if m else ln)
+    return "\n".join(out)
+
+
+def signature(block: BlockRecord) -> Optional[bytes]:
+    """MinHash signature of the block's content, or None if it has no words."""
+    words = WORD_RE.findall(content(block).lower())
+    if not words:
+        return None
+    n = max(1, len(words) - SHINGLE_WORDS + 1)
+    shingles = {" ".join(words[i : i + SHINGLE_WORDS]) for i in range(n)}
+    bins = [EMPTY] * NUM_HASHES
+    for s in shingles:
+        for h in array("I", hashlib.blake2b(s.encode("utf-8"), digest_size=4 * COPIES).digest()):
+            b = h % NUM_HASHES  # the low bits pick the bin
+            if h < bins[b]:
+                bins[b] = h
+    # Densify: an empty bin copies the first non-empty bin in its fixed probe order.
+    if EMPTY in bins:
+        filled = bins[:]
+        for i, v in enumerate(filled):
+            if v == EMPTY:
+                for j in PROBES[i]:
+                    if filled[j] != EMPTY:
+                        bins[i] = filled[j]
+                        break
+    return array("I", bins).tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    x, y = array("I", a), array("I", b)
+    return sum(1 for u, v in zip(x, y) if u == v) / NUM_HASHES
+
+
+def buckets(sig: bytes) -> List[int]:
+    """One LSH bucket per band: the band's bins folded to 59 bits, tagged with the band number."""
+    width = 4 * ROWS
+    out = []
+    for band in range(BANDS):
+        v = int.from_bytes(sig[band * width : (band + 1) * width], "little")
+        out.append(((v ^ (v >> 64)) & BUCKET_MASK) << 4 | band)
+    return out
+
+
+class NearDupes:
+    """Near-duplicate stage of one dedupe run.
+
+    Staging files are deduped in a fixed order (topics by name, then
+    MEMORY.candidates), and a block is a near-duplicate of the similar kept
+    blocks of its own file and of the files before it. In "drop" mode such a
+    block is dropped. A new block similar to a kept block of a later file is
+    kept instead, and that later file is rebuilt when its turn comes, so a run
+    over appended blocks keeps what a --full run would.
+
+    Every similar pair found is stored with the file's signatures (and removed
+    with them when either file is rebuilt), and the report groups all stored
+    pairs into clusters, so a cluster found by an earlier run is still
+    reported when no block of it was compared again.
+    """
+
+    def __init__(self, mode: str, threshold: float, index: DedupeIndex, order: Dict[str, int], rebuild: Set[str]) -> None:
+        self.mode = mode
+        self.threshold = threshold
+        self.index = index
+        self.order = order
+        self.rebuild = rebuild  # later files whose kept blocks lost to a new block
+        # Kept blocks not yet stored, and their entries by bucket; similar pairs not yet stored.
+        self.pending: List[Tuple[str, str, str, bytes, List[int]]] = []
+        self.pending_buckets: Dict[int, List[int]] = {}
+        self.links: List[Tuple[str, str, str, str, str, str, float, bool]] = []
+        self.signed: Dict[str, Optional[bytes]] = {}  # signatures computed ahead (dedupe --jobs), by sha256
+
+    @property
+    def setting(self) -> str:
+        """What a deduped output and its stored pairs depend on; a file deduped with another setting is rebuilt."""
+        return f"{self.mode}:{self.threshold}"
+
+    def check(self, rel: str, block: BlockRecord) -> bool:
+        """Record the block's similar blocks; True if it should be dropped."""
+        if not block.is_candidate:
+            return False
+        sig = self.signed[block.sha256] if block.sha256 in self.signed else signature(block)
+        if sig is None:
+            return False
+        keys = buckets(sig)
+        pos = self.order[rel]
+        earlier = False
+        similar = []
+        found = {i for k in keys for i in self.pending_buckets.get(k, ())}
+        candidates = self.index.near_candidates(keys) + [self.pending[i][:4] for i in sorted(found)]
+        for path, sha256, heading, other in candidates:
+            if path not in self.order:
+                continue  # no longer staged
+            s = similarity(sig, other)
+            if s < self.threshold:
+                continue
+            similar.append((path, sha256, heading, s))
+            if self.order[path] <= pos:
+                earlier = True
+            elif self.mode == "drop":
+                self.rebuild.add(path)
+        drop = earlier and self.mode == "drop"
+        self.links.extend((path, sha256, heading, rel, block.sha256, block.heading, s, drop) for path, sha256, heading, s in similar)
+        if drop:
+            return True
+        for k in keys:
+            self.pending_buckets.setdefault(k, []).append(len(self.pending))
+        self.pending.append((rel, block.sha256, block.heading, sig, keys))
+        return False
+
+    def flush(self) -> None:
+        """Store the signatures of the blocks kept, and the similar pairs found, since the last flush."""
+        self.index.add_near(self.pending)
+        self.index.add_near_links(self.links)
+        self.pending = []
+        self.pending_buckets = {}
+        self.links = []
+
+    def report(self) -> Dict:
+        """Clusters of all stored similar pairs between blocks that are still staged."""
+        members: Dict[Tuple[str, str], Dict] = {}
+        parent: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        min_similarity: Dict[Tuple[str, str], float] = {}
+
+        def find(k: Tuple[str, str]) -> Tuple[str, str]:
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+
+        for a_path, a_sha256, a_heading, b_path, b_sha256, b_heading, s, dropped in self.index.near_links():
+            if a_path not in self.order or b_path not in self.order:
+                continue
+            a, b = (a_path, a_sha256), (b_path, b_sha256)
+            for k, heading in ((a, a_heading), (b, b_heading)):
+                if k not in members:
+                    members[k] = {"path": k[0], "heading": heading, "sha256": k[1], "dropped": False}
+                    parent[k] = k
+                    min_similarity[k] = 1.0
+            members[b]["dropped"] = members[b]["dropped"] or bool(dropped)
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[rb] = ra
+                min_similarity[ra] = min(min_similarity[ra], min_similarity[rb])
+            min_similarity[ra] = min(min_similarity[ra], s)
+        groups: Dict[Tuple[str, str], List[Dict]] = {}
+        for k, info in members.items():
+            groups.setdefault(find(k), []).append(info)
+        clusters = [
+            {"min_similarity": round(min_similarity[root], 3), "blocks": sorted(blocks, key=lambda m: self.order[m["path"]])}
+            for root, blocks in groups.items()
+        ]
+        clusters.sort(key=lambda c: (self.order[c["blocks"][0]["path"]], c["blocks"][0]["sha256"]))
+        return {
+            "mode": self.mode,
+            "threshold": self.threshold,
+            "blocks_dropped": sum(m["dropped"] for m in members.values()),
+            "clusters": clusters,
+        }
@@ -4,7 +4,9 @@
 Moves files older than N days from `memory/staging/**` into
 `memory/archive/staging/YYYY/MM/...` with a manifest.
 
-Canonical memory files are never touched.
+Canonical memory files are never touched. Incremental-state indexes under
+`memory/staging/index/` and the receipt ledger (`receipts/ledger.jsonl`) are
+left in place.
 
 Usage:
   python3 memory-architecture/scripts/prune_staging.py --days 14 --write
@@ -78,6 +80,12 @@ def main() -> None:
             continue
         if not is_under(p, STAGING):
             continue
+        if is_under(p, STAGING / "index"):
+            # Incremental-state indexes are live bookkeeping, not staged artifacts.
+            continue
+        if p == STAGING / "receipts" / "ledger.jsonl":
+            # Append-only history; archiving it would reset the receipt index.
+            continue
 
         st = p.stat()
         mtime = dt.datetime.fromtimestamp(st.st_mtime, tz=dt.UTC)
@@ -0,0 +1,113 @@
+"""Append-only receipt ledger with an incremental SQLite index.
+
+Distill appends every output receipt to `memory/staging/receipts/ledger.jsonl`.
+Dedupe keeps `memory/staging/index/receipts.sqlite` in sync with the ledger:
+it remembers the byte offset it has consumed, so each run only reads receipts
+appended since the previous run instead of re-loading every per-day JSON file.
+
+The index holds the set of seen source and output sha256 values plus the running
+receipt/duplicate-source counters reported in `dedupe-report.json`.
+
+Legacy per-day receipts (`memory/staging/receipts/*.json`) are imported into the
+ledger once, when the ledger is first created. Per-day receipt files are still
+written by distill as the per-run record (and as the "day processed" marker for
+distill_pending), but are no longer read back on every dedupe run.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import jsonl_reader
+
+
+class ReceiptLedger:
+    def __init__(self, staging_dir: Path) -> None:
+        self.receipts_dir = staging_dir / "receipts"
+        self.ledger_path = self.receipts_dir / "ledger.jsonl"
+        self.index_path = staging_dir / "index" / "receipts.sqlite"
+
+    def ensure(self) -> None:
+        """Create the ledger, importing legacy per-day receipts on first use."""
+        if self.ledger_path.exists():
+            return
+        self.receipts_dir.mkdir(parents=True, exist_ok=True)
+        legacy: List[Dict] = []
+        for p in sorted(self.receipts_dir.glob("*.json")):
+            try:
+                data = json.loads(p.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            if isinstance(data, list):
+                legacy.extend(data)
+        self._write(legacy, mode="w")
+
+    def append(self, receipts: Iterable[Dict]) -> None:
+        self.ensure()
+        self._write(receipts, mode="a")
+
+    def _write(self, receipts: Iterable[Dict], mode: str) -> None:
+        lines = [json.dumps(r, ensure_ascii=False) + "\n" for r in receipts if isinstance(r, dict) and r.get("output")]
+        with self.ledger_path.open(mode, encoding="utf-8") as f:
+            f.write("".join(lines))
+
+    def _connect(self) -> sqlite3.Connection:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(str(self.index_path))
+        con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS sources (sha256 TEXT PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS outputs (sha256 TEXT PRIMARY KEY) WITHOUT ROWID;
+            """
+        )
+        return con
+
+    def sync(self) -> Dict[str, int]:
+        """Index receipts appended since the last sync; return running totals."""
+        self.ensure()
+        con = self._connect()
+        try:
+            meta = dict(con.execute("SELECT key, value FROM meta").fetchall())
+            offset = int(meta.get("offset", 0))
+            count = int(meta.get("count", 0))
+            dupes = int(meta.get("duplicate_sources", 0))
+
+            if self.ledger_path.stat().st_size < offset:
+                # Ledger was replaced or truncated: rebuild the index from scratch.
+                con.execute("DELETE FROM sources")
+                con.execute("DELETE FROM outputs")
+                offset = count = dupes = 0
+
+            new = 0
+            for _, end, raw in jsonl_reader.iter_lines(self.ledger_path, offset):
+                if not raw.endswith(b"\n"):
+                    break  # partial trailing line; pick it up next time
+                offset = end
+                try:
+                    r = jsonl_reader.loads(raw)
+                except Exception:
+                    continue
+                if not isinstance(r, dict) or not r.get("output"):
+                    continue
+                new += 1
+                sh = (r.get("source") or {}).get("sha256")
+                oh = (r.get("output") or {}).get("sha256")
+                if sh:
+                    if con.execute("INSERT OR IGNORE INTO sources VALUES (?)", (sh,)).rowcount == 0:
+                        dupes += 1
+                if oh:
+                    con.execute("INSERT OR IGNORE INTO outputs VALUES (?)", (oh,))
+
+            count += new
+            con.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [("offset", offset), ("count", count), ("duplicate_sources", dupes)],
+            )
+            con.commit()
+        finally:
+            con.close()
+        return {"count": count, "duplicate_sources": dupes, "new": new}
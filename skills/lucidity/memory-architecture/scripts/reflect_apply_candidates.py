@@ -45,6 +45,7 @@ from pathlib import Path
 from typing import Any, Dict, List
 
 from staging_sanitizer import sanitize_evidence_quote
+from staging_writer import StagingWriter
 
 
 def sha256_text(s: str) -> str:
@@ -55,49 +56,18 @@ def now_z() -> str:
     return dt.datetime.now(dt.UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
-def read_text(p: Path) -> str:
-    return p.read_text(encoding="utf-8")
-
-
 def write_text(p: Path, s: str) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(s, encoding="utf-8")
 
 
-def split_sections(md: str) -> Dict[str, str]:
-    """Map H2 heading -> body."""
-    parts = re.split(r"^##\s+", md, flags=re.M)
-    out: Dict[str, str] = {}
-    if len(parts) <= 1:
-        return out
-    for p in parts[1:]:
-        lines = p.splitlines()
-        heading = lines[0].strip() if lines else ""
-        body = "\n".join(lines[1:]).strip()
-        if heading:
-            out[heading] = body
-    return out
-
-
-def append_topic_candidate(workspace: Path, topic: str, content: str) -> str:
-    staging = workspace / "memory" / "staging" / "topics"
-    out = staging / f"{topic}.md"
-    if out.exists():
-        prev = read_text(out)
-    else:
-        prev = f"# Topic Candidate: {topic}\n\n(Generated; review before promoting to memory/topics/)\n\n"
-    write_text(out, prev + content)
-    return str(out.relative_to(workspace))
-
-
-def append_memory_candidates(workspace: Path, content: str) -> str:
-    out = workspace / "memory" / "staging" / "MEMORY.candidates.md"
-    if out.exists():
-        prev = read_text(out)
-    else:
-        prev = "# MEMORY.md Candidates\n\n(Generated; review before promoting to MEMORY.md)\n\n"
-    write_text(out, prev + content)
-    return str(out.relative_to(workspace))
+def sha256_text_file(p: Path) -> str:
+    """sha256_text(p.read_text()) (newlines normalized to \\n), read in chunks."""
+    h = hashlib.sha256()
+    with p.open("r", encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), ""):
+            h.update(chunk.encode("utf-8"))
+    return h.hexdigest()
 
 
 def main() -> None:
@@ -121,8 +91,6 @@ def main() -> None:
     if not src_path.exists():
         raise SystemExit(f"source daily log not found: {src_path}")
 
-    headings = split_sections(read_text(src_path))
-
     receipts_dir = ws / "memory" / "staging" / "reflect" / "receipts"
     receipts_dir.mkdir(parents=True, exist_ok=True)
 
@@ -132,12 +100,14 @@ def main() -> None:
         "day": day,
         "source": {
             "path": str(src_path.relative_to(ws)),
-            "sha256": sha256_text(read_text(src_path)),
+            "sha256": sha256_text_file(src_path),
         },
         "outputs": [],
         "candidates": [],
     }
 
+    writer = StagingWriter(ws / "memory" / "staging")
+
     for c in payload.get("candidates", []):
         kind = (c.get("kind") or "").lower()
         title = (c.get("title") or "").strip() or "(untitled)"
@@ -161,6 +131,7 @@ def main() -> None:
                 # Extractive-first: require a concrete excerpt
                 continue
             q = sanitize_evidence_quote(quote_raw)
+            quote_md = q.text.replace("\n", "\n  ")
 
             block = (
                 f"\n## Semantic candidate: {title}\n\n"
@@ -169,11 +140,11 @@ def main() -> None:
                 f"- scope: project\n"
                 f"- statement: {stmt}\n"
                 f"- evidence:\n{ev_lines}\n"
-                f"- evidence_quote: |\n  {q.text.replace('\n', '\n  ')}\n"
+                f"- evidence_quote: |\n  {quote_md}\n"
                 f"- evidence_sanitized: true\n"
                 f"- generated_at: {run_ts}\n\n"
             )
-            out_path = append_memory_candidates(ws, block)
+            out_path = str(writer.add_memory(block).relative_to(ws))
             receipt["outputs"].append(out_path)
             receipt["candidates"].append(
                 {
@@ -213,6 +184,7 @@ def main() -> None:
             if not quote_raw:
                 continue
             q = sanitize_evidence_quote(quote_raw)
+            quote_md = q.text.replace("\n", "\n  ")
 
             block = (
                 f"\n## Procedure (candidate): {title}\n\n"
@@ -221,13 +193,13 @@ def main() -> None:
                 f"- trigger: {trig}\n"
                 f"- guardrails:\n{guard_md}\n"
                 f"- verification: {verification}\n"
-                f"- evidence_quote: |\n  {q.text.replace('\n', '\n  ')}\n"
+                f"- evidence_quote: |\n  {quote_md}\n"
                 f"- evidence_sanitized: true\n"
                 f"- generated_at: {run_ts}\n\n"
                 f"Steps:\n{steps_md}\n\n"
             )
 
-            out_path = append_topic_candidate(ws, topic, block)
+            out_path = str(writer.add_topic(topic, block).relative_to(ws))
             receipt["outputs"].append(out_path)
             receipt["candidates"].append(
                 {
@@ -243,6 +215,8 @@ def main() -> None:
                 }
             )
 
+    writer.flush()
+
     receipt_path = receipts_dir / f"{day}.json"
     write_text(receipt_path, json.dumps(receipt, indent=2) + "\n")
 
@@ -50,7 +50,11 @@ def sanitize_file(p: Path) -> tuple[bool, int, int, bool]:
 
     out = QUOTE_BLOCK_RE.sub(repl, txt)
     if changed:
-        p.write_text(out, encoding="utf-8")
+        # Replace the file instead of rewriting it in place, so incremental dedupe
+        # (dedupe_index.py) sees a new file rather than a grown one.
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_text(out, encoding="utf-8")
+        tmp.replace(p)
     return changed, redacted_lines, redacted_secrets, truncated_any
 
 
@@ -0,0 +1,160 @@
+"""Persistent set of session events already written to a staging extract.
+
+distill_sessions keys each event by a hash of (source file, timestamp, role,
+sha256 of the text) and stores the key with the tag (day) of the extract it
+went to, in `memory/staging/index/seen_events.sqlite`. Later extracts drop
+events staged under a different tag, so overlapping `--since-days` windows do
+not stage the same events again; re-extracting the same tag keeps its own
+events, because that run rewrites the tag's file.
+
+A Bloom filter, saved in the same database, answers "never seen" for new
+events without a lookup; only its (rare false and real) hits query the table.
+
+SeenView is a read-only, picklable view of the same database for scanner
+processes, so suppression can happen before the per-file --max-events cap.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+KEY_BYTES = 16
+BLOOM_HASHES = 7
+BLOOM_BITS_PER_KEY = 10  # ~1% false positives with 7 hashes
+BLOOM_MIN_KEYS = 1 << 16
+
+
+def event_key(ev: Dict[str, Any]) -> bytes:
+    """Stable 16-byte key for an extracted event."""
+    text_hash = hashlib.sha256(str(ev.get("text") or "").encode("utf-8", "surrogatepass")).digest()
+    h = hashlib.sha256()
+    for part in (ev.get("sourceFile"), ev.get("timestamp"), ev.get("role")):
+        h.update(str(part or "").encode("utf-8", "surrogatepass") + b"\0")
+    h.update(text_hash)
+    return h.digest()[:KEY_BYTES]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over event keys (double hashing on the key bytes)."""
+
+    def __init__(self, capacity: int, bits: bytes = b"") -> None:
+        self.capacity = max(capacity, BLOOM_MIN_KEYS)
+        self.nbits = self.capacity * BLOOM_BITS_PER_KEY
+        self.bits = bytearray(bits) if len(bits) * 8 >= self.nbits else bytearray((self.nbits + 7) // 8)
+
+    def _positions(self, key: bytes) -> Iterable[int]:
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        return ((h1 + i * h2) % self.nbits for i in range(BLOOM_HASHES))
+
+    def add(self, key: bytes) -> None:
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+def staged_elsewhere(con: sqlite3.Connection, bloom: BloomFilter, key: bytes, tag: str) -> bool:
+    """True if `key` was staged under a tag other than `tag`."""
+    if key not in bloom:
+        return False
+    row = con.execute("SELECT tag FROM events WHERE key = ?", (key,)).fetchone()
+    return row is not None and row[0] != tag
+
+
+class SeenView:
+    """Read-only view of a seen-event database, as saved when the view is first used.
+
+    Pickles as its path; each process opens the database on its first lookup.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._con: Optional[sqlite3.Connection] = None
+        self._bloom: Optional[BloomFilter] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self.path}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["path"])
+
+    def suppressed(self, ev: Dict[str, Any], tag: str) -> bool:
+        """True if `ev` was already staged under another tag."""
+        if self._con is None:
+            self._con = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            meta = dict(self._con.execute("SELECT key, value FROM meta"))
+            self._bloom = BloomFilter(int(meta.get("bloom_capacity", 0)), meta.get("bloom", b""))
+        return staged_elsewhere(self._con, self._bloom, event_key(ev), tag)
+
+
+class SeenEvents:
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.con = sqlite3.connect(str(path))
+        self.con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS events (key BLOB PRIMARY KEY, tag TEXT NOT NULL) WITHOUT ROWID;
+            """
+        )
+        meta = dict(self.con.execute("SELECT key, value FROM meta"))
+        self.count = int(meta.get("count", 0))
+        self.bloom = BloomFilter(int(meta.get("bloom_capacity", 0)), meta.get("bloom", b""))
+        if "bloom" not in meta:
+            self.count = self.con.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            if self.count:
+                self._rebuild()
+
+    def filter(self, events: Iterable[Dict[str, Any]], tag: str) -> Tuple[List[Dict[str, Any]], int]:
+        """Events not yet staged under another tag, and how many were dropped."""
+        kept: List[Dict[str, Any]] = []
+        suppressed = 0
+        for ev in events:
+            if staged_elsewhere(self.con, self.bloom, event_key(ev), tag):
+                suppressed += 1
+                continue
+            kept.append(ev)
+        return kept, suppressed
+
+    def view(self) -> SeenView:
+        """Read-only view of the saved set, for scanner processes."""
+        return SeenView(self.path)
+
+    def add(self, events: Iterable[Dict[str, Any]], tag: str) -> None:
+        """Record events as staged under `tag`; events already recorded keep their first tag."""
+        self.add_keys([event_key(ev) for ev in events], tag)
+
+    def add_keys(self, keys: List[bytes], tag: str) -> None:
+        """`add` for events whose keys were collected as they were written."""
+        before = self.con.total_changes
+        self.con.executemany("INSERT OR IGNORE INTO events (key, tag) VALUES (?, ?)", ((k, tag) for k in keys))
+        self.count += self.con.total_changes - before
+        if self.count > self.bloom.capacity:
+            self._rebuild()
+        else:
+            for k in keys:
+                self.bloom.add(k)
+        self._save()
+
+    def _rebuild(self) -> None:
+        # Grown past the filter's sizing: re-size for twice the keys and re-add them.
+        self.bloom = BloomFilter(2 * self.count)
+        for (k,) in self.con.execute("SELECT key FROM events"):
+            self.bloom.add(k)
+        self._save()
+
+    def _save(self) -> None:
+        self.con.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("count", self.count), ("bloom_capacity", self.bloom.capacity), ("bloom", bytes(self.bloom.bits))],
+        )
+        self.con.commit()
+
+    def close(self) -> None:
+        self.con.close()
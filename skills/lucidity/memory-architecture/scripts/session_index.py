@@ -0,0 +1,193 @@
+"""Per-file scan checkpoints and timestamp ranges for session transcripts.
+
+Stored at `memory/staging/index/sessions.json`:
+
+{
+  "version": 2,
+  "files": {
+    "/abs/path/session.jsonl": {
+      "inode": 1234, "size": 98765, "mtime_ns": 1767225600000000000,
+      "offset": 98765, "lines": 412,
+      "min_ts": 1767139000.0, "max_ts": 1767225600.0,
+      "head": "<sha256 of the first bytes>",
+      "marks": [[40960, 1767139200.0, 170], ...]
+    }
+  }
+}
+
+`offset` is the end of the last complete line scanned; `lines`, `min_ts` and
+`max_ts` (epoch seconds) describe `[0, offset)`. `marks` are earlier
+`[offset, max_ts, lines]` points, recorded whenever the running maximum moves to
+a new UTC day, so a run whose window starts mid-file can still skip whole days.
+
+A prefix may be skipped only when none of its events can be in the window:
+all of them are before `since` (`max_ts`) or at/after `until` (`min_ts`). An
+unchanged, fully indexed file (same inode, size and mtime) whose range misses
+the window is skipped from `stat()` alone, without being opened.
+
+A checkpoint is dropped when the file was rotated (inode changed), truncated
+(size below `offset`) or rewritten in place (the first bytes changed).
+
+Compressed archives (`"compressed": true`; `.jsonl.gz`/`.jsonl.zst`) keep only
+the timestamp range and line count: offsets count decompressed bytes, so they
+are never resumed mid-stream. An unchanged archive whose range misses the
+window is skipped without being decompressed; any other run reads it whole,
+and a changed archive is treated as new.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+VERSION = 2
+HEAD_BYTES = 4096
+
+
+def head_digest(fp: Path, n: int) -> str:
+    with fp.open("rb") as f:
+        return hashlib.sha256(f.read(min(n, HEAD_BYTES))).hexdigest()
+
+
+def utc_day(ts: float) -> int:
+    return int(ts // 86400)
+
+
+class ScanProgress:
+    """Tracks offset, line count, timestamp range and day marks while a file is scanned."""
+
+    def __init__(
+        self,
+        offset: int = 0,
+        lines: int = 0,
+        min_ts: Optional[float] = None,
+        max_ts: Optional[float] = None,
+        marks: Optional[List[List[float]]] = None,
+    ) -> None:
+        self.offset = offset
+        self.lines = lines
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.marks: List[List[float]] = marks or []
+
+    def advance(self, line_start: int, line_end: int, ts: Optional[float]) -> None:
+        if ts is not None:
+            if self.max_ts is None or ts > self.max_ts:
+                if self.max_ts is not None and utc_day(ts) != utc_day(self.max_ts):
+                    self.marks.append([line_start, self.max_ts, self.lines])
+                self.max_ts = ts
+            if self.min_ts is None or ts < self.min_ts:
+                self.min_ts = ts
+        self.lines += 1
+        self.offset = line_end
+
+
+@dataclass
+class Checkpoint:
+    inode: int
+    size: int
+    mtime_ns: int = 0
+    offset: int = 0
+    lines: int = 0
+    min_ts: Optional[float] = None
+    max_ts: Optional[float] = None
+    head: str = ""
+    marks: List[List[float]] = field(default_factory=list)
+    compressed: bool = False
+
+    def unchanged(self, st: os.stat_result) -> bool:
+        return st.st_ino == self.inode and st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+
+    def complete(self, st: os.stat_result) -> bool:
+        """True if the file is unchanged and every line of it is indexed."""
+        return self.unchanged(st) and (self.compressed or self.offset == self.size)
+
+    def outside(self, since: Optional[dt.datetime], until: Optional[dt.datetime]) -> bool:
+        """True if no event in `[0, offset)` can fall in `[since, until)`."""
+        if self.max_ts is None:
+            return True
+        if since is not None and self.max_ts < since.timestamp():
+            return True
+        return until is not None and self.min_ts is not None and self.min_ts >= until.timestamp()
+
+    def resume(self, since: Optional[dt.datetime], until: Optional[dt.datetime]) -> ScanProgress:
+        """Progress to continue from: the furthest indexed point whose prefix misses the window."""
+        if self.outside(since, until):
+            return ScanProgress(self.offset, self.lines, self.min_ts, self.max_ts, [list(m) for m in self.marks])
+        if since is None or self.compressed:
+            return ScanProgress()
+        cutoff = since.timestamp()
+        best = None
+        for i, (_, max_ts, _) in enumerate(self.marks):
+            if max_ts < cutoff:
+                best = i
+        if best is None:
+            return ScanProgress()
+        offset, max_ts, lines = self.marks[best]
+        # The rescan covers [offset, self.offset) again, so the full prefix minimum stays valid.
+        return ScanProgress(int(offset), int(lines), self.min_ts, max_ts, [list(m) for m in self.marks[:best]])
+
+
+class SessionIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                data = None
+            if isinstance(data, dict) and data.get("version") == VERSION and isinstance(data.get("files"), dict):
+                self.files = data["files"]
+
+    @staticmethod
+    def key(fp: Path) -> str:
+        return str(fp.resolve())
+
+    def checkpoint(self, fp: Path, st: Optional[os.stat_result] = None) -> Optional[Checkpoint]:
+        """Return the file's checkpoint if it still describes this file, else None."""
+        raw = self.files.get(self.key(fp))
+        if not isinstance(raw, dict):
+            return None
+        try:
+            cp = Checkpoint(**raw)
+            st = st or fp.stat()
+        except (TypeError, OSError):
+            return None
+        if cp.unchanged(st):
+            return cp
+        if cp.compressed:
+            return None  # offsets are into the decompressed stream; start over
+        if st.st_ino != cp.inode or st.st_size < cp.offset:
+            return None  # rotated or truncated
+        if cp.offset and head_digest(fp, cp.offset) != cp.head:
+            return None  # rewritten in place
+        return cp
+
+    def record(self, fp: Path, progress: ScanProgress, compressed: bool = False) -> None:
+        # Stat after the scan: if the file grew meanwhile, size > offset and the tail is read next time.
+        st = fp.stat()
+        cp = Checkpoint(
+            inode=st.st_ino,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            offset=progress.offset,
+            lines=progress.lines,
+            min_ts=progress.min_ts,
+            max_ts=progress.max_ts,
+            head=head_digest(fp, progress.offset) if progress.offset and not compressed else "",
+            marks=[] if compressed else progress.marks,
+            compressed=compressed,
+        )
+        self.files[self.key(fp)] = asdict(cp)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": VERSION, "files": self.files}, indent=2) + "\n", encoding="utf-8")
+        tmp.replace(self.path)
@@ -0,0 +1,75 @@
+"""Buffered staging writer shared by distill and reflect.
+
+Collects every candidate block for a run in memory and flushes each staging
+target exactly once:
+- existing targets get a single O(new bytes) append
+- new targets are created with header + blocks via temp file + rename
+
+This replaces per-block read-modify-write appends, which were quadratic in the
+size of `memory/staging/topics/<topic>.md` and `MEMORY.candidates.md`.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List
+
+
+def topic_header(topic: str) -> str:
+    return f"# Topic Candidate: {topic}\n\n(Generated; review before promoting to memory/topics/)\n\n"
+
+
+MEMORY_CANDIDATES_HEADER = "# MEMORY.md Candidates\n\n(Generated; review before promoting to MEMORY.md)\n\n"
+
+
+def atomic_write_text(path: Path, s: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(s)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class StagingWriter:
+    """Accumulate staging blocks per target and write them in one pass."""
+
+    def __init__(self, staging_dir: Path) -> None:
+        self.staging_dir = staging_dir
+        self._pending: Dict[Path, List[str]] = {}
+        self._headers: Dict[Path, str] = {}
+
+    def topic_path(self, topic: str) -> Path:
+        return self.staging_dir / "topics" / f"{topic}.md"
+
+    def memory_path(self) -> Path:
+        return self.staging_dir / "MEMORY.candidates.md"
+
+    def add(self, path: Path, header: str, content: str) -> Path:
+        self._pending.setdefault(path, []).append(content)
+        self._headers.setdefault(path, header)
+        return path
+
+    def add_topic(self, topic: str, content: str) -> Path:
+        return self.add(self.topic_path(topic), topic_header(topic), content)
+
+    def add_memory(self, content: str) -> Path:
+        return self.add(self.memory_path(), MEMORY_CANDIDATES_HEADER, content)
+
+    def flush(self) -> Dict[Path, int]:
+        """Write all pending blocks; return bytes written per target."""
+        written: Dict[Path, int] = {}
+        for path, chunks in self._pending.items():
+            data = "".join(chunks)
+            if path.exists():
+                with path.open("a", encoding="utf-8") as f:
+                    f.write(data)
+            else:
+                data = self._headers[path] + data
+                atomic_write_text(path, data)
+            written[path] = len(data.encode("utf-8"))
+        self._pending.clear()
+        self._headers.clear()
+        return written
@@ -9,8 +9,12 @@ from __future__ import annotations
 
 import json
 import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
 
 
 def append_jsonl(path: Path, obj: Dict[str, Any]) -> None:
@@ -23,3 +27,68 @@ def append_jsonl(path: Path, obj: Dict[str, Any]) -> None:
 def env_session_key() -> str | None:
     # Best-effort. Cron/agent runs may not expose this.
     return os.environ.get("OPENCLAW_SESSION_KEY")
+
+
+def cpu_seconds() -> float:
+    """User + system CPU time of this process and its reaped children (e.g. worker pools)."""
+    t = os.times()
+    # process_time() is high-resolution; os.times() only adds the children.
+    return time.process_time() + t.children_user + t.children_system
+
+
+class StageMetrics:
+    """Wall/CPU time, byte and block counters, and per-phase timings for one pipeline stage.
+
+    Phase times are summed, so phases measured in worker processes can add up to
+    more than the stage's wall time.
+    """
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.blocks = 0
+        self.phases: Dict[str, float] = {}
+        self._wall0 = time.perf_counter()
+        self._cpu0 = cpu_seconds()
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def merge(self, phases: Dict[str, float]) -> None:
+        for name, seconds in phases.items():
+            self.add_phase(name, seconds)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - t)
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from `items`, charging the time spent producing each item to `name`."""
+        it = iter(items)
+        while True:
+            t = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add_phase(name, time.perf_counter() - t)
+                return
+            self.add_phase(name, time.perf_counter() - t)
+            yield item
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self._wall0
+        return {
+            "stage": self.stage,
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu_seconds() - self._cpu0, 6),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "blocks": self.blocks,
+            "blocks_per_s": round(self.blocks / wall, 1) if wall > 0 else None,
+            "phases_s": {k: round(v, 6) for k, v in sorted(self.phases.items())},
+        }
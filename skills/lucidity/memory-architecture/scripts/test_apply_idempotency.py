@@ -49,9 +49,10 @@ def main() -> None:
         (ws / "memory" / "topics").mkdir(parents=True, exist_ok=True)
         (ws / "state").mkdir(parents=True, exist_ok=True)
 
-        # Copy apply + telemetry helper into temp workspace
+        # Copy apply + its helper modules into temp workspace
         shutil.copy2(APPLY, ws / "memory-architecture" / "scripts" / "apply_staging.py")
-        shutil.copy2(WORKSPACE / "memory-architecture" / "scripts" / "telemetry.py", ws / "memory-architecture" / "scripts" / "telemetry.py")
+        for helper in ("telemetry.py", "md_blocks.py", "canonical_index.py"):
+            shutil.copy2(WORKSPACE / "memory-architecture" / "scripts" / helper, ws / "memory-architecture" / "scripts" / helper)
         shutil.copy2(CFG, ws / "memory-architecture" / "config" / "auto-merge.json")
 
         demo = ws / "memory" / "staging" / "deduped" / "topics" / "demo.md"
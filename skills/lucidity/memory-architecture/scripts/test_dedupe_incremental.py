@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Regression test: incremental dedupe matches a from-scratch rebuild.
+
+Simulates nightly runs that append blocks to staging files (exact and
+(type, heading) duplicates of earlier nights and copies of blocks kept in
+earlier files included) and checks after each run that the deduped outputs and
+per-file stats equal a `--full` rebuild, that unchanged prefixes are not read
+again, and that files rewritten in place, extended without a new heading,
+whose deduped output was removed, or whose kept block is now kept by an
+earlier file are rebuilt. Runs alternate between serial and `--jobs` (files read
+and parsed in a process pool), and the full rebuilds use `--jobs`.
+
+Usage:
+  python3 memory-architecture/scripts/test_dedupe_incremental.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve()
+DEDUPE = HERE.parent / "dedupe_staging.py"
+
+
+def block(rng: random.Random, night: int, name: str) -> str:
+    kind = rng.choice(["procedural", "episodic", "semantic"])
+    title = f"{name} topic {rng.randrange(30)}"
+    body = f"- summary: item {rng.randrange(40)}" + ("  \n\n\n" if rng.random() < 0.2 else "\n")
+    return f"\n## Candidate: {title}\n\n- type: {kind}\n{body}- night: {night % 2}\n"
+
+
+def run(ws: Path, *extra: str) -> dict:
+    subprocess.run(
+        ["python3", str(DEDUPE), "--workspace", str(ws), "--write", *extra],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return json.loads((ws / "memory" / "staging" / "reports" / "dedupe-report.json").read_text(encoding="utf-8"))
+
+
+def outputs(ws: Path) -> dict:
+    deduped = ws / "memory" / "staging" / "deduped"
+    return {str(p.relative_to(deduped)): p.read_bytes() for p in sorted(deduped.rglob("*.md"))}
+
+
+def check(ws: Path, label: str, expect_rebuilt: int = 0, jobs: int = 1) -> dict:
+    report = run(ws, "--jobs", str(jobs))
+    fresh = ws.parent / "fresh"
+    shutil.rmtree(fresh, ignore_errors=True)
+    shutil.copytree(ws / "memory" / "staging", fresh / "memory" / "staging", ignore=shutil.ignore_patterns("deduped", "index"))
+    expected = run(fresh, "--full", "--jobs", "3")
+    expected_out = outputs(fresh)
+    if {k: outputs(ws).get(k) for k in expected_out} != expected_out:
+        raise SystemExit(f"FAIL: {label}: incremental outputs differ from a full rebuild")
+    if report["files"] != {k: v for k, v in expected["files"].items()}:
+        raise SystemExit(f"FAIL: {label}: incremental stats differ from a full rebuild")
+    if report["incremental"]["files_rebuilt"] != expect_rebuilt:
+        raise SystemExit(f"FAIL: {label}: expected {expect_rebuilt} rebuilt files, got {report['incremental']}")
+    return report
+
+
+def main() -> None:
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / "workspace"
+        staging = ws / "memory" / "staging"
+        (staging / "topics").mkdir(parents=True)
+        files = [staging / "topics" / f"t{i}.md" for i in range(3)] + [staging / "MEMORY.candidates.md"]
+        for fp in files:
+            fp.write_text(f"# Staging: {fp.stem}\n", encoding="utf-8")
+
+        report = run(ws)
+        history: list = [[] for _ in files]  # blocks staged in earlier nights, per file
+        copied_from: set = set()  # (source file, copying file)
+        for night in range(6):
+            staged = []
+            for i, fp in enumerate(files):
+                blocks = [block(rng, night, fp.stem) for _ in range(40)]
+                for j in range(i):
+                    if history[j]:
+                        # Copies of blocks an earlier file keeps: dropped here as cross-file duplicates.
+                        blocks.insert(rng.randrange(len(blocks)), rng.choice(history[j]))
+                        copied_from.add((j, i))
+                with fp.open("a", encoding="utf-8") as f:
+                    f.write("".join(blocks))
+                staged.append(blocks)
+            report = check(ws, f"night {night}", jobs=1 + 2 * (night % 2))
+            if night and report["cross_file"]["dropped"] < len(files) - 1:
+                raise SystemExit(f"FAIL: night {night}: cross-file copies were not dropped: {report['cross_file']}")
+            for i, blocks in enumerate(staged):
+                history[i].extend(blocks)
+        total = sum(fp.stat().st_size for fp in files)
+        if report["metrics"]["bytes_read"] > total // 3:
+            raise SystemExit(f"FAIL: incremental run read {report['metrics']['bytes_read']} of {total} bytes")
+
+        # A block kept by a later file is staged in an earlier one: it moves there.
+        moved = block(rng, 6, "moved")
+        with files[2].open("a", encoding="utf-8") as f:
+            f.write(moved)
+        check(ws, "new block in a later file")
+        with files[0].open("a", encoding="utf-8") as f:
+            f.write(moved)
+        # With --jobs, t2 was read from its watermark before t0 made it a rebuild.
+        report = check(ws, "same block in an earlier file", expect_rebuilt=1, jobs=3)
+        drops = [(d["path"], d["kept_in"]) for d in report["cross_file"]["blocks"] if "moved" in d["heading"]]
+        if drops != [(str(files[2].relative_to(ws)), str(files[0].relative_to(ws)))]:
+            raise SystemExit(f"FAIL: expected the later file's copy to be dropped, got {drops}")
+
+        # Text appended without a heading extends the last block (the moved one): that file is
+        # rebuilt, and so is t2, which dropped a copy of the block as it was.
+        with files[0].open("a", encoding="utf-8") as f:
+            f.write("continued without a heading\n")
+        check(ws, "extended last block", expect_rebuilt=2)
+
+        # Rewritten in place near the start (same size), replaced by rename, missing output.
+        text = files[1].read_text(encoding="utf-8")
+        files[1].write_text(text.replace("# Staging: t1", "# Staging: T1", 1), encoding="utf-8")
+        tmp = files[2].with_suffix(".tmp")
+        tmp.write_text(files[2].read_text(encoding="utf-8").replace("item 2\n", "item 8\n", 1), encoding="utf-8")
+        os.replace(tmp, files[2])
+        (staging / "deduped" / "MEMORY.candidates.md").unlink()
+        check(ws, "rewritten files and missing output", expect_rebuilt=3)
+
+        # CRLF appends read like universal newlines.
+        with files[2].open("ab") as f:
+            f.write(block(rng, 7, files[2].stem).replace("\n", "\r\n").encode("utf-8"))
+        check(ws, "CRLF append")
+
+        # Files that dropped copies of the removed file's blocks keep them now.
+        files[2].unlink()
+        check(ws, "removed staging file", expect_rebuilt=int((2, 3) in copied_from))
+
+    print("PASS: dedupe_staging incremental")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Regression test: dedupe_staging leaves already-promoted blocks out of its outputs.
+
+Checks that:
+- staged blocks whose canonical_key is already in memory/topics/*.md or
+  MEMORY.md (any generated_at) are not written to the deduped outputs
+- after apply_staging promotes blocks, the next incremental dedupe removes
+  them from the outputs without re-reading canonical memory, and matches a
+  `--full` rebuild
+- a block removed from canonical memory by hand is staged again
+
+Usage:
+  python3 memory-architecture/scripts/test_dedupe_promoted.py
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve()
+DEDUPE = HERE.parent / "dedupe_staging.py"
+APPLY = HERE.parent / "apply_staging.py"
+
+
+def procedure(heading: str, generated_at: str = "2090-01-01T00:00:00Z", verified: bool = True) -> str:
+    verification = "- verification: the health endpoint returns ok\n" if verified else ""
+    return (
+        f"\n## Procedure (candidate): {heading}\n\n- type: procedural\n- source: memory/2090-01-01.md#{heading}\n"
+        f"- trigger: when you need to {heading.lower()}\n{verification}- generated_at: {generated_at}\n\n"
+        f"1) Step one of {heading}\n2) Step two of {heading}\n"
+    )
+
+
+def dedupe(ws: Path, *extra: str) -> dict:
+    subprocess.run(
+        ["python3", str(DEDUPE), "--workspace", str(ws), "--write", *extra], check=True, stdout=subprocess.DEVNULL
+    )
+    return json.loads((ws / "memory" / "staging" / "reports" / "dedupe-report.json").read_text(encoding="utf-8"))
+
+
+def outputs(ws: Path) -> dict:
+    deduped = ws / "memory" / "staging" / "deduped"
+    return {str(p.relative_to(deduped)): p.read_bytes() for p in sorted(deduped.rglob("*.md"))}
+
+
+def check_full(ws: Path, report: dict, label: str) -> None:
+    fresh = ws.parent / "fresh"
+    shutil.rmtree(fresh, ignore_errors=True)
+    shutil.copytree(ws / "memory" / "staging", fresh / "memory" / "staging", ignore=shutil.ignore_patterns("deduped", "index"))
+    shutil.copytree(ws / "memory" / "topics", fresh / "memory" / "topics")
+    shutil.copy2(ws / "MEMORY.md", fresh / "MEMORY.md")
+    expected = dedupe(fresh, "--full")
+    if outputs(ws) != outputs(fresh) or report["files"] != expected["files"]:
+        raise SystemExit(f"FAIL: {label}: incremental outputs differ from a full rebuild")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / "workspace"
+        staging = ws / "memory" / "staging"
+        (staging / "topics").mkdir(parents=True)
+        (ws / "memory" / "topics").mkdir(parents=True)
+        (ws / "memory" / "topics" / "ops.md").write_text(
+            "# Ops\n" + procedure("Restart the gateway", "2089-12-31T00:00:00Z"), encoding="utf-8"
+        )
+        (ws / "MEMORY.md").write_text("# MEMORY\n" + procedure("Rotate the logs"), encoding="utf-8")
+        (staging / "topics" / "ops.md").write_text(
+            "# Staged: ops\n" + procedure("Restart the gateway") + procedure("Drain the queue"), encoding="utf-8"
+        )
+        (staging / "topics" / "tools.md").write_text(
+            "# Staged: tools\n" + procedure("Rotate the logs") + procedure("Pin the toolchain", verified=False),
+            encoding="utf-8",
+        )
+
+        report = dedupe(ws)
+        out = outputs(ws)
+        if b"Restart the gateway" in out["topics/ops.md"] or b"Rotate the logs" in out["topics/tools.md"]:
+            raise SystemExit("FAIL: blocks already in canonical memory reached the deduped outputs")
+        if report["canonical"]["blocks_dropped"] != 2 or b"Drain the queue" not in out["topics/ops.md"]:
+            raise SystemExit(f"FAIL: expected exactly the two promoted blocks to be dropped: {report['canonical']}")
+
+        # apply promotes "Drain the queue" (the unverified procedure is skipped) and records its key.
+        subprocess.run(["python3", str(APPLY), "--workspace", str(ws), "--write"], check=True, stdout=subprocess.DEVNULL)
+        with (staging / "topics" / "tools.md").open("a", encoding="utf-8") as f:
+            f.write(procedure("Prune old sessions"))
+        report = dedupe(ws)
+        if report["canonical"]["files_reindexed"] or report["incremental"]["files_rebuilt"]:
+            raise SystemExit(f"FAIL: canonical memory re-read after apply: {report['canonical']} {report['incremental']}")
+        if b"Drain the queue" in outputs(ws)["topics/ops.md"]:
+            raise SystemExit("FAIL: a block promoted by apply stayed in the deduped output")
+        check_full(ws, report, "after apply")
+
+        # A block deleted from canonical memory by hand comes back.
+        memory = ws / "MEMORY.md"
+        memory.write_text("# MEMORY\n", encoding="utf-8")
+        report = dedupe(ws)
+        if report["canonical"]["files_reindexed"] != 1 or b"Rotate the logs" not in outputs(ws)["topics/tools.md"]:
+            raise SystemExit(f"FAIL: a block removed from MEMORY.md was not staged again: {report['canonical']}")
+        check_full(ws, report, "after a hand edit")
+
+    print("PASS: dedupe_staging promoted-block filter")
+
+
+if __name__ == "__main__":
+    main()
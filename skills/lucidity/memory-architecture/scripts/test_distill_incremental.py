@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Regression test: distill_daily only re-distills new or changed sections.
+
+Creates a temporary workspace with a daily log, distills it, appends a new H2
+section, then distills again and verifies that:
+- a re-run resumes at the last section of the previous run: it reads only
+  that section and the ones appended after it, and records just the
+  unchanged one it re-read as skipped
+- only the new section produces new staging blocks
+- the receipt ledger holds each output receipt exactly once
+- the day's receipt keeps the "run" metrics entry of every run over the log,
+  and appending to it leaves the same bytes as dumping the whole list
+- lines appended to the last section replace its hash in the section index
+- after a section is edited and another removed, the log is rescanned and
+  the section index keeps only the hashes of the sections now in the log
+
+Usage:
+  python3 memory-architecture/scripts/test_distill_incremental.py
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve()
+DISTILL = HERE.parent / "distill_daily.py"
+
+
+def run(cmd: list[str]) -> None:
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / "workspace"
+        (ws / "memory").mkdir(parents=True, exist_ok=True)
+        daily = ws / "memory" / "2099-01-01.md"
+        daily.write_text(
+            "# 2099-01-01\n\n"
+            "## Gateway restart\n"
+            "- Restarted the openclaw gateway after config change\n\n"
+            "## Backup policy\n"
+            "- Decision: keep 7 daily backups\n",
+            encoding="utf-8",
+        )
+
+        cmd = ["python3", str(DISTILL), "--workspace", str(ws), "--date", "2099-01-01"]
+        run(cmd)
+
+        topics = ws / "memory" / "staging" / "topics"
+        before = {p.name: p.read_text(encoding="utf-8") for p in topics.glob("*.md")}
+
+        # Re-run on an unchanged log: nothing new may be staged.
+        run(cmd)
+        again = {p.name: p.read_text(encoding="utf-8") for p in topics.glob("*.md")}
+        if again != before:
+            raise SystemExit("FAIL: re-running on an unchanged log staged new blocks")
+
+        with daily.open("a", encoding="utf-8") as f:
+            f.write("\n## Cron cleanup\n- Removed the stale heartbeat cron job\n")
+
+        run(cmd)
+
+        receipt_path = ws / "memory" / "staging" / "receipts" / "2099-01-01.json"
+        receipt = json.loads(receipt_path.read_text(encoding="utf-8"))
+        skipped = [r["source"]["heading"] for r in receipt if r.get("skipped")]
+        if skipped != ["Backup policy", "Backup policy"]:
+            raise SystemExit(f"FAIL: re-runs did not resume at the last section: skipped {skipped}")
+        if receipt_path.read_text(encoding="utf-8") != json.dumps(receipt, indent=2) + "\n":
+            raise SystemExit("FAIL: appended receipt differs from dumping the whole list")
+
+        headings = [r["source"]["heading"] for r in receipt if r.get("output")]
+        if headings.count("Cron cleanup") != 1 or headings.count("Gateway restart") != 1:
+            raise SystemExit(f"FAIL: unexpected output receipts: {headings}")
+
+        staged = "".join(p.read_text(encoding="utf-8") for p in topics.glob("*.md"))
+        if staged.count("Episodic note (candidate): Gateway restart") != 1:
+            raise SystemExit("FAIL: unchanged section was distilled twice")
+        if staged.count("Episodic note (candidate): Cron cleanup") != 1:
+            raise SystemExit("FAIL: appended section was not distilled")
+
+        ledger = (ws / "memory" / "staging" / "receipts" / "ledger.jsonl").read_text(encoding="utf-8").splitlines()
+        ledger_outputs = sorted(json.loads(ln)["output"]["sha256"] for ln in ledger)
+        if ledger_outputs != sorted(r["output"]["sha256"] for r in receipt if r.get("output")):
+            raise SystemExit("FAIL: receipt ledger does not match the output receipts")
+
+        with daily.open("a", encoding="utf-8") as f:
+            f.write("- Decision: prune heartbeat crons weekly\n")
+        run(cmd)
+        index = json.loads((ws / "memory" / "staging" / "index" / "sections.json").read_text(encoding="utf-8"))
+        if [h for h, _ in index["files"]["memory/2099-01-01.md"]].count("Cron cleanup") != 1:
+            raise SystemExit(f"FAIL: the old hash of the extended last section was kept: {index['files']}")
+
+        text = daily.read_text(encoding="utf-8").replace("keep 7 daily backups", "keep 14 daily backups")
+        daily.write_text(text.replace("## Gateway restart\n- Restarted the openclaw gateway after config change\n\n", ""), encoding="utf-8")
+        run(cmd)
+        index = json.loads((ws / "memory" / "staging" / "index" / "sections.json").read_text(encoding="utf-8"))
+        entries = index["files"]["memory/2099-01-01.md"]
+        if sorted(h for h, _ in entries) != ["(preamble)", "Backup policy", "Cron cleanup"] or len(entries) != 3:
+            raise SystemExit(f"FAIL: section index kept stale hashes: {entries}")
+
+        receipt = json.loads(receipt_path.read_text(encoding="utf-8"))
+        runs = [r["run"] for r in receipt if "run" in r]
+        if len(runs) != 5 or [r["distilled"] for r in runs] != [3, 0, 1, 1, 1]:
+            raise SystemExit(f"FAIL: receipt lost earlier run entries: {runs}")
+        if [r["sections"] for r in runs] != [3, 1, 2, 1, 3]:
+            raise SystemExit(f"FAIL: runs did not resume at the stored watermark: {runs}")
+
+        print("PASS: distill_daily incremental")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Regression test: distill_daily watch mode only distills completed sections.
+
+Drives `watch_poll` directly against a temporary workspace:
+- the last section of today's log is held back until another H2 follows it
+- sections are distilled exactly once across polls (byte watermark + index)
+- an in-place rewrite invalidates the watermark and falls back to a rescan
+- once the day has passed, the held-back section is finalized
+- a watch cycle and nightly runs started while another run holds the distill
+  lock wait for it, and together stage each section exactly once
+
+Usage:
+  python3 memory-architecture/scripts/test_distill_watch.py
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import distill_daily as dd
+
+HERE = Path(__file__).resolve()
+DISTILL = HERE.parent / "distill_daily.py"
+TODAY = "2099-01-02"
+
+
+def staged(ws: Path) -> str:
+    return "".join(p.read_text(encoding="utf-8") for p in sorted((ws / "memory" / "staging" / "topics").glob("*.md")))
+
+
+def touch(p: Path, text: str, mode: str = "a") -> None:
+    with p.open(mode, encoding="utf-8") as f:
+        f.write(text)
+    st = p.stat()
+    # Make sure the change is visible even on coarse mtime filesystems.
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def check_concurrent(ws: Path) -> None:
+    (ws / "memory").mkdir(parents=True)
+    dd.configure(ws)
+    dd.ensure_dirs()
+    log = ws / "memory" / f"{TODAY}.md"
+    log.write_text("".join(f"## Gateway note {n}\n- Decision: restart gateway {n} nightly\n\n" for n in range(40)), encoding="utf-8")
+
+    with dd.lock_path().open("a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        nightly = [
+            subprocess.Popen(["python3", str(DISTILL), "--workspace", str(ws), "--date", TODAY], stdout=subprocess.DEVNULL)
+            for _ in range(3)
+        ]
+        poll = threading.Thread(target=dd.watch_poll, args=(dd.WatchState(), TODAY))
+        poll.start()
+        time.sleep(1.0)
+        if any(proc.poll() is not None for proc in nightly) or not poll.is_alive():
+            raise SystemExit("FAIL: a run did not wait for the distill lock")
+        if (ws / "memory" / "staging" / "MEMORY.candidates.md").exists():
+            raise SystemExit("FAIL: a run wrote staging while another held the distill lock")
+        fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    poll.join()
+    if any(proc.wait() for proc in nightly):
+        raise SystemExit("FAIL: a concurrent nightly run failed")
+
+    text = (ws / "memory" / "staging" / "MEMORY.candidates.md").read_text(encoding="utf-8")
+    counts = {n: text.count(f"Semantic candidate: Gateway note {n}\n") for n in range(40)}
+    if set(counts.values()) != {1}:
+        raise SystemExit(f"FAIL: concurrent runs staged sections more than once: {counts}")
+    index = json.loads(dd.section_index_path().read_text(encoding="utf-8"))
+    if len(index["files"][f"memory/{TODAY}.md"]) != 40:
+        raise SystemExit("FAIL: concurrent runs left duplicate section index entries")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / "workspace"
+        (ws / "memory").mkdir(parents=True)
+        dd.configure(ws)
+        dd.ensure_dirs()
+
+        old = ws / "memory" / "2099-01-01.md"
+        old.write_text("## Old gateway note\n- openclaw gateway was fine\n", encoding="utf-8")
+        log = ws / "memory" / f"{TODAY}.md"
+        log.write_text("# Today\n\n## Gateway restart\n- Restarted the openclaw gateway\n", encoding="utf-8")
+
+        state = dd.WatchState()
+        dd.watch_poll(state, TODAY)
+        if "Gateway restart" in staged(ws):
+            raise SystemExit("FAIL: open final section was distilled")
+        if "Old gateway note" in staged(ws):
+            raise SystemExit("FAIL: first poll touched a past log that did not change")
+
+        touch(log, "\n## Cron cleanup\n- Removed the stale heartbeat cron job\n")
+        dd.watch_poll(state, TODAY)
+        out = staged(ws)
+        if out.count("Episodic note (candidate): Gateway restart") != 1 or "Cron cleanup" in out:
+            raise SystemExit("FAIL: completed section not distilled exactly once")
+        if not dd.resumable(log, state.marks[log]):
+            raise SystemExit("FAIL: watermark does not land on an H2 line")
+
+        if dd.watch_poll(state, TODAY):
+            raise SystemExit("FAIL: unchanged log was rescanned")
+
+        # Rewrite the file so the old watermark points into the middle of a line.
+        touch(log, "# Today (edited)\n\n" + log.read_text(encoding="utf-8") + "\n## Backups\n- Decision: keep 7 backups\n", mode="w")
+        dd.watch_poll(state, TODAY)
+        out = staged(ws)
+        if out.count("Episodic note (candidate): Gateway restart") != 1:
+            raise SystemExit("FAIL: rescan after rewrite re-distilled an indexed section")
+        if out.count("Episodic note (candidate): Cron cleanup") != 1:
+            raise SystemExit("FAIL: rescan after rewrite missed a completed section")
+
+        memc = ws / "memory" / "staging" / "MEMORY.candidates.md"
+        if memc.exists() and "Backups" in memc.read_text(encoding="utf-8"):
+            raise SystemExit("FAIL: open final section was distilled after a rewrite")
+        dd.watch_poll(state, "2099-01-03")
+        if memc.read_text(encoding="utf-8").count("Semantic candidate: Backups") != 1:
+            raise SystemExit("FAIL: final section was not finalized after the day passed")
+        if dd.watch_poll(state, "2099-01-03"):
+            raise SystemExit("FAIL: finalized log was scanned again")
+
+        check_concurrent(Path(td) / "concurrent")
+
+        print("PASS: distill_daily watch mode")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Regression test: the streaming JSONL reader.
+
+Checks that buffered and mmap reads, and the orjson and stdlib decoders, yield
+the same records and offsets; that awkward lines (U+2028, CRLF, invalid UTF-8,
+NaN) decode like stdlib `json`; that a partial trailing line is held back until
+it completes; that gzip archives read like the plain file; and that memory
+stays bounded by one record.
+
+Usage:
+  python3 memory-architecture/scripts/test_jsonl_reader.py
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import jsonl_reader
+
+LINES = [
+    b'{"a": 1}\n',
+    b"\n",
+    '{"text": "line separator inside"}\n'.encode("utf-8"),
+    b'{"crlf": true}\r\n',
+    b'{"bad": "\xff\xfe"}\n',
+    b'{"nan": NaN}\n',
+    b"not json\n",
+    b"[1, 2, 3]\n",
+]
+
+
+def read_all(fp: Path, start: int = 0) -> list:
+    buffered = list(jsonl_reader.iter_records(fp, start))
+    mapped = list(jsonl_reader.iter_records(fp, start, use_mmap=True))
+    if buffered != mapped:
+        raise SystemExit(f"FAIL: mmap and buffered reads differ from offset {start}")
+    return buffered
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as td:
+        fp = Path(td) / "s.jsonl"
+        fp.write_bytes(b"")
+        if read_all(fp):
+            raise SystemExit("FAIL: empty file yielded records")
+
+        fp.write_bytes(b"".join(LINES))
+        got = read_all(fp)
+        expected = []
+        pos = 0
+        for raw in LINES:
+            try:
+                obj = json.loads(raw.decode("utf-8", errors="replace")) if raw.strip() else None
+            except ValueError:
+                obj = None
+            expected.append((pos, pos + len(raw), obj))
+            pos += len(raw)
+        if [(s, e) for s, e, _ in got] != [(s, e) for s, e, _ in expected]:
+            raise SystemExit("FAIL: line offsets differ")
+        if json.dumps([o for _, _, o in got]) != json.dumps([o for _, _, o in expected]):
+            raise SystemExit("FAIL: decoded records differ from stdlib json")
+
+        saved = jsonl_reader.orjson
+        jsonl_reader.orjson = None
+        try:
+            fallback = list(jsonl_reader.iter_records(fp))
+        finally:
+            jsonl_reader.orjson = saved
+        if json.dumps(fallback) != json.dumps(got):
+            raise SystemExit("FAIL: stdlib fallback decodes differently")
+
+        mid = got[3][0]
+        if read_all(fp, mid) != got[3:]:
+            raise SystemExit("FAIL: reading from a line offset differs")
+
+        gz = Path(td) / "s.jsonl.gz"
+        gz.write_bytes(gzip.compress(fp.read_bytes()))
+        if list(jsonl_reader.iter_records(gz)) != got or list(jsonl_reader.iter_records(gz, mid)) != got[3:]:
+            raise SystemExit("FAIL: gzip archive reads differently from the plain file")
+        if jsonl_reader.source_name(gz) != "s.jsonl":
+            raise SystemExit("FAIL: archive source name keeps the compression suffix")
+
+        with fp.open("ab") as f:
+            f.write(b'{"partial": ')
+        if read_all(fp) != got:
+            raise SystemExit("FAIL: partial trailing line was not held back")
+        with fp.open("ab") as f:
+            f.write(b"true}")
+        if read_all(fp)[-1][2] != {"partial": True}:
+            raise SystemExit("FAIL: complete trailing line without newline was dropped")
+
+        # ~24 MB of 200 KB records: peak allocation must stay near one record.
+        big = Path(td) / "big.jsonl"
+        record = json.dumps({"text": "x" * 200_000}).encode("utf-8") + b"\n"
+        with big.open("wb") as f:
+            for _ in range(120):
+                f.write(record)
+        for use_mmap in (False, True):
+            tracemalloc.start()
+            n = sum(1 for _ in jsonl_reader.iter_records(big, use_mmap=use_mmap))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if n != 120 or peak > 8 * len(record):
+                raise SystemExit(f"FAIL: mmap={use_mmap} read {n} records with peak {peak} bytes")
+
+    print(f"PASS: jsonl_reader streaming ({jsonl_reader.DECODER})")
+
+
+if __name__ == "__main__":
+    main()
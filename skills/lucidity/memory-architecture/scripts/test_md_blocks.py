@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Regression test: md_blocks matches the legacy regex implementations.
+
+Compares `md_blocks.iter_sections` against the original
+`re.split(r"^##\\s+", ...)` implementation on hand-picked edge cases and on
+randomly generated documents, and checks that byte offsets slice the file back
+into its sections. Also checks `BlockRecord` field detection against the
+per-field regex that apply_staging used before.
+
+Usage:
+  python3 memory-architecture/scripts/test_md_blocks.py
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from md_blocks import BlockRecord, iter_sections
+
+CASES = [
+    "",
+    "no headings at all\n",
+    "# Title\n\nintro\n\n## A\n- one\n\n## B\nbody\n",
+    "## A\n## B\n",
+    "##\n\ntitle after bare marker\nbody\n",
+    "##   \n## Next\nx\n",
+    "  ## indented is not a heading\n## Real\n  ## still body\n",
+    "### H3 only\n## H2\n### nested\n",
+    "crlf\r\n## A\r\nbody\r\n",
+    "lone\r## B\rbody\r",
+    "## Uni\u2028split\nbody\u2029more\x85\n",
+    "##\tTabbed\nbody",
+    "trailing bare marker\n##",
+]
+
+
+def legacy_split_sections(md: str) -> List[Tuple[str, str]]:
+    parts = re.split(r"^##\s+", md, flags=re.M)
+    if len(parts) <= 1:
+        return [("(no heading)", md.strip())]
+    out: List[Tuple[str, str]] = []
+    pre = parts[0].strip()
+    if pre:
+        out.append(("(preamble)", pre))
+    for p in parts[1:]:
+        lines = p.splitlines()
+        heading = lines[0].strip() if lines else "(empty)"
+        body = "\n".join(lines[1:]).strip()
+        out.append((heading, body))
+    return out
+
+
+def random_doc(rng: random.Random) -> str:
+    pieces = ["## ", "##", "###", "# ", "- decision: x", "1) step", "text", " ", "\t", "\n", "\n\n", "\r\n", "\r", "é", "\u2028", "\x0c", "\x1c"]
+    return "".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+
+
+def legacy_has_field(block: str, field: str) -> bool:
+    pat = re.compile(rf"^\s*-\s*{re.escape(field)}\s*:\s*.+$", flags=re.I | re.M)
+    return bool(pat.search(block))
+
+
+def random_block(rng: random.Random) -> str:
+    pieces = ["## Procedure (candidate): x\n", "- trigger:", "- Trigger: when", "  - source: a", "- verification:", " ", "\n", "\n\n", "x", "- evidence:\n  - p"]
+    return "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+
+
+def check_fields(block: str) -> None:
+    rec = BlockRecord(block)
+    for field in ("trigger", "source", "evidence", "verification"):
+        if rec.has_field(field) != legacy_has_field(block, field):
+            raise SystemExit(f"FAIL: has_field({field!r}) mismatch for {block!r}")
+
+
+def check(doc: str, tmp: Path) -> None:
+    tmp.write_bytes(doc.encode("utf-8"))
+    expected = legacy_split_sections(tmp.read_text(encoding="utf-8"))
+    got = list(iter_sections(tmp))
+    if [(s.heading, s.body) for s in got] != expected:
+        raise SystemExit(f"FAIL: section mismatch for {doc!r}\nexpected={expected}\ngot={[(s.heading, s.body) for s in got]}")
+    data = tmp.read_bytes()
+    for s in got:
+        chunk = data[s.start : s.end].decode("utf-8")
+        if s.heading not in ("(preamble)", "(no heading)", "(empty)") and s.heading not in chunk:
+            raise SystemExit(f"FAIL: offsets {s.start}:{s.end} do not cover heading {s.heading!r} in {doc!r}")
+
+
+def main() -> None:
+    rng = random.Random(1234)
+    with tempfile.TemporaryDirectory() as td:
+        tmp = Path(td) / "doc.md"
+        for doc in CASES:
+            check(doc, tmp)
+        for _ in range(3000):
+            check(random_doc(rng), tmp)
+    for _ in range(3000):
+        check_fields(random_block(rng))
+    print("PASS: md_blocks section scanner and block fields")
+
+
+if __name__ == "__main__":
+    main()
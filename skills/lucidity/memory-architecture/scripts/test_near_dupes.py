@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Regression test: near-duplicate detection in dedupe_staging.
+
+Checks that:
+- a reworded procedure staged in two topic files is reported as one cluster
+  (`--near-dupes report`) and its later copy is dropped (`--near-dupes drop`),
+  while unrelated blocks are never clustered
+- a re-run with nothing changed still reports the cluster
+- `--near-threshold` above the pair's similarity finds nothing
+- incremental drop runs (serial or `--jobs`) match a `--full` rebuild,
+  including a block appended to an earlier file that near-duplicates a block
+  kept in a later one
+
+Usage:
+  python3 memory-architecture/scripts/test_near_dupes.py
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve()
+DEDUPE = HERE.parent / "dedupe_staging.py"
+
+WORDS = [f"w{i}" for i in range(2000)]
+STEPS = [
+    "Stop the gateway service with systemctl stop openclaw-gateway",
+    "Clear the session cache under /var/cache/openclaw",
+    "Start the gateway again and check the health endpoint returns ok",
+]
+
+
+def procedure(heading: str, source: str, steps: list) -> str:
+    body = "".join(f"{i}) {s}\n" for i, s in enumerate(steps, 1))
+    return (
+        f"\n## Procedure (candidate): {heading}\n\n- type: procedural\n- source: {source}#{heading}\n"
+        f"- trigger: When you need: {heading}\n- guardrails:\n  - (what not to do)\n"
+        f"- verification: verification steps listed below\n- generated_at: 2090-01-01T00:00:00Z\n\n{body}\n"
+    )
+
+
+def noise(rng: random.Random) -> str:
+    steps = [" ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(3)]
+    return procedure(" ".join(rng.choice(WORDS) for _ in range(3)), "memory/2090-01-01.md", steps)
+
+
+def run(ws: Path, *extra: str) -> dict:
+    subprocess.run(
+        ["python3", str(DEDUPE), "--workspace", str(ws), "--write", *extra],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return json.loads((ws / "memory" / "staging" / "reports" / "dedupe-report.json").read_text(encoding="utf-8"))
+
+
+def outputs(ws: Path) -> dict:
+    deduped = ws / "memory" / "staging" / "deduped"
+    return {str(p.relative_to(deduped)): p.read_bytes() for p in sorted(deduped.rglob("*.md"))}
+
+
+def main() -> None:
+    rng = random.Random(5)
+    original = procedure("Restart the gateway", "memory/2090-01-01.md", STEPS)
+    reworded = procedure(
+        "Restarting the gateway",
+        "memory/staging/sessions/2090-01-01.sessions.md",
+        [STEPS[0], STEPS[1].replace("under", "in"), STEPS[2].replace("check the", "check that the")],
+    )
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / "workspace"
+        topics = ws / "memory" / "staging" / "topics"
+        topics.mkdir(parents=True)
+        files = [topics / "a.md", topics / "b.md", topics / "c.md"]
+        for fp in files:
+            fp.write_text(f"# Staged: {fp.stem}\n" + "".join(noise(rng) for _ in range(200)), encoding="utf-8")
+        with files[0].open("a", encoding="utf-8") as f:
+            f.write(original)
+        with files[2].open("a", encoding="utf-8") as f:
+            f.write(reworded)
+
+        plain = run(ws, "--full")
+        plain_out = outputs(ws)
+        report = run(ws, "--near-dupes", "report")
+        clusters = report["near_duplicates"]["clusters"]
+        if len(clusters) != 1 or [b["path"] for b in clusters[0]["blocks"]] != [str(p.relative_to(ws)) for p in (files[0], files[2])]:
+            raise SystemExit(f"FAIL: expected one cluster of the reworded pair, got {clusters}")
+        if outputs(ws) != plain_out or report["files"] != plain["files"]:
+            raise SystemExit("FAIL: --near-dupes report changed the deduped outputs")
+
+        again = run(ws, "--near-dupes", "report")
+        if again["incremental"]["files_rebuilt"] or again["near_duplicates"]["clusters"] != clusters:
+            raise SystemExit(f"FAIL: an unchanged re-run lost the cluster: {again['near_duplicates']['clusters']}")
+
+        strict = run(ws, "--near-dupes", "report", "--near-threshold", "0.95")
+        if strict["near_duplicates"]["clusters"]:
+            raise SystemExit("FAIL: --near-threshold 0.95 still clustered the reworded pair")
+
+        dropped = run(ws, "--near-dupes", "drop")
+        if dropped["files"][str(files[2].relative_to(ws))]["dropped_near"] != 1 or dropped["near_duplicates"]["blocks_dropped"] != 1:
+            raise SystemExit(f"FAIL: the reworded copy was not dropped: {dropped['near_duplicates']}")
+        if b"Restarting the gateway" in outputs(ws)["topics/c.md"]:
+            raise SystemExit("FAIL: the dropped block is still in the deduped output")
+
+        # Nights of appends; on night 1 a block appended to a.md near-duplicates one kept in b.md.
+        later = procedure("Rotate the logs", "memory/2090-01-02.md", ["Compress the old gateway logs", "Delete logs older than a week"])
+        earlier = procedure("Rotating the logs", "memory/2090-01-03.md", ["Compress the old gateway logs", "Delete the logs older than a week"])
+        for night in range(3):
+            for fp in files:
+                with fp.open("a", encoding="utf-8") as f:
+                    f.write("".join(noise(rng) for _ in range(20)))
+                    if night == 0 and fp == files[1]:
+                        f.write(later)
+                    if night == 1 and fp == files[0]:
+                        f.write(earlier)
+            report = run(ws, "--near-dupes", "drop", "--jobs", str(1 + night))
+            fresh = ws.parent / "fresh"
+            shutil.rmtree(fresh, ignore_errors=True)
+            shutil.copytree(ws / "memory" / "staging", fresh / "memory" / "staging", ignore=shutil.ignore_patterns("deduped", "index"))
+            expected = run(fresh, "--near-dupes", "drop", "--full")
+            if outputs(ws) != outputs(fresh) or report["files"] != expected["files"]:
+                raise SystemExit(f"FAIL: night {night}: incremental near-duplicate drops differ from a full rebuild")
+            if night == 1 and (b"Rotate the logs" in outputs(ws)["topics/b.md"] or report["incremental"]["files_rebuilt"] != 2):
+                raise SystemExit(f"FAIL: the later file was not rebuilt after its block lost: {report['incremental']}")
+
+    print("PASS: near-duplicate detection")
+
+
+if __name__ == "__main__":
+    main()
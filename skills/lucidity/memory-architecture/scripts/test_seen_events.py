@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Regression test: seen-event suppression across overlapping extract windows.
+
+Checks that:
+- an extract whose window overlaps an earlier one drops the events already
+  staged there and reports them as `events_suppressed`
+- re-extracting the same day keeps its own events
+- `--include-seen` emits everything
+- a default run (suppression on) with more matches than `--max-events` stays
+  bounded: each file scan keeps at most `--max-events` per day, after
+  dropping suppressed events, with and without `--bucket-by-day`
+- the Bloom filter grows with the key set without losing any key
+
+Usage:
+  python3 memory-architecture/scripts/test_seen_events.py
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+import distill_sessions as ds
+import seen_events
+
+HERE = Path(__file__).resolve()
+DISTILL = HERE.parent / "distill_sessions.py"
+
+
+def run(ws: Path, sessions: Path, since: str, until: str, *extra: str) -> dict:
+    subprocess.run(
+        ["python3", str(DISTILL), "--workspace", str(ws), "--sessions-dir", str(sessions), "--since", since, "--until", until, *extra],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    tag = since[:10]
+    meta = json.loads((ws / "memory" / "staging" / "reports" / f"sessions-{tag}.meta.json").read_text(encoding="utf-8"))
+    return meta["stats"]
+
+
+def note(ts: dt.datetime, text: str) -> str:
+    obj = {"timestamp": ts.isoformat().replace("+00:00", "Z"), "message": {"role": "user", "content": [{"type": "text", "text": text}]}}
+    return json.dumps(obj) + "\n"
+
+
+def check_bounded(td: Path) -> None:
+    ws = td / "bounded"
+    sessions = td / "bounded-sessions"
+    sessions.mkdir()
+    today = dt.datetime.now(dt.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    days = [today - dt.timedelta(days=n) for n in (2, 1)]
+    with (sessions / "s.jsonl").open("w", encoding="utf-8") as f:
+        for day in days:
+            f.writelines(note(day + dt.timedelta(minutes=m), f"{day.date()} note {m}") for m in range(200))
+
+    for day in days:
+        tag = day.date().isoformat()
+        subprocess.run(
+            ["python3", str(DISTILL), "--workspace", str(ws), "--sessions-dir", str(sessions), "--since-days", "2", "--bucket-by-day", "--max-events", "5"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        meta = json.loads((ws / "memory" / "staging" / "reports" / f"sessions-{tag}.meta.json").read_text(encoding="utf-8"))
+        if meta["stats"] != {"events_matched": 200, "events_suppressed": 0, "events_selected": 5, "events_over_limit": 195}:
+            raise SystemExit(f"FAIL: --bucket-by-day did not cap {tag} at --max-events: {meta['stats']}")
+
+    # A window tagged with the first day suppresses what the second day staged,
+    # inside the scan, so the file's kept events stay within the cap.
+    stats = run(ws, sessions, days[0].isoformat(), today.isoformat(), "--max-events", "5")
+    if stats["events_selected"] != 5 or stats["events_suppressed"] != 5 or stats["events_over_limit"] != 390:
+        raise SystemExit(f"FAIL: default run over --max-events was not bounded: {stats}")
+    ds.configure(ws)
+    view = seen_events.SeenView(ds.seen_events_path())
+    scan = ds.scan_file(sessions / "s.jsonl", ds.ScanProgress(), days[0], today, None, False, False, 5, seen=view, tags=ds.EventTags("other"))
+    if len(scan.events) != 5 or scan.stats["events_suppressed"] != 10:
+        raise SystemExit(f"FAIL: scan kept {len(scan.events)} events ({scan.stats['events_suppressed']} suppressed), expected 5 (10)")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / "workspace"
+        sessions = Path(td) / "sessions"
+        sessions.mkdir(parents=True)
+        with (sessions / "s.jsonl").open("w", encoding="utf-8") as f:
+            for day in (1, 2, 3):
+                for hour in range(10):
+                    obj = {
+                        "timestamp": f"2099-01-0{day}T{hour:02d}:00:00Z",
+                        "message": {"role": "user", "content": [{"type": "text", "text": f"day {day} note {hour}"}]},
+                    }
+                    f.write(json.dumps(obj) + "\n")
+
+        first = run(ws, sessions, "2099-01-01T00:00:00Z", "2099-01-03T00:00:00Z")
+        if first["events_selected"] != 20 or first["events_suppressed"] != 0:
+            raise SystemExit(f"FAIL: first extract stats {first}")
+
+        overlap = run(ws, sessions, "2099-01-02T00:00:00Z", "2099-01-04T00:00:00Z")
+        if overlap["events_selected"] != 10 or overlap["events_suppressed"] != 10:
+            raise SystemExit(f"FAIL: overlapping extract did not suppress day 2: {overlap}")
+        text = (ws / "memory" / "staging" / "sessions" / "2099-01-02.sessions.md").read_text(encoding="utf-8")
+        if "day 2 note" in text or text.count("day 3 note") != 10:
+            raise SystemExit("FAIL: overlapping extract holds the wrong events")
+
+        again = run(ws, sessions, "2099-01-01T00:00:00Z", "2099-01-03T00:00:00Z")
+        if again["events_selected"] != 20 or again["events_suppressed"] != 0:
+            raise SystemExit(f"FAIL: re-extracting the same day dropped its own events: {again}")
+
+        everything = run(ws, sessions, "2099-01-02T00:00:00Z", "2099-01-04T00:00:00Z", "--include-seen")
+        if everything["events_selected"] != 20 or everything["events_suppressed"] != 0:
+            raise SystemExit(f"FAIL: --include-seen still suppressed events: {everything}")
+
+        capped = run(ws, sessions, "2099-01-02T00:00:00Z", "2099-01-04T00:00:00Z", "--max-events", "5")
+        if capped["events_selected"] != 5 or capped["events_over_limit"] != 5:
+            raise SystemExit(f"FAIL: --max-events should apply after suppression: {capped}")
+
+        check_bounded(Path(td))
+
+        saved = seen_events.BLOOM_MIN_KEYS
+        seen_events.BLOOM_MIN_KEYS = 16
+        try:
+            store = seen_events.SeenEvents(Path(td) / "seen.sqlite")
+            batches = [[{"sourceFile": "s.jsonl", "timestamp": f"t{b}-{i}", "role": "user", "text": "x"} for i in range(50)] for b in range(3)]
+            for b, batch in enumerate(batches):
+                store.add(batch, f"tag{b}")
+            store.close()
+            store = seen_events.SeenEvents(Path(td) / "seen.sqlite")
+            if store.count != 150 or store.bloom.capacity < 150:
+                raise SystemExit(f"FAIL: Bloom filter did not grow ({store.count} keys, capacity {store.bloom.capacity})")
+            for b, batch in enumerate(batches):
+                kept, suppressed = store.filter(batch, "other")
+                if kept or suppressed != 50:
+                    raise SystemExit(f"FAIL: batch {b} keys lost after reopening")
+            store.close()
+        finally:
+            seen_events.BLOOM_MIN_KEYS = saved
+
+    print("PASS: seen-event suppression")
+
+
+if __name__ == "__main__":
+    main()
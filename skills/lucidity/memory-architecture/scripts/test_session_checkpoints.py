@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Regression test: session scan checkpoints never change what is extracted.
+
+Simulates nightly runs over transcripts that keep growing and checks that
+extraction with checkpoints (session_index.py) selects exactly the same events
+as a full rescan, including after a file is truncated, rotated (new inode),
+rewritten in place, or left with a partially written last line. Also checks
+that the checkpointed runs actually skip already-scanned bytes and leave
+unchanged files whose timestamp range misses the window unopened, and that
+events are merged in timestamp order regardless of --jobs, with --max-events
+keeping the globally earliest or latest events, and that --bucket-by-day
+routing matches one --date run per local day and the raw-line prefilter never
+changes the selection. Compressed archives (.jsonl.gz) yield the same events
+as the transcript they replace and, once indexed, are skipped without being
+decompressed.
+
+Usage:
+  python3 memory-architecture/scripts/test_session_checkpoints.py
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import gzip
+import json
+import os
+import random
+import re
+import tempfile
+from pathlib import Path
+
+import distill_sessions as ds
+import jsonl_reader
+from session_index import SessionIndex
+
+BASE = dt.datetime(2099, 1, 1, tzinfo=dt.UTC)
+
+
+def append(rng: random.Random, fp: Path, day: int, n: int) -> None:
+    with fp.open("a", encoding="utf-8") as f:
+        for _ in range(n):
+            # Events spill a few hours into the next day, like a late session.
+            ts = BASE + dt.timedelta(seconds=rng.uniform(day * 86400, (day + 1) * 86400 + 4 * 3600))
+            role = rng.choice(["user", "assistant", "toolResult"])
+            obj = {
+                "timestamp": ts.isoformat().replace("+00:00", "Z"),
+                "message": {"role": role, "content": [{"type": "text", "text": f"note {rng.randrange(1000)}"}]},
+            }
+            f.write(json.dumps(obj) + "\n")
+
+
+def extract_events(*args, **kw):
+    """distill_sessions.extract_events with the event generator drained into a list."""
+    events, stats = ds.extract_events(*args, **kw)
+    return list(events), stats
+
+
+def extract(sessions: Path, day: int, index: SessionIndex | None, max_events: int = 10**9, **kw):
+    since = BASE + dt.timedelta(days=day)
+    return extract_events(sessions, since, since + dt.timedelta(days=1), None, False, False, 0, max_events, index=index, **kw)
+
+
+def check(sessions: Path, index_path: Path, day: int, label: str, max_events: int = 10**9) -> dict:
+    expected, _ = extract(sessions, day, None, max_events)
+    index = SessionIndex(index_path)
+    got, stats = extract(sessions, day, index, max_events)
+    index.save()
+    if got != expected:
+        raise SystemExit(f"FAIL: {label}: checkpointed extraction differs ({len(got)} vs {len(expected)} events)")
+    return stats
+
+
+def check_order(sessions: Path, day: int) -> None:
+    """Events come out in timestamp order; --jobs and --keep do not change which are selected."""
+    everything, _ = extract(sessions, day, None)
+    keys = [dt.datetime.fromisoformat(e["timestamp"]) for e in everything]
+    if keys != sorted(keys):
+        raise SystemExit("FAIL: events are not in timestamp order")
+    parallel, _ = extract(sessions, day, None, jobs=3)
+    if parallel != everything:
+        raise SystemExit("FAIL: parallel scan differs from serial scan")
+    earliest, stats = extract(sessions, day, None, 25, jobs=3)
+    latest, _ = extract(sessions, day, None, 25, keep="latest")
+    if earliest != everything[:25] or latest != everything[-25:]:
+        raise SystemExit("FAIL: --max-events did not keep the globally earliest/latest events")
+    if stats["events_over_limit"] != len(everything) - 25:
+        raise SystemExit(f"FAIL: events_over_limit {stats['events_over_limit']}, expected {len(everything) - 25}")
+
+
+def check_buckets(sessions: Path) -> None:
+    """One scan bucketed by local day matches a separate --date run per day."""
+    tz = ds.local_tz("America/New_York")
+    days = [dt.date(2099, 1, 2) + dt.timedelta(days=n) for n in range(4)]
+    since, until = ds.day_window(days[0], tz)[0], ds.day_window(days[-1], tz)[1]
+    tags = ds.EventTags(tz=tz)
+    for keep in ("earliest", "latest"):
+        events, bucket_stats = extract_events(sessions, since, until, None, False, False, 0, 40, keep=keep, tags=tags)
+        for d in days:
+            day_since, day_until = ds.day_window(d, tz)
+            expected, stats = extract_events(sessions, day_since, day_until, None, False, False, 0, 40, keep=keep)
+            got = [ev for ev in events if tags(dt.datetime.fromisoformat(ev["timestamp"])) == d.isoformat()]
+            if got != expected or bucket_stats["tags"][d.isoformat()] != stats["tags"][""]:
+                raise SystemExit(f"FAIL: bucket {d} ({keep}) differs from a per-day extraction")
+
+
+TRICKY = [
+    # Nested timestamps around the window; the top-level one decides.
+    r'{"timestamp": "2099-01-03T12:00:00Z", "message": {"role": "user", "content": "deploy now", "ts": "2090-01-01T00:00:00Z"}}',
+    r'{"ts": "2099-01-03T12:00:00Z", "meta": {"timestamp": "2099-01-09T00:00:00Z"}, "message": {"role": "user", "content": "deploy later"}}',
+    # Escapes in a timestamp value and inside a keyword.
+    r'{"timestamp": "2099-01-03T12:30:00\u005a", "message": {"role": "user", "content": "deploy"}}',
+    r'{"timestamp": "2099-01-03T13:00:00Z", "message": {"role": "user", "content": "re\u0064eploy"}}',
+    # Case folding: the Kelvin sign matches "k" under re.I.
+    '{"timestamp": "2099-01-03T14:00:00Z", "message": {"role": "user", "content": "\u212aubectl rollout"}}',
+    # No text: the keyword is matched against the re-serialized event.
+    r'{"timestamp": "2099-01-03T15:00:00Z", "type": "deploy", "message": {"role": "assistant", "content": []}}',
+    r'{"timestamp": "2099-01-03T15:30:00Z", "type": "custom", "value": 1e999, "message": {"role": "assistant", "content": []}}',
+    r'{"timestamp": "2099-01-03T16:00:00Z", "message": {"role": "user", "content": "nothing to see"}}',
+]
+
+
+def check_prefilter(sessions: Path) -> None:
+    """The raw-line prefilter never changes which events are selected."""
+    tricky = sessions / "tricky.jsonl"
+    tricky.write_text("".join(line + "\n" for line in TRICKY), encoding="utf-8")
+    since = BASE + dt.timedelta(days=2)
+    for pattern in (None, "deploy", "kubectl|infinity", "note 1[0-9]"):
+        keyword_re = re.compile(pattern, flags=re.I) if pattern else None
+        got, stats = extract_events(sessions, since, since + dt.timedelta(days=1), keyword_re, False, False, 0, 10**9)
+        expected, _ = extract_events(
+            sessions, since, since + dt.timedelta(days=1), keyword_re, False, False, 0, 10**9, prefilter=False
+        )
+        if got != expected:
+            raise SystemExit(f"FAIL: prefilter changed the selection for {pattern!r} ({len(got)} vs {len(expected)})")
+        if pattern != "note 1[0-9]" and stats["lines_prefiltered"] == 0:
+            raise SystemExit(f"FAIL: prefilter skipped nothing for {pattern!r}")
+    tricky.unlink()
+
+
+def check_compressed(sessions: Path, index_path: Path) -> None:
+    """A gzipped transcript extracts like the original and is skipped unopened outside the window."""
+    plain = sessions / "old.jsonl"
+    archive = sessions / "old.jsonl.gz"
+    expected, _ = extract(sessions, 0, None)
+    archive.write_bytes(gzip.compress(plain.read_bytes()))
+    both, _ = extract(sessions, 0, None)
+    plain.unlink()
+    check(sessions, index_path, 0, "compressed archive")
+    got, _ = extract(sessions, 0, None, jobs=2)
+    if both != expected or got != expected:
+        raise SystemExit("FAIL: compressed archive extracts differently from the plain transcript")
+
+    def refuse(fp: Path):
+        raise SystemExit(f"FAIL: {fp.name} was decompressed although its range misses the window")
+
+    expected, _ = extract(sessions, 5, None)
+    saved = jsonl_reader.open_decompressed
+    jsonl_reader.open_decompressed = refuse
+    try:
+        got, stats = extract(sessions, 5, SessionIndex(index_path))
+    finally:
+        jsonl_reader.open_decompressed = saved
+    if got != expected or stats["files_skipped"] < 1:
+        raise SystemExit("FAIL: indexed archive outside the window was not skipped")
+
+    if not jsonl_reader.can_read(sessions / "x.jsonl.zst"):
+        (sessions / "x.jsonl.zst").write_bytes(b"")
+        _, stats = extract(sessions, 5, None)
+        (sessions / "x.jsonl.zst").unlink()
+        if stats["files_unsupported"] != 1:
+            raise SystemExit("FAIL: .zst archive without a zstd module was not reported")
+
+
+def main() -> None:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as td:
+        sessions = Path(td) / "sessions"
+        sessions.mkdir()
+        index_path = Path(td) / "sessions-index.json"
+        files = [sessions / f"s{i}.jsonl" for i in range(3)]
+        # A finished session from day 0: once indexed, later nights skip it without opening it.
+        append(rng, sessions / "old.jsonl", 0, 100)
+
+        skipped = files_skipped = 0
+        for day in range(6):
+            for fp in files:
+                append(rng, fp, day, 200)
+            stats = check(sessions, index_path, day, f"night {day}")
+            check(sessions, index_path, max(0, day - 2), f"re-extract day {day - 2}")
+            check(sessions, index_path, day, f"max-events night {day}", max_events=25)
+            skipped = stats["bytes_skipped"]
+            files_skipped = stats["files_skipped"]
+        if skipped == 0:
+            raise SystemExit("FAIL: checkpoints never skipped any bytes")
+        if files_skipped != 1:
+            raise SystemExit(f"FAIL: expected the finished session to be skipped unopened, got {files_skipped}")
+        check_order(sessions, 4)
+        check_buckets(sessions)
+        check_prefilter(sessions)
+        check_compressed(sessions, index_path)
+
+        files[0].write_text("", encoding="utf-8")
+        append(rng, files[0], 5, 50)
+        check(sessions, index_path, 5, "truncated file")
+
+        rotated = files[1].with_suffix(".tmp")
+        rotated.write_text(files[1].read_text(encoding="utf-8"), encoding="utf-8")
+        os.replace(rotated, files[1])
+        check(sessions, index_path, 5, "rotated file")
+
+        text = files[2].read_text(encoding="utf-8")
+        files[2].write_text(text.replace("note", "NOTE", 1), encoding="utf-8")
+        check(sessions, index_path, 5, "rewritten file")
+
+        with files[2].open("a", encoding="utf-8") as f:
+            f.write('{"timestamp": "2099-01-06T01:00:00Z", "mess')
+        check(sessions, index_path, 5, "partial trailing line")
+        with files[2].open("a", encoding="utf-8") as f:
+            f.write('age": {"role": "user", "content": "finished"}}\n')
+        check(sessions, index_path, 5, "completed trailing line")
+
+    print("PASS: distill_sessions checkpoints")
+
+
+if __name__ == "__main__":
+    main()
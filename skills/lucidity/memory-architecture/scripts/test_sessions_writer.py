@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Regression test: streaming sessions extract writer and shards.
+
+Checks that:
+- an unsharded extract is byte-identical to the previous all-in-memory writer
+- `--shard-bytes` splits events across size-capped part files, in order, and
+  writes an index listing them
+- switching between sharded and unsharded output removes the other's files
+- distill_daily accepts every shard in one `--path` run
+- the H2 sections the writer groups while writing (for `--distill`) equal
+  the written files' sections, byte offsets included
+- `--distill` (in-process) stages the same candidates, receipts and section
+  index as distill_daily on the written files, which then skip every section
+- a `--bucket-by-day` run streams the merged events into each day's extract:
+  peak memory (tracemalloc) does not grow with the number of matching events
+
+Usage:
+  python3 memory-architecture/scripts/test_sessions_writer.py
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import re
+import datetime as dt
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import distill_daily
+import distill_sessions as ds
+from md_blocks import iter_sections
+
+HERE = Path(__file__).resolve()
+DISTILL = HERE.parent / "distill_daily.py"
+
+
+def legacy_md(title: str, events: list, meta: dict) -> str:
+    lines = [
+        f"# {title}\n",
+        "(Generated from OpenClaw session transcripts; review before promoting. Tool results may be omitted.)\n",
+        "## Metadata\n",
+        "```json",
+        json.dumps(meta, indent=2),
+        "```\n",
+        "## Extracted events\n",
+    ]
+    for ev in events:
+        lines.append(f"### {ev['timestamp']} | {ev['role']} | {ev['sourceFile']}\n")
+        lines.append("```")
+        t = ev.get("text") or "[no extracted text]"
+        lines.append(t[:4000] + "…" if len(t) > 4000 else t)
+        lines.append("```\n")
+    return "\n".join(lines)
+
+
+def headings(path: Path) -> list:
+    return [line for line in path.read_text(encoding="utf-8").splitlines() if line.startswith("### ")]
+
+
+def staged(ws: Path) -> dict:
+    staging = ws / "memory" / "staging"
+    out = {str(p.relative_to(staging)): re.sub(r"generated_at: .*", "", p.read_text(encoding="utf-8")) for p in staging.glob("topics/*.md")}
+    out["MEMORY.candidates.md"] = re.sub(r"generated_at: .*", "", (staging / "MEMORY.candidates.md").read_text(encoding="utf-8"))
+    index = json.loads((staging / "index" / "sections.json").read_text(encoding="utf-8"))
+    # Watermarks record the file's inode, which differs between the two workspaces.
+    out["sections.json"] = [index["files"], {rel: {**m, "inode": None} for rel, m in index["marks"].items()}]
+    for p in staging.glob("receipts/*.sessions*.json"):
+        # Output hashes cover generated_at, which may tick between the two runs.
+        receipts = [r for r in json.loads(p.read_text(encoding="utf-8")) if "run" not in r]
+        out[p.name] = [dict(r, output=dict(r["output"], sha256=None)) if "output" in r else r for r in receipts]
+    return out
+
+
+def check_direct_distill(td: Path, events: list) -> None:
+    events = events + [
+        {"timestamp": "2099-01-01T03:00:00+00:00", "role": "user", "text": "Steps:\n1) ssh in\n## not a heading\r\nDecision: keep CR\rlines", "sourceFile": "s.jsonl"},
+        {"timestamp": "2099-01-01T03:00:01+00:00", "role": "assistant", "text": "Préférence: naïve café ✓", "sourceFile": "s.jsonl"},
+    ]
+    meta = {"selected_events": len(events)}
+    direct, from_files = td / "direct", td / "files"
+    for ws in (direct, from_files):
+        (ws / "memory" / "staging" / "reports").mkdir(parents=True)
+        (ws / "memory" / "staging" / "sessions").mkdir(parents=True)
+
+    ds.configure(direct)
+    with contextlib.redirect_stdout(io.StringIO()):
+        documents = ds.write_outputs("2099-01-01", events, meta, shard_bytes=30_000, sections=True)
+        if len(documents) < 2 or any(secs != list(iter_sections(p)) for p, secs in documents.items()):
+            raise SystemExit("FAIL: sections grouped while writing differ from the written extract's")
+        ds.distill_extracts(documents)
+
+    shutil.copytree(direct / "memory" / "staging" / "sessions", from_files / "memory" / "staging" / "sessions", dirs_exist_ok=True)
+    distill_daily.configure(from_files)
+    distill_daily.distill_paths(sorted((from_files / "memory" / "staging" / "sessions").glob("*.md")))
+    if staged(direct) != staged(from_files):
+        raise SystemExit("FAIL: --distill staged something different from distill_daily on the extract")
+
+    distill_daily.configure(direct)
+    again = distill_daily.distill_paths(sorted((direct / "memory" / "staging" / "sessions").glob("*.md")))
+    if any(s["staged"] or s["distilled"] for s in again):
+        raise SystemExit(f"FAIL: distill_daily re-distilled sections --distill already staged: {again}")
+
+
+def peak_run(td: Path, n: int) -> int:
+    """Peak traced memory of an in-process --bucket-by-day run over `n` events."""
+    ws, sessions = td / f"mem-{n}" / "workspace", td / f"mem-{n}" / "sessions"
+    sessions.mkdir(parents=True)
+    start = dt.datetime.now(dt.UTC).replace(hour=0, minute=0, second=0, microsecond=0) - dt.timedelta(days=2)
+    with (sessions / "s.jsonl").open("w", encoding="utf-8") as f:
+        for i in range(n):
+            ts = start + dt.timedelta(seconds=i * 2 * 86400 // n)
+            text = f"Decision: keep note {i} " + "y" * 300
+            obj = {"timestamp": ts.isoformat().replace("+00:00", "Z"), "message": {"role": "user", "content": [{"type": "text", "text": text}]}}
+            f.write(json.dumps(obj) + "\n")
+    saved = sys.argv
+    sys.argv = ["distill_sessions.py", "--workspace", str(ws), "--sessions-dir", str(sessions), "--since-days", "2"]
+    sys.argv += ["--bucket-by-day", "--max-events", "100", "--jobs", "1"]
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ds.main()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        sys.argv = saved
+    written = sum(len(headings(p)) for p in (ws / "memory" / "staging" / "sessions").glob("*.md"))
+    if written != 200:
+        raise SystemExit(f"FAIL: bucketed run over {n} events wrote {written} events, expected 2 x 100")
+    return peak
+
+
+def check_memory(td: Path) -> None:
+    peak_run(td, 500)  # warm caches (imports, regexes, sqlite) before measuring
+    small, large = peak_run(td, 2000), peak_run(td, 8000)
+    if large > 1.25 * small + 65536:
+        raise SystemExit(f"FAIL: peak memory grew with the number of events ({small} -> {large} bytes)")
+
+
+def main() -> None:
+    events = [
+        {
+            "timestamp": f"2099-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00",
+            "role": "user" if i % 2 else "assistant",
+            "text": f"Decision: step {i} " + "x" * (i * 37 % 5000),
+            "sourceFile": "s.jsonl",
+        }
+        for i in range(120)
+    ]
+    events[5]["text"] = ""
+    meta = {"selected_events": len(events)}
+
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / "workspace"
+        out_dir = ws / "memory" / "staging" / "sessions"
+        out_dir.mkdir(parents=True)
+        out = out_dir / "2099-01-01.sessions.md"
+
+        ds.write_sessions_md(out, "Session Extract: 2099-01-01", events, meta)
+        if out.read_text(encoding="utf-8") != legacy_md("Session Extract: 2099-01-01", events, meta):
+            raise SystemExit("FAIL: unsharded extract differs from the legacy writer")
+
+        cap = 20_000
+        paths = ds.write_sessions_md(out, "Session Extract: 2099-01-01", events, meta, shard_bytes=cap)
+        if len(paths) < 2 or out.exists():
+            raise SystemExit(f"FAIL: expected several shards and no unsharded file, got {[p.name for p in paths]}")
+        expected = [line for line in legacy_md("", events, meta).splitlines() if line.startswith("### ")]
+        if [h for p in paths for h in headings(p)] != expected:
+            raise SystemExit("FAIL: shards do not hold every event once, in order")
+        for p in paths:
+            body = p.read_text(encoding="utf-8").split("## Extracted events\n", 1)[1]
+            if len(body.encode("utf-8")) > cap and len(headings(p)) > 1:
+                raise SystemExit(f"FAIL: {p.name} exceeds the shard cap")
+        index = json.loads((out_dir / "2099-01-01.sessions.index.json").read_text(encoding="utf-8"))
+        if [s["path"] for s in index["shards"]] != [p.name for p in paths]:
+            raise SystemExit("FAIL: shard index does not list the shards")
+        if sum(s["events"] for s in index["shards"]) != len(events):
+            raise SystemExit("FAIL: shard index event counts are wrong")
+        if list(out_dir.glob(".*")):
+            raise SystemExit("FAIL: temporary files left behind")
+
+        # Fewer shards on a re-run: the extra old shard files must go.
+        fewer = ds.write_sessions_md(out, "Session Extract: 2099-01-01", events[:10], meta, shard_bytes=cap)
+        if sorted(out_dir.glob("2099-01-01.sessions.0*.md")) != fewer:
+            raise SystemExit("FAIL: stale shards from a previous run were kept")
+
+        paths = ds.write_sessions_md(out, "Session Extract: 2099-01-01", events, meta, shard_bytes=cap)
+        rels = [str(p.relative_to(ws)) for p in paths]
+        subprocess.run(
+            ["python3", str(DISTILL), "--workspace", str(ws), "--path", *rels, "--jobs", "2"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        receipts = ws / "memory" / "staging" / "receipts"
+        if sorted(p.name for p in receipts.glob("*.sessions.0*.json")) != sorted(p.stem + ".json" for p in paths):
+            raise SystemExit("FAIL: distill_daily did not distill every shard")
+
+        ds.write_sessions_md(out, "Session Extract: 2099-01-01", events, meta)
+        if list(out_dir.glob("2099-01-01.sessions.0*.md")) or (out_dir / "2099-01-01.sessions.index.json").exists():
+            raise SystemExit("FAIL: switching back to one file left shards behind")
+
+        check_direct_distill(Path(td), events)
+        check_memory(Path(td))
+
+    print("PASS: sessions writer and shards")
+
+
+if __name__ == "__main__":
+    main()
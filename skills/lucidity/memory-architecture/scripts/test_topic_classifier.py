@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Regression test: keyword topic classifier (topic_classifier.py).
+
+Checks that:
+- a whole-word hit scores `weights.word` (2) and an in-word hit
+  `weights.partial` (1)
+- equal scores go to the topic hit first in the text
+- texts without a hit get the config's default topic
+- the shipped config classifies a fixed sample exactly like the old
+  first-match TOPIC_KEYWORDS scan in distill_daily
+- topic names that are not `[a-z0-9_-]+` (e.g. `../x`) are rejected
+- an edited config file is reloaded instead of served from the cache
+
+Usage:
+  python3 memory-architecture/scripts/test_topic_classifier.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import topic_classifier as tc
+
+# distill_daily's keyword table and first-match scan before the classifier.
+LEGACY_TOPIC_KEYWORDS = {
+    "openclaw": "openclaw",
+    "gateway": "openclaw",
+    "telegram": "messaging",
+    "whatsapp": "messaging",
+    "discord": "messaging",
+    "memory": "memory-architecture",
+    "lancedb": "memory-architecture",
+    "fts": "memory-architecture",
+    "bm25": "memory-architecture",
+    "cron": "automation",
+    "heartbeat": "automation",
+    "security": "security",
+    "gpl": "lucidity",
+    "lucidity": "lucidity",
+}
+
+SAMPLE = [
+    "Restarted the OpenClaw gateway after the config change",
+    "Gateway port moved to 18789",
+    "Telegram bot token rotated",
+    "WhatsApp pairing needs a fresh QR code",
+    "Discord channel permissions fixed",
+    "Memory flush runs before compaction",
+    "LanceDB table rebuilt with the new embedding model",
+    "FTS index lagged behind; BM25 scores were stale",
+    "Nightly cron job moved to 03:00",
+    "Heartbeat interval set to 30 minutes",
+    "Security review of the exec allowlist",
+    "GPL headers added to the new scripts",
+    "Lucidity dream mode enabled",
+    "Bought groceries and walked the dog",
+    "",
+]
+
+
+def legacy_infer_topic(text: str) -> str:
+    t = text.lower()
+    for k, topic in LEGACY_TOPIC_KEYWORDS.items():
+        if k in t:
+            return topic
+    return "general"
+
+
+def expect(got: object, want: object, label: str) -> None:
+    if got != want:
+        raise SystemExit(f"FAIL: {label}: got {got!r}, expected {want!r}")
+
+
+def main() -> None:
+    clf = tc.TopicClassifier(tc.DEFAULT_TOPICS)
+
+    expect(clf.scores("telegrammed about the cron job"), {"messaging": (1, 0), "automation": (2, 22)}, "word vs partial scores")
+    expect(clf.classify("telegrammed about the cron job"), "automation", "whole-word hit outweighs an in-word hit")
+    expect(clf.classify("crontab and the discord bot"), "messaging", "one whole-word hit vs one in-word hit")
+    weighted = tc.TopicClassifier(tc.DEFAULT_TOPICS, word_weight=1, partial_weight=3)
+    expect(weighted.classify("telegrammed about the cron job"), "messaging", "configured weights")
+
+    expect(clf.classify("cron failed, then discord went quiet"), "automation", "tie goes to the earliest hit")
+    expect(clf.classify("discord went quiet, then cron failed"), "messaging", "tie goes to the earliest hit")
+
+    expect(clf.classify("Bought groceries"), "general", "fallback topic")
+    custom = tc.TopicClassifier.from_config({"default": "inbox", "topics": {"ops": ["deploy"]}})
+    expect(custom.classify("Bought groceries"), "inbox", "configured fallback topic")
+    expect(custom.classify("Deploy went fine"), "ops", "configured topic")
+
+    shipped = tc.load_classifier()
+    for text in SAMPLE:
+        expect(shipped.classify(text), legacy_infer_topic(text), f"parity with TOPIC_KEYWORDS on {text!r}")
+
+    for bad in ({"../x": ["deploy"]}, {"Ops": ["deploy"]}, {"": ["deploy"]}, {"a/b": ["deploy"]}):
+        try:
+            tc.TopicClassifier(bad)
+        except ValueError:
+            continue
+        raise SystemExit(f"FAIL: invalid topic name accepted: {list(bad)}")
+    try:
+        tc.TopicClassifier({"ops": ["deploy"]}, default="../general")
+    except ValueError:
+        pass
+    else:
+        raise SystemExit("FAIL: invalid default topic accepted")
+
+    with tempfile.TemporaryDirectory() as td:
+        cfg = Path(td) / "topics.json"
+        cfg.write_text(json.dumps({"topics": {"ops": ["deploy"]}}), encoding="utf-8")
+        expect(tc.load_classifier(str(cfg)).classify("deploy the release"), "ops", "config file topic")
+        cfg.write_text(json.dumps({"topics": {"releases": ["deploy"]}}), encoding="utf-8")
+        st = cfg.stat()
+        os.utime(cfg, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        expect(tc.load_classifier(str(cfg)).classify("deploy the release"), "releases", "edited config reloaded")
+        cfg.write_text(json.dumps({"topics": {"../escape": ["deploy"]}}), encoding="utf-8")
+        try:
+            tc.load_classifier(str(cfg))
+        except ValueError:
+            pass
+        else:
+            raise SystemExit("FAIL: config with a path-like topic name was loaded")
+
+    print("PASS: topic classifier")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Keyword topic classifier for staged candidates.
+
+Topics and their keywords live in `memory-architecture/config/topics.json`:
+
+{
+  "version": 1,
+  "default": "general",
+  "weights": {"word": 2, "partial": 1},
+  "topics": {"openclaw": ["openclaw", "gateway"], ...}
+}
+
+All keywords are compiled once into a single trie-shaped alternation regex, so
+classifying a text is one left-to-right scan over it; adding keywords deepens
+the trie instead of adding another pass. Each hit scores `weights.word` when it
+stands on word boundaries and `weights.partial` when it is embedded in a longer
+word. The highest-scoring topic wins; ties go to the topic hit first in the text.
+
+Topic names (and the default) become staging file names, so they must match
+`[a-z0-9_-]+`. A loaded config is cached until the file's mtime or size
+changes, so a long-running `--watch` picks up edits.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_TOPICS: Dict[str, List[str]] = {
+    "openclaw": ["openclaw", "gateway"],
+    "messaging": ["telegram", "whatsapp", "discord"],
+    "memory-architecture": ["memory", "lancedb", "fts", "bm25"],
+    "automation": ["cron", "heartbeat"],
+    "security": ["security"],
+    "lucidity": ["gpl", "lucidity"],
+}
+
+SHIPPED_CONFIG = Path(__file__).resolve().parents[1] / "config" / "topics.json"
+
+TOPIC_NAME_RE = re.compile(r"[a-z0-9_-]+")
+
+
+def trie_pattern(words: List[str]) -> str:
+    """Build a regex alternation factored as a trie (longest match preferred)."""
+    trie: Dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        end = "" in node
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        if len(alts) == 1 and not end:
+            return alts[0]
+        return "(?:" + "|".join(alts) + ")" + ("?" if end else "")
+
+    return build(trie)
+
+
+def is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class TopicClassifier:
+    def __init__(
+        self,
+        topics: Dict[str, List[str]],
+        default: str = "general",
+        word_weight: int = 2,
+        partial_weight: int = 1,
+    ) -> None:
+        for name in [default, *topics]:
+            if not isinstance(name, str) or not TOPIC_NAME_RE.fullmatch(name):
+                raise ValueError(f"invalid topic name {name!r}: must match [a-z0-9_-]+")
+        self.default = default
+        self.word_weight = word_weight
+        self.partial_weight = partial_weight
+        self.keyword_topic: Dict[str, str] = {}
+        for topic, keywords in topics.items():
+            for k in keywords:
+                k = str(k).strip().lower()
+                if k:
+                    # First topic listing a keyword owns it.
+                    self.keyword_topic.setdefault(k, topic)
+        pattern = trie_pattern(sorted(self.keyword_topic))
+        # Matching lowercased text case-sensitively is much faster than re.I.
+        self.regex: Optional[re.Pattern[str]] = re.compile(pattern) if pattern else None
+
+    @classmethod
+    def from_config(cls, cfg: Dict) -> "TopicClassifier":
+        weights = cfg.get("weights") or {}
+        return cls(
+            cfg.get("topics") or DEFAULT_TOPICS,
+            default=cfg.get("default") or "general",
+            word_weight=int(weights.get("word", 2)),
+            partial_weight=int(weights.get("partial", 1)),
+        )
+
+    def scores(self, text: str) -> Dict[str, Tuple[int, int]]:
+        """Return {topic: (score, first hit offset)} for every topic hit in `text`."""
+        out: Dict[str, Tuple[int, int]] = {}
+        if self.regex is None:
+            return out
+        text = text.lower()
+        n = len(text)
+        for m in self.regex.finditer(text):
+            a, b = m.span()
+            whole = (a == 0 or not is_word_char(text[a - 1])) and (b == n or not is_word_char(text[b]))
+            topic = self.keyword_topic[m.group(0)]
+            score, first = out.get(topic, (0, a))
+            out[topic] = (score + (self.word_weight if whole else self.partial_weight), first)
+        return out
+
+    def classify(self, text: str) -> str:
+        scores = self.scores(text)
+        if not scores:
+            return self.default
+        return min(scores.items(), key=lambda kv: (-kv[1][0], kv[1][1]))[0]
+
+
+@lru_cache(maxsize=16)
+def classifier_for(path: Optional[str], mtime_ns: int = 0, size: int = 0) -> TopicClassifier:
+    """Classifier for one version (mtime, size) of a config file; None for the built-in topics."""
+    if path is None:
+        return TopicClassifier(DEFAULT_TOPICS)
+    return TopicClassifier.from_config(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def load_classifier(config_path: Optional[str] = None) -> TopicClassifier:
+    """Classifier for a config path (falling back to the shipped config), rebuilt when the file changes."""
+    for p in (Path(config_path) if config_path else None, SHIPPED_CONFIG):
+        if p is None:
+            continue
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        return classifier_for(str(p), st.st_mtime_ns, st.st_size)
+    return classifier_for(None)